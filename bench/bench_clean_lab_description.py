@@ -0,0 +1,83 @@
+"""
+Benchmark de la limpieza de descripciones de lab: fila a fila vs por columnas.
+
+Mide _clean_lab_description aplicada fila a fila, la versión por lotes
+(_clean_lab_descriptions) y, si pandas está instalado, su camino con pandas.
+
+Uso:
+    python bench/bench_clean_lab_description.py                    # dic_lab.csv sintético
+    python bench/bench_clean_lab_description.py dicc/dic_lab.csv
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench.fixtures import write_dictionary_csv
+from src.unify_dictionaries import _clean_lab_description, _clean_lab_descriptions, _dictionary_reader
+
+
+def _read_descriptions(csv_path):
+    """Descripciones no vacías del CSV, como las recibe la limpieza en unify_dictionaries."""
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        reader, ref_col, descr_col = _dictionary_reader(f, os.path.basename(csv_path))
+        return [
+            row.get(descr_col, '').strip() for row in reader
+            if row.get(ref_col, '').strip() and row.get(descr_col, '').strip()
+        ]
+
+
+def _time_clean(clean, texts, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = clean(texts)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('csv_path', nargs='?', help="dic_lab.csv (default: CSV sintético)")
+    parser.add_argument('--rows', type=int, default=500000, help="Filas del CSV sintético")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.csv_path:
+        texts = _read_descriptions(args.csv_path)
+    else:
+        with tempfile.TemporaryDirectory(prefix='bench_lab_') as tmp:
+            csv_path = os.path.join(tmp, 'dic_lab.csv')
+            write_dictionary_csv(csv_path, args.rows)
+            texts = _read_descriptions(csv_path)
+
+    paths = [
+        ('fila a fila', lambda batch: [_clean_lab_description(text) for text in batch]),
+        ('por lotes', _clean_lab_descriptions),
+    ]
+    try:
+        import pandas  # noqa: F401
+        paths.append(('pandas', lambda batch: _clean_lab_descriptions(batch, use_pandas=True)))
+    except ImportError:
+        print("(pandas no instalado: se omite su camino)")
+
+    print(f"Descripciones: {len(texts):,}")
+    expected = None
+    mismatches = 0
+    for name, clean in paths:
+        elapsed, result = _time_clean(clean, texts, args.repeat)
+        if expected is None:
+            expected = result
+        identical = result == expected
+        mismatches += not identical
+        print(f"  {name:11s}: {len(texts) / elapsed:12,.0f} filas/s   idéntico: {identical}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Benchmark de extracción de enlaces: escáner en streaming vs BeautifulSoup.
+
+Uso:
+    python bench/bench_link_scanner.py                    # corpus sintético
+    python bench/bench_link_scanner.py data/wiki_html     # páginas guardadas
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.download_wiki import _extract_wiki_links
+from bench.fixtures import generate_wiki_corpus
+
+
+PAGE_URL = "https://gitlab.com/dsc-clinic/datascope/-/wikis/home"
+
+
+def _time_engine(pages, engine, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page_html in pages.values():
+            _extract_wiki_links(page_html, PAGE_URL, 'home', 'gitlab.com', engine=engine)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pages_dir', nargs='?', help="Directorio con HTML guardados (default: corpus sintético)")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.pages_dir:
+        pages = {
+            str(p): p.read_text(encoding='utf-8')
+            for p in Path(args.pages_dir).rglob('*.html')
+        }
+    else:
+        pages = generate_wiki_corpus()
+
+    total_mb = sum(len(p) for p in pages.values()) / 1e6
+    mismatches = [
+        name for name, page_html in pages.items()
+        if _extract_wiki_links(page_html, PAGE_URL, 'home', 'gitlab.com', engine='soup')
+        != _extract_wiki_links(page_html, PAGE_URL, 'home', 'gitlab.com', engine='stream')
+    ]
+
+    soup_time = _time_engine(pages, 'soup', args.repeat)
+    stream_time = _time_engine(pages, 'stream', args.repeat)
+
+    print(f"Páginas: {len(pages)} ({total_mb:.1f} MB)")
+    print(f"  soup:   {soup_time * 1000 / len(pages):8.2f} ms/página")
+    print(f"  stream: {stream_time * 1000 / len(pages):8.2f} ms/página")
+    print(f"  speed-up: x{soup_time / stream_time:.2f}")
+    print(f"  Diferencias en enlaces: {len(mismatches)}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
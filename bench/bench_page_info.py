@@ -0,0 +1,82 @@
+"""
+Benchmark de extracción de data-page-info: camino rápido vs BeautifulSoup.
+
+Mide la conversión HTML -> Markdown de cada página (_convert_page) con el camino
+rápido y forzando la extracción completa con BeautifulSoup.
+
+Uso:
+    python bench/bench_page_info.py                         # corpus sintético
+    python bench/bench_page_info.py data/wiki_work_html     # páginas guardadas
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import sys
+import time
+from pathlib import Path
+from unittest import mock
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench.fixtures import generate_wiki_corpus
+
+# src/__init__ reexporta la función extract_text con el mismo nombre que el módulo
+extract_text_module = importlib.import_module('src.extract_text')
+
+
+def _convert_soup(page_html, page_name):
+    """Conversión sin camino rápido (comportamiento anterior)."""
+    with mock.patch.object(extract_text_module, '_fast_page_content', return_value=None):
+        return extract_text_module._convert_page(page_html, page_name)
+
+
+def _time_convert(pages, convert, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for name, page_html in pages.items():
+                convert(page_html, name)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pages_dir', nargs='?', help="Directorio con HTML guardados (default: corpus sintético)")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.pages_dir:
+        pages = {
+            p.stem: p.read_text(encoding='utf-8')
+            for p in Path(args.pages_dir).rglob('*.html')
+        }
+    else:
+        pages = generate_wiki_corpus()
+
+    total_mb = sum(len(p) for p in pages.values()) / 1e6
+    fast_hits = sum(1 for p in pages.values() if extract_text_module._fast_page_content(p) is not None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        mismatches = [
+            name for name, page_html in pages.items()
+            if extract_text_module._convert_page(page_html, name) != _convert_soup(page_html, name)
+        ]
+
+    soup_time = _time_convert(pages, _convert_soup, args.repeat)
+    fast_time = _time_convert(pages, extract_text_module._convert_page, args.repeat)
+
+    print(f"Páginas: {len(pages)} ({total_mb:.1f} MB), camino rápido en {fast_hits}")
+    print(f"  soup:   {soup_time * 1000 / len(pages):8.2f} ms/página")
+    print(f"  rápido: {fast_time * 1000 / len(pages):8.2f} ms/página")
+    print(f"  speed-up: x{soup_time / fast_time:.1f}")
+    print(f"  Diferencias en el contenido: {len(mismatches)}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""
+Benchmark del pipeline completo sobre un corpus sintético, con comparación
+contra una ejecución anterior.
+
+Genera una wiki con la forma de las páginas de GitLab (bench/fixtures.py), la
+sirve con un servidor HTTP local (test/wiki_fixture_server.py) y CSV de
+diccionarios grandes, y mide cada paso:
+
+    download_wiki_pages -> filter_useful_pages -> extract_text -> unify_markdowns
+    -> unify_dictionaries -> create_final_output
+
+Cada repetición ejecuta el pipeline desde cero en un directorio nuevo; el tiempo
+de cada paso es la mediana de las repeticiones. Los resultados se guardan en JSON.
+
+Con --compare, compara con un JSON anterior y termina con código 1 si algún paso
+es más lento que la referencia en más de --threshold (relativo) y --min-delta
+segundos (absoluto, para no fallar por ruido en los pasos de milisegundos).
+
+Uso:
+    python bench/bench_pipeline.py --output bench/baseline.json
+    python bench/bench_pipeline.py --compare bench/baseline.json --threshold 0.25
+    python bench/bench_pipeline.py --pages 10 --dictionary-rows 20000 --repeat 1   # rápido
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench.fixtures import generate_dictionary_rows, generate_wiki_corpus, write_dictionary_csv
+from test.wiki_fixture_server import FixtureWikiServer
+
+STAGES = [
+    'download_wiki_pages',
+    'filter_useful_pages',
+    'extract_text',
+    'unify_markdowns',
+    'unify_dictionaries',
+    'create_final_output',
+]
+
+RESULTS_VERSION = 1
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_MIN_DELTA = 0.05
+
+PROMPT = "### PROMPT ###\nEres un creador de querys SQL.\n\n### CONTEXTO ###\n\n### DICCIONARIOS ###\n"
+
+
+def prepare_inputs(work_dir: str, dictionary_rows: int, seed: int = 42) -> Dict[str, str]:
+    """
+    Escribe los archivos de entrada que no vienen de la wiki: prompt, lista de
+    páginas excluidas y CSV de diccionarios (CIE, laboratorio y procedimientos).
+
+    Returns:
+        Diccionario con las rutas ('prompt', 'excluded', 'dicc_dir')
+    """
+    dicc_dir = os.path.join(work_dir, 'dicc')
+    os.makedirs(dicc_dir, exist_ok=True)
+    with open(os.path.join(dicc_dir, 'dic_diagnostic.csv'), 'w', encoding='utf-8') as f:
+        f.write("diag_ref;diag_descr\n")
+        for ref, descr in generate_dictionary_rows(dictionary_rows, kind='icd', seed=seed):
+            f.write(f"{ref};{descr}\n")
+    write_dictionary_csv(os.path.join(dicc_dir, 'dic_lab.csv'), dictionary_rows)
+    with open(os.path.join(dicc_dir, 'dic_procedures.csv'), 'w', encoding='utf-8') as f:
+        f.write("proc_ref;proc_descr\n")
+        for ref, descr in generate_dictionary_rows(dictionary_rows // 4, kind='lab', seed=seed):
+            f.write(f"{ref};{descr}\n")
+
+    paths = {'dicc_dir': dicc_dir}
+    for key, name, content in (('prompt', 'prompt.txt', PROMPT), ('excluded', 'pags_descarte.txt', "home\n")):
+        paths[key] = os.path.join(work_dir, name)
+        with open(paths[key], 'w', encoding='utf-8') as f:
+            f.write(content)
+    return paths
+
+
+def _size(path: str) -> int:
+    return os.path.getsize(path) if path and os.path.exists(path) else 0
+
+
+def run_pipeline_once(base_url: str, inputs: Dict[str, str], run_dir: str, workers: int = 1,
+                      stages: Optional[List[str]] = None) -> Dict[str, Dict]:
+    """
+    Ejecuta el pipeline una vez en run_dir y mide cada paso.
+
+    Los pasos no seleccionados se ejecutan igualmente (los siguientes necesitan
+    su salida) pero no se miden.
+
+    Returns:
+        Diccionario paso -> {"seconds", "items", "bytes"}
+    """
+    from src import (
+        create_final_output, download_wiki_pages, extract_text, filter_useful_pages,
+        unify_dictionaries, unify_markdowns
+    )
+
+    html_dir = os.path.join(run_dir, 'wiki_html')
+    work_dir = os.path.join(run_dir, 'wiki_work_html')
+    markdown_dir = os.path.join(run_dir, 'wiki_markdown')
+    wiki_file = os.path.join(run_dir, 'wiki_unified.md')
+    dictionaries_file = os.path.join(run_dir, 'dictionaries_unified.md')
+    final_file = os.path.join(run_dir, 'vibe_SQL_copilot.txt')
+
+    calls = [
+        ('download_wiki_pages', lambda: download_wiki_pages(
+            f"{base_url}/home", html_dir, rate_limit=0, max_retries=1, respect_existing=False), None),
+        ('filter_useful_pages', lambda: filter_useful_pages(inputs['excluded'], html_dir, work_dir), None),
+        ('extract_text', lambda: extract_text(work_dir, markdown_dir, use_cache=False, workers=workers), None),
+        ('unify_markdowns', lambda: unify_markdowns(markdown_dir, wiki_file, inputs['excluded']), wiki_file),
+        ('unify_dictionaries', lambda: unify_dictionaries(inputs['dicc_dir'], dictionaries_file, workers=workers),
+         dictionaries_file),
+        ('create_final_output', lambda: create_final_output(
+            inputs['prompt'], wiki_file, dictionaries_file, final_file), final_file),
+    ]
+
+    timings = {}
+    for name, call, output_file in calls:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = call()
+        elapsed = time.perf_counter() - start
+        if not result:
+            raise RuntimeError(f"El paso {name} no produjo resultado")
+        if stages is None or name in stages:
+            timings[name] = {
+                'seconds': elapsed,
+                'items': len(result) if isinstance(result, dict) else 1,
+                'bytes': _size(output_file),
+            }
+    return timings
+
+
+def run_benchmark(pages: int = 40, padding_kb: int = 150, dictionary_rows: int = 200000, repeat: int = 3,
+                  workers: int = 1, stages: Optional[List[str]] = None, seed: int = 42) -> Dict:
+    """
+    Genera el corpus y ejecuta el pipeline `repeat` veces.
+
+    Returns:
+        Resultados: parámetros, entorno y, por paso, la mediana, el mínimo y cada ejecución
+    """
+    params = {'pages': pages, 'padding_kb': padding_kb, 'dictionary_rows': dictionary_rows,
+              'repeat': repeat, 'workers': workers, 'seed': seed}
+    runs: Dict[str, List[Dict]] = {}
+    logging.disable(logging.INFO)
+    try:
+        with tempfile.TemporaryDirectory(prefix='bench_pipeline_') as tmp:
+            inputs = prepare_inputs(tmp, dictionary_rows, seed)
+            corpus = generate_wiki_corpus(num_pages=pages, padding_kb=padding_kb, seed=seed)
+            with FixtureWikiServer(pages=corpus, conditional=False) as server:
+                for i in range(repeat):
+                    timings = run_pipeline_once(server.base_url, inputs, os.path.join(tmp, f'run_{i}'),
+                                                workers, stages)
+                    for name, timing in timings.items():
+                        runs.setdefault(name, []).append(timing)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    results = {
+        'version': RESULTS_VERSION,
+        'params': params,
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'stages': {},
+    }
+    for name in STAGES:
+        if name not in runs:
+            continue
+        seconds = [run['seconds'] for run in runs[name]]
+        results['stages'][name] = {
+            'seconds': statistics.median(seconds),
+            'min_seconds': min(seconds),
+            'runs': seconds,
+            'items': runs[name][-1]['items'],
+            'bytes': runs[name][-1]['bytes'],
+        }
+    results['total_seconds'] = sum(stage['seconds'] for stage in results['stages'].values())
+    return results
+
+
+def compare_results(current: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD,
+                    min_delta: float = DEFAULT_MIN_DELTA) -> List[Dict]:
+    """
+    Compara los tiempos de cada paso con los de la referencia.
+
+    Un paso es una regresión si tarda más de baseline * (1 + threshold) y la
+    diferencia supera min_delta segundos.
+
+    Returns:
+        Lista de {"stage", "baseline", "current", "ratio", "regression"} por paso común
+    """
+    rows = []
+    for name in STAGES:
+        if name not in current['stages'] or name not in baseline['stages']:
+            continue
+        before = baseline['stages'][name]['seconds']
+        after = current['stages'][name]['seconds']
+        rows.append({
+            'stage': name,
+            'baseline': before,
+            'current': after,
+            'ratio': after / before if before else float('inf'),
+            'regression': after > before * (1 + threshold) and after - before > min_delta,
+        })
+    return rows
+
+
+def print_results(results: Dict) -> None:
+    params = results['params']
+    print(f"Pipeline: {params['pages']} páginas, {params['dictionary_rows']:,} filas por diccionario, "
+          f"{params['repeat']} repeticiones, workers={params['workers']}")
+    for name, stage in results['stages'].items():
+        print(f"  {name:22s} {stage['seconds'] * 1000:10.1f} ms  (mín {stage['min_seconds'] * 1000:.1f} ms)")
+    print(f"  {'total':22s} {results['total_seconds'] * 1000:10.1f} ms")
+
+
+def print_comparison(rows: List[Dict], threshold: float) -> None:
+    print(f"\nComparación con la referencia (umbral +{threshold:.0%}):")
+    for row in rows:
+        status = "REGRESIÓN" if row['regression'] else "ok"
+        print(f"  {row['stage']:22s} {row['baseline'] * 1000:10.1f} -> {row['current'] * 1000:10.1f} ms "
+              f"({row['ratio']:.2f}x)  {status}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--padding-kb', type=int, default=150, help="Tamaño de relleno de cada página HTML")
+    parser.add_argument('--dictionary-rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--stages', nargs='+', choices=STAGES, help="Pasos a medir (default: todos)")
+    parser.add_argument('--output', help="Archivo JSON de resultados (default: solo por pantalla)")
+    parser.add_argument('--compare', help="JSON de referencia de una ejecución anterior")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--min-delta', type=float, default=DEFAULT_MIN_DELTA)
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.pages, args.padding_kb, args.dictionary_rows, args.repeat,
+                            args.workers, args.stages)
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResultados guardados en {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('params') != results['params']:
+            print("\n[WARN] La referencia se midió con otros parámetros: "
+                  f"{baseline.get('params')}")
+        rows = compare_results(results, baseline, args.threshold, args.min_delta)
+        print_comparison(rows, args.threshold)
+        if any(row['regression'] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Benchmark de memoria de unify_dictionaries: modo en memoria vs streaming.
+
+Genera un CSV sintético de diccionario y ejecuta cada modo en un proceso
+separado, midiendo el pico de memoria residente (RSS) y el tiempo.
+
+Uso:
+    python bench/bench_unify_dictionaries_memory.py                    # 5M filas desordenadas
+    python bench/bench_unify_dictionaries_memory.py --rows 1000000 --sorted
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench.fixtures import write_dictionary_csv
+
+
+def _run_mode(mode, dicc_dir, output_file, chunk_rows):
+    """Ejecuta un modo en este proceso e imprime 'pico_rss_kb segundos'."""
+    from src.unify_dictionaries import unify_dictionaries
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = unify_dictionaries(dicc_dir, output_file, streaming=(mode == 'streaming'), chunk_rows=chunk_rows)
+    elapsed = time.perf_counter() - start
+    if not result:
+        return 1
+    # En Linux ru_maxrss está en KB
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, elapsed)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=5000000)
+    parser.add_argument('--sorted', action='store_true', help="CSV ordenado por código")
+    parser.add_argument('--chunk-rows', type=int, default=200000)
+    parser.add_argument('--run-mode', choices=['memory', 'streaming'], help=argparse.SUPPRESS)
+    parser.add_argument('--dicc-dir', help=argparse.SUPPRESS)
+    parser.add_argument('--output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode:
+        return _run_mode(args.run_mode, args.dicc_dir, args.output, args.chunk_rows)
+
+    with tempfile.TemporaryDirectory(prefix='bench_dicc_') as tmp:
+        dicc_dir = os.path.join(tmp, 'dicc')
+        os.makedirs(dicc_dir)
+        csv_path = os.path.join(dicc_dir, 'dic_lab.csv')
+        write_dictionary_csv(csv_path, args.rows, sorted_refs=args.sorted)
+        print(f"CSV: {args.rows:,} filas ({os.path.getsize(csv_path) / 1e6:.0f} MB, "
+              f"{'ordenado' if args.sorted else 'desordenado'})")
+
+        outputs = {}
+        for mode in ('memory', 'streaming'):
+            outputs[mode] = os.path.join(tmp, f"{mode}.md")
+            completed = subprocess.run(
+                [sys.executable, __file__, '--run-mode', mode, '--dicc-dir', dicc_dir,
+                 '--output', outputs[mode], '--chunk-rows', str(args.chunk_rows)],
+                capture_output=True, text=True, check=True
+            )
+            peak_kb, elapsed = completed.stdout.split()
+            print(f"  {mode:9s}: pico RSS {int(peak_kb) / 1024:8.1f} MB   {float(elapsed):6.1f} s")
+
+        print(f"  Salida: {os.path.getsize(outputs['streaming']) / 1e6:.1f} MB")
+        # Mismas líneas en ambos modos (el orden difiere: streaming escribe por código)
+        with open(outputs['memory'], encoding='utf-8') as a, open(outputs['streaming'], encoding='utf-8') as b:
+            same_lines = sorted(a.read().split('\n')) == sorted(b.read().split('\n'))
+        print(f"  Mismas líneas en ambos modos: {same_lines}")
+        if not same_lines:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
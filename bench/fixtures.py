@@ -0,0 +1,164 @@
+"""
+Generación de un corpus sintético con la estructura de las páginas de GitLab.
+
+Las páginas reales de gitlab.com pesan cientos de KB: cabecera y navegación de
+GitLab, scripts inline, el sidebar escapado en data-custom-sidebar-content y el
+markdown en data-page-info. Este módulo genera páginas con esa forma y tamaño
+para medir el pipeline sin acceso a la wiki.
+"""
+
+import html
+import json
+import random
+from typing import Dict, List
+
+
+WIKI_PREFIX = "/dsc-clinic/datascope/-/wikis"
+
+
+def generate_markdown(page_name: str, links: List[str], rng: random.Random, tables: int = 3) -> str:
+    """Genera el markdown de una página con texto, enlaces y tablas de variables."""
+    lines = [f"The goal of {page_name} is to describe the table and its variables.", ""]
+    for link in links:
+        lines.append(f"- [{link}]({WIKI_PREFIX}/{link} \"{link}\")")
+    for t in range(tables):
+        lines += ["", f"### Table {t}", "", "| Variable | Type | Description |", "| --- | --- | --- |"]
+        for v in range(rng.randint(10, 40)):
+            lines.append(f"| var_{t}_{v} | VARCHAR({rng.randint(8, 255)}) | Descripción de la variable {v} de {page_name} |")
+    return '\r\n'.join(lines)
+
+
+def generate_gitlab_page(page_name: str, sidebar_pages: List[str], links: List[str],
+                         rng: random.Random, padding_kb: int = 150) -> str:
+    """
+    Genera una página HTML con la estructura de una página de wiki de GitLab.
+
+    Args:
+        page_name: Nombre de la página
+        sidebar_pages: Páginas del sidebar personalizado
+        links: Páginas enlazadas desde el contenido
+        rng: Generador aleatorio (para que el corpus sea reproducible)
+        padding_kb: KB aproximados de "ruido" de GitLab (navegación, scripts, svg)
+
+    Returns:
+        HTML de la página
+    """
+    sidebar_html = '<ul>' + ''.join(
+        f'<li><a href="{WIKI_PREFIX}/{p}" data-wiki-page="{p}">{p}</a></li>' for p in sidebar_pages
+    ) + '</ul>'
+    markdown = generate_markdown(page_name, links, rng)
+    page_info = json.dumps({'title': page_name, 'slug': page_name, 'format': 'markdown', 'content': markdown})
+
+    # Ruido típico de GitLab: menús, iconos SVG y scripts
+    noise = []
+    size = 0
+    i = 0
+    while size < padding_kb * 1024:
+        chunk = (
+            f'<li class="gl-new-dropdown-item" data-track-label="item_{i}">'
+            f'<a class="gl-link nav-link" href="/dsc-clinic/datascope/-/issues?page={i}">'
+            f'<svg class="s16" data-testid="issues-icon"><use href="/assets/icons-{rng.randint(0, 10**9):x}.svg#issues"></use></svg>'
+            f'<span class="gl-truncate">Menu item {i}</span></a></li>'
+        )
+        noise.append(chunk)
+        size += len(chunk)
+        i += 1
+    script = '<script>window.gon={' + ','.join(f'"k{j}":"{rng.random()}"' for j in range(200)) + '};</script>'
+
+    content_html = ''.join(f'<p><a href="{WIKI_PREFIX}/{p}">{p}</a></p>' for p in links)
+    return (
+        '<!DOCTYPE html>\n<html class="gl-light" lang="en"><head><meta charset="utf-8">'
+        f'<title>{page_name} · Wiki · Datascope · GitLab</title>{script}</head>'
+        '<body class="ui-indigo" data-page="projects:wikis:show">'
+        '<header class="header-logged-out"><nav aria-label="Explore GitLab"><ul>' + ''.join(noise[:len(noise) // 2]) + '</ul></nav></header>'
+        '<div class="layout-page"><aside class="nav-sidebar"><ul>' + ''.join(noise[len(noise) // 2:]) + '</ul></aside>'
+        f'<div class="content-wrapper"><main class="content" id="content-body">'
+        f'<div id="js-vue-wiki-app" data-page-info="{html.escape(page_info)}" '
+        f'data-custom-sidebar-content="{html.escape(sidebar_html)}" '
+        f'data-content-api="{WIKI_PREFIX}/{page_name}?render_html=true"></div>'
+        f'<div class="wiki-page-details"><h1>{page_name}</h1>{content_html}</div>'
+        '</main></div></div></body></html>'
+    )
+
+
+def generate_wiki_corpus(num_pages: int = 40, padding_kb: int = 150, seed: int = 42) -> Dict[str, str]:
+    """
+    Genera una wiki sintética completa: home con sidebar y páginas enlazadas entre sí.
+
+    Returns:
+        Diccionario nombre de página -> HTML
+    """
+    rng = random.Random(seed)
+    names = ['home'] + [f"Table-{i:03d}" for i in range(1, num_pages)]
+    sidebar = names[1:]
+    pages = {}
+    for i, name in enumerate(names):
+        links = rng.sample(names, k=min(5, len(names)))
+        pages[name] = generate_gitlab_page(name, sidebar, links, rng, padding_kb=padding_kb)
+    return pages
+
+
+ICD_TERMS = [
+    "Atención materna por", "Aflojamiento mecánico de prótesis", "Fractura de", "Lesión de",
+    "Diabetes mellitus tipo 2", "Anemia que complica el embarazo", "Absceso cutáneo en", "Trastorno de",
+]
+ICD_QUALIFIERS = [
+    "tercer trimestre", "segundo trimestre", "ojo derecho", "ojo izquierdo", "contacto inicial",
+    "contacto sucesivo", "secuela", "no especificada", "con complicaciones", "sin complicaciones",
+]
+
+
+def generate_dictionary_rows(num_rows: int, kind: str = 'icd', seed: int = 42) -> List[tuple]:
+    """
+    Genera filas (ref, descr) con la forma de los catálogos reales.
+
+    kind='icd': códigos jerárquicos tipo CIE-10 (letra + 2 dígitos + '.' + subcódigos),
+    con muchas familias de códigos que comparten prefijo y texto inicial.
+    kind='lab': códigos numéricos de laboratorio de 7 cifras.
+
+    Returns:
+        Lista de tuplas (ref, descr), en orden aleatorio como en los CSV exportados
+    """
+    rng = random.Random(seed)
+    rows = {}
+    while len(rows) < num_rows:
+        if kind == 'icd':
+            chapter = f"{rng.choice('ABCDEFGHIJKLMNOPQRSTZ')}{rng.randint(0, 99):02d}"
+            sub = ''.join(rng.choice('0123456789X') for _ in range(rng.randint(1, 4)))
+            ref = f"{chapter}.{sub}"
+            term = ICD_TERMS[sum(map(ord, chapter)) % len(ICD_TERMS)]
+            descr = f"{term} {chapter.lower()} {rng.choice(ICD_QUALIFIERS)}, {rng.choice(ICD_QUALIFIERS)}"
+        else:
+            family = rng.randint(0, num_rows // 20 + 1)
+            ref = f"{family:05d}{rng.randint(0, 99):02d}"
+            descr = f"Determinación {family} en suero {rng.choice(ICD_QUALIFIERS)}"
+        rows[ref] = descr
+    items = list(rows.items())
+    rng.shuffle(items)
+    return items
+
+
+def write_dictionary_csv(path: str, num_rows: int, sorted_refs: bool = False, delimiter: str = ';') -> None:
+    """
+    Escribe un CSV de diccionario sintético (lab_ref;lab_descr) sin tenerlo entero en memoria.
+
+    Los códigos son únicos; con sorted_refs=False aparecen en orden desordenado
+    (permutación multiplicativa), como en los CSV exportados ordenados por descripción.
+
+    Args:
+        path: Ruta del CSV
+        num_rows: Número de filas
+        sorted_refs: Si True, filas ordenadas por código
+        delimiter: Delimitador del CSV
+    """
+    # 7919 es primo: i -> i * 7919 mod n es una permutación si n no es múltiplo de 7919
+    step = 1 if sorted_refs else (7919 if num_rows % 7919 else 7907)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(f"lab_ref{delimiter}lab_descr\n")
+        for i in range(num_rows):
+            code = (i * step) % num_rows
+            family = code // 40
+            f.write(
+                f"{code:08d}{delimiter}Determinación de la {ICD_QUALIFIERS[family % len(ICD_QUALIFIERS)]} "
+                f"familia {family} en suero, muestra {code % 40}\n"
+            )
@@ -2,7 +2,10 @@
 Script principal para descargar y procesar la wiki de Datanex.
 """
 
-from src import download_wiki_pages, filter_useful_pages, extract_text, download_linked_pages, unify_markdowns, unify_dictionaries, create_final_output
+import os
+
+from src.pipeline_runner import PipelineRunner, Stage
+from src import download_wiki_pages, download_wiki_api, filter_useful_pages, extract_text, download_linked_pages, unify_markdowns, unify_dictionaries, create_final_output, build_dictionary_index, create_chunked_output
 
 
 def main():
@@ -11,69 +14,117 @@ def main():
     output_directory = "data/wiki_html"
     useful_pages_file = "pags_descarte.txt"
     work_output_directory = "data/wiki_work_html"
+    # Backend de ingesta: "html" (scraping de páginas renderizadas) o "api" (API de wikis de GitLab)
+    ingestion_backend = "html"
+    # Si True, los pasos 2-6 se omiten cuando sus entradas no cambiaron (ver src/pipeline_runner.py)
+    incremental = True
+    # Procesos para los pasos que se reparten en paralelo (3: HTML -> Markdown, 5: diccionarios)
+    workers = os.cpu_count() or 1
+    # Máximo de tokens de vibe_SQL_copilot.txt (None = incluir toda la wiki y los diccionarios)
+    token_budget = None
     
     # Paso 1: Descargar desde home (que tiene el menú lateral con todas las páginas)
     print("="*60)
     print("PASO 1: Descarga desde home (menú lateral)")
     print("="*60)
-    print("Iniciando descarga desde la página home de Datanex...")
-    print("(Scraping responsable: rate limit 2s, reintentos automáticos, validación de integridad)")
-    pages = download_wiki_pages(
-        base_url=wiki_url,
-        output_dir=output_directory,
-        rate_limit=2.0,           # 2 segundos entre requests (conservador)
-        max_retries=3,            # 3 intentos por página
-        respect_existing=True     # No re-descargar sin cambios
-    )
+    if ingestion_backend == "api":
+        print("Iniciando descarga de Datanex vía API de wikis de GitLab...")
+        pages = download_wiki_api(
+            base_url=wiki_url,
+            output_dir=output_directory,
+            per_page=100,             # Páginas de wiki por request
+            max_retries=3,            # 3 intentos por request
+            respect_existing=True     # No reescribir páginas sin cambios
+        )
+    else:
+        print("Iniciando descarga desde la página home de Datanex...")
+        print("(Scraping responsable: rate limit 2s, reintentos automáticos, validación de integridad)")
+        pages = download_wiki_pages(
+            base_url=wiki_url,
+            output_dir=output_directory,
+            rate_limit=2.0,           # 2 segundos entre requests (conservador)
+            max_retries=3,            # 3 intentos por página
+            respect_existing=True,    # No re-descargar sin cambios
+            excluded_pages=useful_pages_file,  # No guardar las páginas de pags_descarte.txt
+            discover_excluded=True    # Descargarlas solo para seguir sus enlaces (False: ni pedirlas)
+        )
     
     print(f"\nPáginas descargadas exitosamente:")
     for page_name in sorted(pages.keys()):
         print(f"  - {page_name}")
     
+    # Pasos 2-6: ejecución incremental. Cada paso declara sus entradas y salidas y
+    # solo se vuelve a ejecutar si cambió el contenido de sus entradas o parámetros
+    runner = PipelineRunner(state_file="data/pipeline_state.json", force=not incremental)
+    
     # Paso 2: Filtrar páginas (excluyendo las listadas en pags_descarte.txt)
     print("\n" + "="*60)
     print("PASO 2: Filtrado de páginas útiles")
     print("="*60)
     print("(Excluyendo las páginas listadas en pags_descarte.txt)")
     
-    useful_pages = filter_useful_pages(
-        useful_pages_file=useful_pages_file,
-        source_dir=output_directory,
-        output_dir=work_output_directory
-    )
-    
-    print(f"\nPáginas incluidas guardadas en {work_output_directory}:")
-    for page_name in sorted(useful_pages.keys()):
-        print(f"  - {page_name}")
+    useful_pages = runner.run_stage(Stage(
+        name="filter_useful_pages",
+        func=filter_useful_pages,
+        kwargs=dict(
+            useful_pages_file=useful_pages_file,
+            source_dir=output_directory,
+            output_dir=work_output_directory,
+            link_mode="auto",         # Reflink o hardlink en lugar de copiar (copia si no se puede)
+            lazy=True                 # Devolver rutas, no el contenido de cada página
+        ),
+        inputs=[useful_pages_file, f"{output_directory}/*.html"],
+        outputs=[f"{work_output_directory}/*.html"]
+    ))
+    
+    if useful_pages is not None:
+        print(f"\nPáginas incluidas guardadas en {work_output_directory}:")
+        for page_name in sorted(useful_pages.keys()):
+            print(f"  - {page_name}")
     
     # Paso 3: Crear markdowns solo de las páginas útiles
     print("\n" + "="*60)
     print("PASO 3: Extracción a Markdown de páginas útiles")
     print("="*60)
     
-    markdown_pages = extract_text(
-        source_dir=work_output_directory,
-        output_dir="data/wiki_markdown"
-    )
-    
-    print(f"\nMarkdowns guardados en data/wiki_markdown:")
-    for page_name in sorted(markdown_pages.keys()):
-        print(f"  - {page_name}.md")
+    markdown_pages = runner.run_stage(Stage(
+        name="extract_text",
+        func=extract_text,
+        kwargs=dict(
+            source_dir=work_output_directory,
+            output_dir="data/wiki_markdown",
+            workers=workers
+        ),
+        inputs=[f"{work_output_directory}/*.html"],
+        outputs=["data/wiki_markdown/*.md"],
+        ignore_kwargs=["workers"]     # No cambia las salidas: no invalida el paso en otra máquina
+    ))
+    
+    if markdown_pages is not None:
+        print(f"\nMarkdowns guardados en data/wiki_markdown:")
+        for page_name in sorted(markdown_pages.keys()):
+            print(f"  - {page_name}.md")
     
     # Paso 4: Unificar todos los markdowns
     print("\n" + "="*60)
     print("PASO 4: Unificación de todos los markdowns")
     print("="*60)
     
-    unified_file = unify_markdowns(
-        markdown_dir="data/wiki_markdown",
-        output_file="data/wiki_unified.md",
-        excluded_pages_file=useful_pages_file
-    )
+    unified_file = runner.run_stage(Stage(
+        name="unify_markdowns",
+        func=unify_markdowns,
+        kwargs=dict(
+            markdown_dir="data/wiki_markdown",
+            output_file="data/wiki_unified.md",
+            excluded_pages_file=useful_pages_file
+        ),
+        inputs=["data/wiki_markdown/*.md", useful_pages_file],
+        outputs=["data/wiki_unified.md"]
+    ))
     
     if unified_file:
         print(f"\n[OK] Archivo unificado creado: {unified_file}")
-    else:
+    elif unified_file is not None:
         print("\n[WARN] No se pudo crear el archivo unificado")
     
     # Paso 5: Unificar diccionarios CSV
@@ -81,33 +132,79 @@ def main():
     print("PASO 5: Unificación de diccionarios CSV")
     print("="*60)
     
-    dictionaries_file = unify_dictionaries(
-        dicc_dir="dicc",
-        output_file="dicc/dictionaries_unified.md"
-    )
+    dictionaries_file = runner.run_stage(Stage(
+        name="unify_dictionaries",
+        func=unify_dictionaries,
+        kwargs=dict(
+            dicc_dir="dicc",
+            output_file="dicc/dictionaries_unified.md",
+            workers=workers
+        ),
+        inputs=["dicc/*.csv"],
+        outputs=["dicc/dictionaries_unified.md"],
+        ignore_kwargs=["workers"]
+    ))
     
     if dictionaries_file:
         print(f"\n[OK] Archivo de diccionarios unificado creado: {dictionaries_file}")
-    else:
+    elif dictionaries_file is not None:
         print("\n[WARN] No se pudo crear el archivo de diccionarios unificado")
     
+    # Índice de búsqueda de los diccionarios (python -m src.dictionary_index query "...")
+    index_file = runner.run_stage(Stage(
+        name="dictionary_index",
+        func=build_dictionary_index,
+        kwargs=dict(
+            dictionaries_file="dicc/dictionaries_unified.md",
+            index_file="dicc/dictionaries.idx"
+        ),
+        inputs=["dicc/dictionaries_unified.md"],
+        outputs=["dicc/dictionaries.idx"]
+    ))
+    
+    if index_file:
+        print(f"\n[OK] Índice de diccionarios creado: {index_file}")
+    
     # Paso 6: Crear archivo final
     print("\n" + "="*60)
     print("PASO 6: Creación del archivo final")
     print("="*60)
     
-    final_file = create_final_output(
-        prompt_file="prompt.txt",
-        wiki_unified_file="data/wiki_unified.md",
-        dictionaries_file="dicc/dictionaries_unified.md",
-        output_file="vibe_SQL_copilot.txt"
-    )
+    final_file = runner.run_stage(Stage(
+        name="create_final_output",
+        func=create_final_output,
+        kwargs=dict(
+            prompt_file="prompt.txt",
+            wiki_unified_file="data/wiki_unified.md",
+            dictionaries_file="dicc/dictionaries_unified.md",
+            output_file="vibe_SQL_copilot.txt",
+            token_budget=token_budget
+        ),
+        inputs=["prompt.txt", "data/wiki_unified.md", "dicc/dictionaries_unified.md"],
+        outputs=["vibe_SQL_copilot.txt"]
+    ))
     
     if final_file:
         print(f"\n[OK] Archivo final creado: {final_file}")
-    else:
-        print("\n[WARN] No se pudo crear el archivo final")    
+    elif final_file is not None:
+        print("\n[WARN] No se pudo crear el archivo final")
+    
+    # Mismo contenido por fragmentos (una página o diccionario por archivo) con manifest.json
+    manifest_file = runner.run_stage(Stage(
+        name="create_chunked_output",
+        func=create_chunked_output,
+        kwargs=dict(
+            prompt_file="prompt.txt",
+            wiki_unified_file="data/wiki_unified.md",
+            dictionaries_file="dicc/dictionaries_unified.md",
+            output_dir="data/chunks"
+        ),
+        inputs=["prompt.txt", "data/wiki_unified.md", "dicc/dictionaries_unified.md"],
+        outputs=["data/chunks"]
+    ))
+    
+    if manifest_file:
+        print(f"\n[OK] Salida por fragmentos creada: {manifest_file}")
 
 if __name__ == "__main__":
-    main()
-
+    main()
\ No newline at end of file
@@ -3,10 +3,13 @@ Módulo para descargar y procesar la wiki de Datanex.
 """
 
 from .download_wiki import download_wiki_pages, filter_useful_pages, download_linked_pages
+from .gitlab_api import download_wiki_api
 from .extract_text import extract_text
 from .unify_markdown import unify_markdowns
 from .unify_dictionaries import unify_dictionaries
 from .create_final_output import create_final_output
+from .dictionary_index import build_dictionary_index, create_retrieval_output
+from .chunked_output import create_chunked_output
 
-__all__ = ['download_wiki_pages', 'filter_useful_pages', 'download_linked_pages', 'extract_text', 'unify_markdowns', 'unify_dictionaries', 'create_final_output']
+__all__ = ['download_wiki_pages', 'download_wiki_api', 'filter_useful_pages', 'download_linked_pages', 'extract_text', 'unify_markdowns', 'unify_dictionaries', 'create_final_output', 'build_dictionary_index', 'create_retrieval_output', 'create_chunked_output']
 
@@ -0,0 +1,327 @@
+"""
+Salida por fragmentos del archivo final, con un manifest.json.
+
+vibe_SQL_copilot.txt es un único archivo de varios MB que cada consumidor tiene
+que subir y releer entero aunque solo haya cambiado una página. Este módulo
+escribe el mismo contenido como un directorio de fragmentos:
+
+    data/chunks/
+        manifest.json
+        prompt.txt
+        wiki/home.md, wiki/the-g-labs-table.md, ...
+        dicc/diagnostic-l02-211.md, dicc/diagnostic-o99-012.md, dicc/lab.md, ...
+
+Un fragmento por página de la wiki y por diccionario; los diccionarios de más de
+max_chunk_bytes se parten por líneas completas en límites definidos por el
+contenido: una línea cierra un fragmento según el hash de la propia línea (con
+probabilidad proporcional a su tamaño), no según la posición en bytes. Así,
+insertar o quitar una fila solo cambia el fragmento que la contiene y los
+siguientes conservan sus límites. Las líneas de un diccionario siguen el orden
+del CSV (no el de los refs), por eso los límites no se basan en prefijos de ref.
+El manifest guarda, para
+cada fragmento, su tamaño en bytes, los tokens aproximados y el SHA256, de modo
+que las herramientas que lo consumen pueden cargar solo lo que necesitan y
+volver a sincronizar solo los fragmentos cuyo hash cambió. Los fragmentos sin
+cambios no se reescriben (conservan su fecha de modificación).
+
+Los nombres de los fragmentos dependen solo del título (no de la posición):
+añadir o quitar una página no renombra las siguientes. Los trozos de un
+diccionario partido se nombran por el ref de su primera línea. El orden está en el
+campo "order" del manifest.
+
+Los fragmentos son trozos exactos del contenido: uniéndolos con su separador
+se obtiene de nuevo el archivo monolítico (create_final_output(chunks_dir=...)).
+"""
+
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from .context_budget import iter_dictionary_sections, iter_wiki_pages, page_title, resolve_tokenizer
+from .dictionary_index import normalize_text
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 3
+PROMPT_CHUNK = "prompt.txt"
+
+# Tamaño máximo de un fragmento de diccionario antes de partirlo
+DEFAULT_MAX_CHUNK_BYTES = 256 * 1024
+
+# Un diccionario partido se corta de media cada max_chunk_bytes / CUT_DIVISOR
+# bytes (más el mínimo), de modo que casi nunca hace falta un corte forzado por tamaño
+CUT_DIVISOR = 4
+
+
+def _slug(title: str, default: str) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", normalize_text(title)).strip("-")[:60].rstrip("-")
+    return slug or default
+
+
+def _line_ref(line: str) -> str:
+    """Ref de una línea de diccionario ("E11.65:..." o "LABHG|1:...")."""
+    return re.split(r"[:|]", line, maxsplit=1)[0]
+
+
+def split_wiki_chunks(wiki_content: str) -> List[dict]:
+    """
+    Divide wiki_unified.md en un fragmento por página.
+
+    Returns:
+        Lista de fragmentos {"section", "title", "separator", "text"}; el separator
+        es el texto exacto que los une con el fragmento anterior
+    """
+    return [{"section": "wiki", "title": page_title(page), "separator": separator, "text": page}
+            for separator, page in iter_wiki_pages(wiki_content)]
+
+
+def _is_cut_line(data: bytes, target_bytes: int) -> bool:
+    """
+    True si la línea cierra un fragmento: depende solo de su contenido, con
+    probabilidad len(data) / target_bytes (fragmentos de ~target_bytes de media).
+    """
+    value = int.from_bytes(hashlib.blake2b(data, digest_size=4).digest(), "big")
+    return value * target_bytes < len(data) << 32
+
+
+def _split_lines(section: str, max_chunk_bytes: int) -> List[List[str]]:
+    """
+    Parte una sección en grupos de líneas completas de como mucho max_chunk_bytes
+    (salvo líneas sueltas más grandes), cortando tras las líneas de _is_cut_line.
+    """
+    lines = section.splitlines(keepends=True)
+    if len(section.encode("utf-8")) <= max_chunk_bytes:
+        return [lines]
+    target_bytes = max(1, max_chunk_bytes // CUT_DIVISOR)
+    min_bytes = target_bytes // 2
+    parts = [[]]
+    size = 0
+    for line in lines:
+        data = line.encode("utf-8")
+        if parts[-1] and size + len(data) > max_chunk_bytes:
+            parts.append([])
+            size = 0
+        parts[-1].append(line)
+        size += len(data)
+        if size >= min_bytes and _is_cut_line(data, target_bytes):
+            parts.append([])
+            size = 0
+    if not parts[-1]:
+        parts.pop()
+    return parts
+
+
+def split_dictionary_chunks(dictionaries_content: str, max_chunk_bytes: int = DEFAULT_MAX_CHUNK_BYTES) -> List[dict]:
+    """
+    Divide dictionaries_unified.md en un fragmento por diccionario, partiendo los
+    que superan max_chunk_bytes por líneas completas en límites definidos por el
+    contenido (ver _split_lines).
+
+    Returns:
+        Lista de fragmentos {"section", "title", "part", "separator", "text", "refs"}
+    """
+    chunks = []
+    for title, section in iter_dictionary_sections(dictionaries_content):
+        parts = _split_lines(section, max_chunk_bytes)
+        for part, lines in enumerate(parts):
+            refs = [_line_ref(line) for line in lines if line.strip() and not line.startswith("## ")]
+            chunks.append({
+                "section": "dicc",
+                "title": title,
+                "part": part,
+                "separator": "",
+                "text": "".join(lines),
+                "refs": [refs[0], refs[-1]] if refs else [],
+            })
+    return chunks
+
+
+def _chunk_paths(chunks: List[dict]) -> None:
+    """
+    Asigna a cada fragmento su ruta relativa dentro del directorio, a partir del
+    slug del título (y, en los diccionarios partidos, del primer ref de cada
+    trozo). Si dos rutas coinciden, las siguientes llevan el sufijo -2, -3...
+    """
+    used = set()
+
+    def unique(base: str) -> str:
+        candidate, number = base, 1
+        while candidate in used:
+            number += 1
+            candidate = f"{base}-{number}"
+        used.add(candidate)
+        return candidate
+
+    dictionary = ""
+    split = False
+    for index, chunk in enumerate(chunks):
+        if chunk["section"] == "wiki":
+            chunk["path"] = f"{unique('wiki/' + _slug(chunk['title'], 'page'))}.md"
+            continue
+        if chunk["part"] == 0:
+            dictionary = unique("dicc/" + _slug(chunk["title"], "dictionary"))
+            following = chunks[index + 1] if index + 1 < len(chunks) else None
+            split = following is not None and following["section"] == "dicc" and following["part"] == 1
+        if split:
+            first_ref = chunk["refs"][0] if chunk["refs"] else ""
+            chunk["path"] = f"{unique(dictionary + '-' + _slug(first_ref, 'part'))}.md"
+        else:
+            chunk["path"] = f"{dictionary}.md"
+
+
+def load_manifest(chunks_dir: str) -> dict:
+    """Lee el manifest.json de un directorio de fragmentos."""
+    with open(os.path.join(chunks_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_if_changed(output_dir: str, relative: str, data: bytes, digest: str, previous: Dict[str, str]) -> bool:
+    """Escribe el fragmento si su hash cambió o no existe. Devuelve True si lo escribió."""
+    path = os.path.join(output_dir, relative)
+    if previous.get(relative) == digest and os.path.exists(path):
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def write_chunked_output(
+    prompt_content: str,
+    wiki_content: str,
+    dictionaries_content: str,
+    output_dir: str = "data/chunks",
+    max_chunk_bytes: int = DEFAULT_MAX_CHUNK_BYTES,
+    tokenizer=None
+) -> Tuple[dict, int]:
+    """
+    Escribe los fragmentos y el manifest a partir del contenido ya leído.
+
+    Returns:
+        Tupla (manifest, número de fragmentos reescritos)
+    """
+    from .create_final_output import _insert_sections
+
+    count_tokens, tokenizer_name = resolve_tokenizer(tokenizer)
+    chunks = split_wiki_chunks(wiki_content) + split_dictionary_chunks(dictionaries_content, max_chunk_bytes)
+    _chunk_paths(chunks)
+    chunks.insert(0, {"section": "prompt", "title": "prompt", "separator": "", "text": prompt_content,
+                      "path": PROMPT_CHUNK})
+
+    try:
+        previous = {c["path"]: c["sha256"] for c in load_manifest(output_dir).get("chunks", [])}
+    except (OSError, ValueError):
+        previous = {}
+
+    written = 0
+    entries = []
+    for order, chunk in enumerate(chunks):
+        data = chunk.pop("text").encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        if _write_if_changed(output_dir, chunk["path"], data, digest, previous):
+            written += 1
+        entry = {"path": chunk.pop("path"), **chunk, "order": order, "bytes": len(data),
+                 "tokens": count_tokens(data.decode("utf-8")), "sha256": digest}
+        entries.append(entry)
+
+    # Fragmentos de una ejecución anterior que ya no existen
+    current = {entry["path"] for entry in entries}
+    for subdir in ("wiki", "dicc"):
+        directory = os.path.join(output_dir, subdir)
+        if os.path.isdir(directory):
+            for name in sorted(os.listdir(directory)):
+                if f"{subdir}/{name}" not in current:
+                    os.remove(os.path.join(directory, name))
+
+    output = _insert_sections(prompt_content, wiki_content, dictionaries_content).encode("utf-8")
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "tokenizer": tokenizer_name,
+        "output_bytes": len(output),
+        "output_sha256": hashlib.sha256(output).hexdigest(),
+        "total_tokens": sum(entry["tokens"] for entry in entries),
+        "chunks": entries,
+    }
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+    return manifest, written
+
+
+def read_chunked_sections(chunks_dir: str, verify: bool = True) -> Tuple[str, str, str]:
+    """
+    Reconstruye (prompt, wiki, diccionarios) uniendo los fragmentos del manifest.
+
+    Args:
+        chunks_dir: Directorio con manifest.json
+        verify: Comprobar el SHA256 de cada fragmento
+
+    Returns:
+        Tupla (prompt_content, wiki_content, dictionaries_content)
+
+    Raises:
+        ValueError: Si un fragmento no coincide con el hash del manifest
+    """
+    manifest = load_manifest(chunks_dir)
+    sections: Dict[str, List[str]] = {"prompt": [], "wiki": [], "dicc": []}
+    for entry in sorted(manifest["chunks"], key=lambda e: e["order"]):
+        with open(os.path.join(chunks_dir, entry["path"]), "rb") as f:
+            data = f.read()
+        if verify and hashlib.sha256(data).hexdigest() != entry["sha256"]:
+            raise ValueError(f"El fragmento {entry['path']} no coincide con el manifest")
+        sections[entry["section"]].append(entry["separator"] + data.decode("utf-8"))
+    return "".join(sections["prompt"]), "".join(sections["wiki"]), "".join(sections["dicc"])
+
+
+def create_chunked_output(
+    prompt_file: str = "prompt.txt",
+    wiki_unified_file: str = "data/wiki_unified.md",
+    dictionaries_file: str = "dicc/dictionaries_unified.md",
+    output_dir: str = "data/chunks",
+    max_chunk_bytes: int = DEFAULT_MAX_CHUNK_BYTES,
+    tokenizer: Optional[str] = None
+) -> str:
+    """
+    Crea la salida por fragmentos: un archivo por página de la wiki y por
+    diccionario (o trozo de diccionario), más manifest.json.
+
+    Args:
+        prompt_file: Archivo con el prompt inicial
+        wiki_unified_file: Archivo markdown unificado de la wiki
+        dictionaries_file: Archivo markdown unificado de diccionarios
+        output_dir: Directorio de los fragmentos
+        max_chunk_bytes: Tamaño a partir del cual un diccionario se parte en trozos
+        tokenizer: Función texto -> tokens o nombre (ver context_budget.get_tokenizer)
+
+    Returns:
+        Ruta del manifest.json (o "" si hubo un error)
+    """
+    contents = []
+    for path in (prompt_file, wiki_unified_file, dictionaries_file):
+        if not os.path.exists(path):
+            print(f"Error: No se encontró el archivo {path}")
+            return ""
+        with open(path, "r", encoding="utf-8") as f:
+            contents.append(f.read())
+    prompt_content, wiki_content, dictionaries_content = contents
+
+    # Mismo contenido que create_final_output
+    manifest, written = write_chunked_output(
+        prompt_content, wiki_content.strip(), dictionaries_content.strip(),
+        output_dir, max_chunk_bytes, tokenizer
+    )
+
+    sections = {}
+    for entry in manifest["chunks"]:
+        sections[entry["section"]] = sections.get(entry["section"], 0) + 1
+    print(f"Salida por fragmentos en {output_dir}:")
+    print(f"  - Páginas de wiki: {sections.get('wiki', 0)}")
+    print(f"  - Fragmentos de diccionarios: {sections.get('dicc', 0)}")
+    print(f"  - Reescritos: {written} de {len(manifest['chunks'])} (el resto sin cambios)")
+    print(f"  - Tokens aproximados: {manifest['total_tokens']:,}")
+    return os.path.join(output_dir, MANIFEST_FILE)
@@ -0,0 +1,278 @@
+"""
+Selección del contexto del prompt final con un presupuesto de tokens.
+
+El archivo final completo (toda la wiki y todos los diccionarios) supera la
+ventana de contexto de la mayoría de modelos. Este módulo elige qué bloques
+entran en las secciones ### CONTEXTO ### y ### DICCIONARIOS ### sin pasar de
+un número de tokens, por orden de prioridad:
+
+1. Páginas de la wiki con definiciones de tablas
+2. Secciones de diccionarios, de más a menos usadas (las que no caben enteras
+   se truncan por líneas, siempre por el mismo punto)
+3. El resto de páginas de la wiki
+
+Los bloques incluidos se escriben en su orden original y el informe indica
+qué se truncó y qué se omitió.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+# Aproximación offline: cada palabra cuenta un token por cada 4 caracteres y
+# cada signo de puntuación un token (se acerca a los tokenizadores BPE en texto
+# con muchos códigos y tablas)
+_TOKEN_RE = re.compile(r"\w{1,4}|[^\w\s]")
+
+# Separador de páginas en wiki_unified.md (ver unify_markdowns)
+_PAGE_SEPARATOR_RE = re.compile(r"\n+---\n+")
+DEFAULT_PAGE_SEPARATOR = "\n---\n"
+
+# Línea separadora de cabecera de una tabla markdown: |---|---|, | - | - |, |:--|
+_TABLE_RULE_RE = re.compile(r"^\|\s*:?-+:?\s*\|", re.MULTILINE)
+
+# Inicio de cada sección de diccionarios.md: "## Nombre"
+_DICTIONARY_SECTION_RE = re.compile(r"^(?=## )", re.MULTILINE)
+
+PRIORITY_WIKI_TABLES = 0
+PRIORITY_DICTIONARIES = 1
+PRIORITY_WIKI_OTHER = 2
+
+Tokenizer = Callable[[str], int]
+
+
+def approx_token_count(text: str) -> int:
+    """Número aproximado de tokens de un texto (sin dependencias ni red)."""
+    return len(_TOKEN_RE.findall(text))
+
+
+def get_tokenizer(name: str = "approx") -> Tokenizer:
+    """
+    Devuelve una función que cuenta tokens.
+
+    Args:
+        name: "approx" (aproximación offline, por defecto), "chars4" (caracteres / 4)
+              o "tiktoken:<encoding>" (p. ej. "tiktoken:cl100k_base", requiere tiktoken)
+
+    Returns:
+        Función texto -> número de tokens
+    """
+    if name == "approx":
+        return approx_token_count
+    if name == "chars4":
+        return lambda text: (len(text) + 3) // 4
+    if name.startswith("tiktoken:"):
+        import tiktoken
+
+        encoding = tiktoken.get_encoding(name.split(":", 1)[1])
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    raise ValueError(f"Tokenizador desconocido: {name}")
+
+
+def resolve_tokenizer(tokenizer: Union[str, Tokenizer, None]) -> Tuple[Tokenizer, str]:
+    """Devuelve (función, nombre) a partir de un nombre, una función o None."""
+    if tokenizer is None:
+        return approx_token_count, "approx"
+    if isinstance(tokenizer, str):
+        return get_tokenizer(tokenizer), tokenizer
+    return tokenizer, getattr(tokenizer, "__name__", type(tokenizer).__name__)
+
+
+@dataclass
+class ContextBlock:
+    """
+    Bloque seleccionable del contexto.
+
+    Attributes:
+        section: "wiki" o "dicc"
+        title: Título de la página o nombre del diccionario
+        order: Posición original dentro de su sección
+        priority: Prioridad (menor = antes)
+        lines: Líneas del bloque
+        separator: Texto que lo separa del bloque anterior incluido
+        truncatable: Si puede incluirse solo en parte (por líneas)
+        usage: Frecuencia de uso (ordena los bloques de igual prioridad)
+    """
+    section: str
+    title: str
+    order: int
+    priority: int
+    lines: List[str]
+    separator: str = ""
+    truncatable: bool = False
+    usage: int = 0
+    kept_lines: int = field(default=0, init=False)
+    tokens: int = field(default=0, init=False)
+    cost: int = field(default=0, init=False)
+
+
+def page_title(page: str) -> str:
+    """Título de una página de la wiki: su primer encabezado o, si no tiene, su primera línea."""
+    for line in page.split("\n"):
+        if line.startswith("#"):
+            return line.lstrip("#").strip()
+    return page.strip().split("\n", 1)[0][:60]
+
+
+def iter_wiki_pages(wiki_content: str) -> Iterator[Tuple[str, str]]:
+    """
+    Recorre las páginas de wiki_unified.md. Lo usan también los fragmentos de
+    chunked_output, así que ambas salidas parten las páginas por el mismo sitio.
+
+    Yields:
+        Tuplas (separador, página); el separador es el texto exacto que une la
+        página con la anterior ("" en la primera)
+    """
+    position = 0
+    separator = ""
+    for match in _PAGE_SEPARATOR_RE.finditer(wiki_content):
+        yield separator, wiki_content[position:match.start()]
+        position = match.end()
+        separator = match.group()
+    yield separator, wiki_content[position:]
+
+
+def iter_dictionary_sections(dictionaries_content: str) -> Iterator[Tuple[str, str]]:
+    """
+    Recorre las secciones "## Nombre" de dictionaries_unified.md (sin perder
+    texto: unidas reproducen el contenido).
+
+    Yields:
+        Tuplas (nombre del diccionario, sección)
+    """
+    for section in _DICTIONARY_SECTION_RE.split(dictionaries_content):
+        if section:
+            title = section.split("\n", 1)[0][3:].strip() if section.startswith("## ") else ""
+            yield title, section
+
+
+def split_wiki_pages(wiki_content: str) -> List[ContextBlock]:
+    """Divide wiki_unified.md en páginas; las que definen tablas van primero."""
+    blocks = []
+    for order, (separator, page) in enumerate(iter_wiki_pages(wiki_content)):
+        blocks.append(ContextBlock(
+            section="wiki",
+            title=page_title(page),
+            order=order,
+            priority=PRIORITY_WIKI_TABLES if _TABLE_RULE_RE.search(page) else PRIORITY_WIKI_OTHER,
+            lines=page.split("\n"),
+            separator=separator,
+        ))
+    return blocks
+
+
+def split_dictionary_sections(dictionaries_content: str) -> List[ContextBlock]:
+    """Divide dictionaries_unified.md en secciones "## Nombre"."""
+    blocks = []
+    sections = [(title, part) for title, part in iter_dictionary_sections(dictionaries_content) if part.strip()]
+    for order, (title, part) in enumerate(sections):
+        body = part.rstrip("\n")
+        blocks.append(ContextBlock(
+            section="dicc",
+            title=title,
+            order=order,
+            priority=PRIORITY_DICTIONARIES,
+            lines=body.split("\n"),
+            separator="\n\n" if order else "",
+            truncatable=True,
+        ))
+    return blocks
+
+
+def dictionary_usage_from_wiki(wiki_content: str, titles: List[str]) -> Dict[str, int]:
+    """
+    Estima la frecuencia de uso de cada diccionario como el número de veces que
+    la wiki lo menciona al inicio de una palabra (p. ej. "Lab" en g_labs o
+    laboratory, pero no en available).
+    """
+    wiki_lower = wiki_content.lower()
+    return {
+        title: len(re.findall(r"(?<![a-z])" + re.escape(title.lower()), wiki_lower))
+        for title in titles if title
+    }
+
+
+def _render(blocks: List[ContextBlock]) -> str:
+    """Une los bloques incluidos en su orden original."""
+    parts = []
+    for block in sorted((b for b in blocks if b.kept_lines), key=lambda b: b.order):
+        if parts:
+            parts.append(block.separator or DEFAULT_PAGE_SEPARATOR)
+        parts.append("\n".join(block.lines[:block.kept_lines]))
+    return "".join(parts)
+
+
+def select_context(
+    base_tokens: int,
+    wiki_content: str,
+    dictionaries_content: str,
+    token_budget: int,
+    tokenizer: Tokenizer = approx_token_count,
+    dictionary_usage: Optional[Dict[str, int]] = None
+) -> Tuple[str, str, dict]:
+    """
+    Elige el contenido de wiki y diccionarios que cabe en el presupuesto.
+
+    Args:
+        base_tokens: Tokens del prompt sin contexto ni diccionarios
+        wiki_content: Contenido de wiki_unified.md
+        dictionaries_content: Contenido de dictionaries_unified.md
+        token_budget: Máximo de tokens del archivo final
+        tokenizer: Función texto -> número de tokens
+        dictionary_usage: Frecuencia de uso por nombre de diccionario (por defecto,
+                          menciones en la wiki)
+
+    Returns:
+        Tupla (wiki_content, dictionaries_content, informe)
+    """
+    wiki_blocks = split_wiki_pages(wiki_content)
+    dictionary_blocks = split_dictionary_sections(dictionaries_content)
+    if dictionary_usage is None:
+        dictionary_usage = dictionary_usage_from_wiki(wiki_content, [b.title for b in dictionary_blocks])
+    for block in dictionary_blocks:
+        block.usage = dictionary_usage.get(block.title, 0)
+
+    blocks = wiki_blocks + dictionary_blocks
+    remaining = token_budget - base_tokens
+    for block in sorted(blocks, key=lambda b: (b.priority, -b.usage, b.order)):
+        separator_tokens = tokenizer(block.separator or DEFAULT_PAGE_SEPARATOR)
+        block.cost = tokenizer("\n".join(block.lines)) + separator_tokens
+        if block.cost <= remaining:
+            block.kept_lines = len(block.lines)
+            block.tokens = block.cost
+            remaining -= block.cost
+        elif block.truncatable:
+            # Líneas completas desde el principio mientras quepan
+            used = separator_tokens
+            kept = 0
+            for line in block.lines:
+                line_tokens = tokenizer(line + "\n")
+                if used + line_tokens > remaining:
+                    break
+                used += line_tokens
+                kept += 1
+            # Solo la cabecera (sin ninguna entrada) no se incluye
+            if any(block.lines[1:kept]):
+                block.kept_lines = kept
+                block.tokens = used
+                remaining -= used
+
+    report = {
+        "token_budget": token_budget,
+        "prompt_tokens": base_tokens,
+        "included": [],
+        "truncated": [],
+        "dropped": [],
+    }
+    for block in blocks:
+        entry = {"section": block.section, "title": block.title}
+        if block.kept_lines == len(block.lines):
+            report["included"].append(dict(entry, tokens=block.tokens))
+        elif block.kept_lines:
+            report["truncated"].append(dict(entry, tokens=block.tokens, full_tokens=block.cost,
+                                            lines_kept=block.kept_lines, lines_total=len(block.lines)))
+        else:
+            report["dropped"].append(dict(entry, full_tokens=block.cost))
+
+    return _render(wiki_blocks), _render(dictionary_blocks), report
+
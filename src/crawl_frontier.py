@@ -0,0 +1,151 @@
+"""
+Frontera de rastreo (cola de páginas pendientes) para el crawler de la wiki.
+
+Sustituye la lista con `pop(0)` y comprobaciones `in` (O(n) cada una) por
+deques con un conjunto de pertenencia, de modo que encolar, desencolar y
+deduplicar son O(1) incluso con wikis de miles de páginas.
+"""
+
+from collections import deque
+from typing import Deque, Dict, Iterator, Optional, Set
+
+from .page_exclusions import ExclusionMatcher
+
+
+class CrawlFrontier:
+    """
+    Cola FIFO de páginas pendientes con deduplicación O(1).
+
+    Una página solo puede estar una vez en la cola a la vez. Las páginas ya
+    procesadas se filtran con el conjunto `done` que se pasa a `push`.
+
+    Con priority=True las páginas descubiertas en el sidebar se atienden antes
+    que las descubiertas en el contenido. Con max_depth se descartan las
+    páginas a más de max_depth enlaces de la página inicial, y con exclude las
+    páginas excluidas (la página inicial nunca se descarta).
+
+    Args:
+        priority: Si True, dos niveles de prioridad (sidebar primero)
+        max_depth: Profundidad máxima de enlaces desde la página inicial (None = sin límite)
+        exclude: Páginas que no se encolan (ver page_exclusions)
+    """
+
+    SIDEBAR_AREAS = ('custom-sidebar', 'sidebar')
+
+    def __init__(self, priority: bool = False, max_depth: Optional[int] = None,
+                 exclude: Optional[ExclusionMatcher] = None):
+        self.priority = priority
+        self.max_depth = max_depth
+        self.exclude = exclude
+        self._high: Deque[str] = deque()
+        self._low: Deque[str] = deque()
+        self._queued: Set[str] = set()
+        self.depth: Dict[str, int] = {}
+        # Estadísticas de descubrimiento
+        self.pages_parsed = 0
+        self.pages_discovered = 0
+        self.max_queue_depth = 0
+        self.skipped_by_depth = 0
+        self.skipped_by_exclusion = 0
+
+    def __len__(self) -> int:
+        return len(self._high) + len(self._low)
+
+    def __bool__(self) -> bool:
+        return bool(self._high) or bool(self._low)
+
+    def __contains__(self, page_name: str) -> bool:
+        return page_name in self._queued
+
+    def __iter__(self) -> Iterator[str]:
+        """Recorre la cola en el orden en que se desencolará."""
+        yield from self._high
+        yield from self._low
+
+    def push(self, page_name: str, done: Set[str], area: str = 'content', parent: Optional[str] = None) -> bool:
+        """
+        Encola una página si no está ya en la cola ni procesada.
+
+        Args:
+            page_name: Página a encolar
+            done: Páginas ya procesadas
+            area: Área donde se encontró el enlace ('custom-sidebar', 'sidebar' o 'content')
+            parent: Página donde se encontró el enlace (None para la página inicial)
+
+        Returns:
+            True si la página se añadió a la cola
+        """
+        if page_name in self._queued or page_name in done:
+            return False
+
+        depth = self.depth[parent] + 1 if parent is not None else 0
+        if self.max_depth is not None and depth > self.max_depth:
+            self.skipped_by_depth += 1
+            return False
+        if parent is not None and self.exclude is not None and self.exclude.matches(page_name):
+            self.skipped_by_exclusion += 1
+            return False
+
+        if self.priority and area in self.SIDEBAR_AREAS:
+            self._high.append(page_name)
+        else:
+            self._low.append(page_name)
+        self._queued.add(page_name)
+        if page_name not in self.depth or depth < self.depth[page_name]:
+            self.depth[page_name] = depth
+        if parent is not None:
+            self.pages_discovered += 1
+        self.max_queue_depth = max(self.max_queue_depth, len(self))
+        return True
+
+    def pop(self) -> str:
+        """Desencola la siguiente página."""
+        page_name = self._high.popleft() if self._high else self._low.popleft()
+        self._queued.discard(page_name)
+        return page_name
+
+    def to_dict(self) -> Dict:
+        """Serializa la frontera (colas, profundidades y estadísticas) para un checkpoint."""
+        return {
+            'high': list(self._high),
+            'low': list(self._low),
+            'depth': self.depth,
+            'priority': self.priority,
+            'max_depth': self.max_depth,
+            'pages_parsed': self.pages_parsed,
+            'pages_discovered': self.pages_discovered,
+            'max_queue_depth': self.max_queue_depth,
+            'skipped_by_depth': self.skipped_by_depth,
+            'skipped_by_exclusion': self.skipped_by_exclusion
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, exclude: Optional[ExclusionMatcher] = None) -> 'CrawlFrontier':
+        """Reconstruye una frontera serializada con `to_dict` (las exclusiones no se serializan)."""
+        frontier = cls(priority=data['priority'], max_depth=data['max_depth'], exclude=exclude)
+        frontier._high.extend(data['high'])
+        frontier._low.extend(data['low'])
+        frontier._queued.update(data['high'])
+        frontier._queued.update(data['low'])
+        frontier.depth = dict(data['depth'])
+        frontier.pages_parsed = data['pages_parsed']
+        frontier.pages_discovered = data['pages_discovered']
+        frontier.max_queue_depth = data['max_queue_depth']
+        frontier.skipped_by_depth = data['skipped_by_depth']
+        frontier.skipped_by_exclusion = data.get('skipped_by_exclusion', 0)
+        return frontier
+
+    def stats(self) -> Dict:
+        """Estadísticas de descubrimiento para el manifest."""
+        return {
+            'pages_parsed': self.pages_parsed,
+            'pages_discovered': self.pages_discovered,
+            'discovered_per_page': round(self.pages_discovered / self.pages_parsed, 3) if self.pages_parsed else 0.0,
+            'max_queue_depth': self.max_queue_depth,
+            'final_queue_depth': len(self),
+            'max_link_depth': max(self.depth.values()) if self.depth else 0,
+            'skipped_by_depth': self.skipped_by_depth,
+            'skipped_by_exclusion': self.skipped_by_exclusion,
+            'priority': self.priority,
+            'max_depth': self.max_depth
+        }
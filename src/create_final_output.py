@@ -2,98 +2,419 @@
 Script para crear el archivo final combinando prompt.txt y wiki_unified.md.
 """
 
+import hashlib
+import json
+import mmap
 import os
+import sys
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+from .chunked_output import PROMPT_CHUNK, load_manifest
+from .context_budget import resolve_tokenizer, select_context
+
+# Reintentos de selección cuando el tokenizador no es aditivo y el total se pasa
+MAX_BUDGET_PASSES = 5
+
+CONTEXT_MARKER = "### CONTEXTO ###"
+DICTIONARIES_MARKER = "### DICCIONARIOS ###"
+
+# Tamaño de bloque al copiar archivos y al buscar los extremos sin espacios
+COPY_BUFFER_SIZE = 1024 * 1024
+EDGE_BLOCK_SIZE = 64 * 1024
+
+# os.sendfile entre archivos regulares solo está garantizado en Linux
+_USE_SENDFILE = sys.platform.startswith("linux") and hasattr(os, "sendfile")
+
+# Salto de línea de la salida: el mismo que escribe open(..., 'w') en modo texto
+_NEWLINE = os.linesep.encode("ascii")
+
+
+class FileRange(NamedTuple):
+    """Rango de bytes [start, end) de un archivo que se copia tal cual a la salida."""
+    path: str
+    start: int
+    end: int
+    sha256: Optional[str] = None
+
+
+Segment = Union[str, FileRange]
+
+
+def _insert_sections(prompt_content: str, wiki_content: str, dictionaries_content: str) -> str:
+    """Inserta la wiki y los diccionarios en las secciones del prompt."""
+    # Primero insertar el contenido de wiki después de "### CONTEXTO ###"
+    if "### CONTEXTO ###" in prompt_content:
+        prompt_content = prompt_content.replace(
+            "### CONTEXTO ###",
+            "### CONTEXTO ###\n\n" + wiki_content
+        )
+    else:
+        # Si no existe la sección, agregarla al final del prompt
+        prompt_content = prompt_content.strip() + "\n\n### CONTEXTO ###\n\n" + wiki_content
+    
+    # Luego insertar el contenido de diccionarios después de "### DICCIONARIOS ###"
+    if "### DICCIONARIOS ###" in prompt_content:
+        prompt_content = prompt_content.replace(
+            "### DICCIONARIOS ###",
+            "### DICCIONARIOS ###\n\n" + dictionaries_content
+        )
+    else:
+        # Si no existe la sección, agregarla al final
+        prompt_content = prompt_content.strip() + "\n\n### DICCIONARIOS ###\n\n" + dictionaries_content
+    
+    return prompt_content
+
+
+def _stripped_range(path: str) -> Tuple[int, int]:
+    """
+    Rango de bytes del archivo sin espacios al principio ni al final (como
+    str.strip()), leyendo solo los bloques de los extremos.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        start = 0
+        while start < size:
+            f.seek(start)
+            block = f.read(EDGE_BLOCK_SIZE)
+            # Bloque completo hasta el último carácter UTF-8 entero
+            text = block.decode("utf-8", errors="ignore") if len(block) < EDGE_BLOCK_SIZE else \
+                block[:len(block) - 3].decode("utf-8", errors="ignore")
+            stripped = text.lstrip()
+            if stripped:
+                start += len(text[:len(text) - len(stripped)].encode("utf-8"))
+                break
+            start += len(text.encode("utf-8")) or len(block)
+        end = size
+        while end > start:
+            block_start = max(start, end - EDGE_BLOCK_SIZE)
+            f.seek(block_start)
+            block = f.read(end - block_start)
+            # Saltar bytes de continuación para empezar en un carácter entero
+            skip = 0
+            while block_start > start and skip < len(block) and 0x80 <= block[skip] < 0xC0:
+                skip += 1
+            text = block[skip:].decode("utf-8", errors="ignore")
+            stripped = text.rstrip()
+            if stripped:
+                end = block_start + skip + len(stripped.encode("utf-8"))
+                break
+            end = block_start + skip if block_start + skip > start else start
+    return start, max(start, end)
+
+
+def _plan_sections(prompt_content: str, wiki: List[Segment], dictionaries: List[Segment]) -> List[Segment]:
+    """
+    Equivalente a _insert_sections sobre listas de segmentos: las marcas se
+    buscan solo en el texto del prompt y la wiki y los diccionarios quedan como
+    rangos de archivo que se copian sin cargarlos en memoria.
+    """
+    def insert(segments: List[Segment], marker: str, content: List[Segment]) -> List[Segment]:
+        result = []
+        for segment in segments:
+            if isinstance(segment, str) and marker in segment:
+                pieces = segment.split(marker)
+                for piece in pieces[:-1]:
+                    result += [piece, marker + "\n\n", *content]
+                result.append(pieces[-1])
+            else:
+                result.append(segment)
+        return result
+
+    def strip(segments: List[Segment]) -> List[Segment]:
+        segments = [s for s in segments if s and (isinstance(s, str) or s.end > s.start)]
+        # Los rangos de archivo no empiezan ni terminan en espacios (_stripped_range)
+        while segments and isinstance(segments[0], str) and not segments[0].strip():
+            segments.pop(0)
+        while segments and isinstance(segments[-1], str) and not segments[-1].strip():
+            segments.pop()
+        if segments and isinstance(segments[0], str):
+            segments[0] = segments[0].lstrip()
+        if segments and isinstance(segments[-1], str):
+            segments[-1] = segments[-1].rstrip()
+        return segments
+
+    if CONTEXT_MARKER in prompt_content:
+        segments = insert([prompt_content], CONTEXT_MARKER, wiki)
+    else:
+        # Si no existe la sección, agregarla al final del prompt
+        segments = [prompt_content.strip(), f"\n\n{CONTEXT_MARKER}\n\n", *wiki]
+
+    if any(isinstance(s, str) and DICTIONARIES_MARKER in s for s in segments):
+        segments = insert(segments, DICTIONARIES_MARKER, dictionaries)
+    else:
+        segments = strip(segments) + [f"\n\n{DICTIONARIES_MARKER}\n\n", *dictionaries]
+    return segments
+
+
+def _translate_newlines(data: bytes) -> bytes:
+    """
+    Saltos de línea como al leer y escribir en modo texto: \r\n y \r pasan a \n
+    (saltos universales) y \n al salto de línea de la plataforma.
+    """
+    if b"\r" in data:
+        data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    if _NEWLINE != b"\n":
+        data = data.replace(b"\n", _NEWLINE)
+    return data
+
+
+def _has_carriage_return(source, start: int, end: int) -> bool:
+    """Indica si el rango [start, end) del archivo contiene algún \r (sin copiarlo a memoria)."""
+    if end <= start:
+        return False
+    with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        return view.find(b"\r", start, end) != -1
+
+
+def _copy_range(source, output, segment: FileRange) -> None:
+    """
+    Copia un rango de archivo a la salida traduciendo los saltos de línea como
+    _translate_newlines; con sha256, verifica el contenido original.
+    
+    Con sendfile (Linux, donde el salto de línea ya es \n) el rango se copia sin
+    pasar por Python, salvo que contenga algún \r que haya que normalizar.
+    """
+    remaining = segment.end - segment.start
+    offset = segment.start
+    if (_USE_SENDFILE and _NEWLINE == b"\n" and segment.sha256 is None
+            and not _has_carriage_return(source, segment.start, segment.end)):
+        output.flush()
+        try:
+            while remaining:
+                sent = os.sendfile(output.fileno(), source.fileno(), offset, remaining)
+                if not sent:
+                    break
+                offset += sent
+                remaining -= sent
+        except OSError:
+            pass
+        output.seek(0, os.SEEK_END)
+    digest = hashlib.sha256() if segment.sha256 else None
+    source.seek(offset)
+    # Un \r\n puede quedar partido entre dos bloques
+    pending_cr = False
+    while remaining:
+        block = source.read(min(COPY_BUFFER_SIZE, remaining))
+        if not block:
+            raise ValueError(f"{segment.path} es más corto de lo esperado")
+        if digest:
+            digest.update(block)
+        remaining -= len(block)
+        if pending_cr and block.startswith(b"\n"):
+            block = block[1:]
+        pending_cr = block.endswith(b"\r")
+        output.write(_translate_newlines(block))
+    if digest and digest.hexdigest() != segment.sha256:
+        raise ValueError(f"El fragmento {segment.path} no coincide con el manifest")
+
+
+def _write_segments(segments: List[Segment], output_file: str) -> None:
+    """
+    Escribe los segmentos en output_file de forma atómica: primero en un archivo
+    temporal junto al destino y luego os.replace.
+    
+    Los saltos de línea se escriben como en modo texto (\r\n en Windows), y los
+    \r\n de los archivos de entrada se normalizan como al leerlos en modo texto.
+    """
+    tmp_file = output_file + ".tmp"
+    try:
+        with open(tmp_file, "wb") as output:
+            for segment in segments:
+                if isinstance(segment, str):
+                    output.write(_translate_newlines(segment.encode("utf-8")))
+                else:
+                    with open(segment.path, "rb") as source:
+                        _copy_range(source, output, segment)
+            output.flush()
+            os.fsync(output.fileno())
+        os.replace(tmp_file, output_file)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+
+
+def _read_segments(segments: List[Segment]) -> str:
+    """Contenido de una lista de segmentos como texto (para el modo con presupuesto)."""
+    parts = []
+    for segment in segments:
+        if isinstance(segment, str):
+            parts.append(segment)
+        else:
+            with open(segment.path, "rb") as f:
+                f.seek(segment.start)
+                data = f.read(segment.end - segment.start)
+            if segment.sha256 and hashlib.sha256(data).hexdigest() != segment.sha256:
+                raise ValueError(f"El fragmento {segment.path} no coincide con el manifest")
+            # Saltos de línea universales, como al leer en modo texto
+            parts.append(data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n"))
+    return "".join(parts)
+
+
+def _chunk_segments(chunks_dir: str) -> Tuple[str, List[Segment], List[Segment]]:
+    """Prompt y segmentos de wiki y diccionarios de una salida por fragmentos."""
+    sections = {"prompt": [], "wiki": [], "dicc": []}
+    for entry in sorted(load_manifest(chunks_dir)["chunks"], key=lambda e: e["order"]):
+        if entry["separator"]:
+            sections[entry["section"]].append(entry["separator"])
+        path = os.path.join(chunks_dir, entry["path"])
+        sections[entry["section"]].append(FileRange(path, 0, entry["bytes"], entry["sha256"]))
+    prompt_segments = sections["prompt"] or [FileRange(os.path.join(chunks_dir, PROMPT_CHUNK), 0, 0)]
+    return _read_segments(prompt_segments), sections["wiki"], sections["dicc"]
+
+
+def _budgeted_content(prompt_content, wiki_content, dictionaries_content, token_budget,
+                      tokenizer, dictionary_usage):
+    """
+    Contenido final que cabe en token_budget tokens, e informe de lo omitido.
+    
+    Si el total medido sobre el texto final supera el presupuesto (tokenizadores
+    no aditivos), se repite la selección descontando el exceso.
+    """
+    count_tokens, tokenizer_name = resolve_tokenizer(tokenizer)
+    base_tokens = count_tokens(_insert_sections(prompt_content, "", ""))
+    reserve = 0
+    for _ in range(MAX_BUDGET_PASSES):
+        wiki_selected, dictionaries_selected, report = select_context(
+            base_tokens + reserve, wiki_content, dictionaries_content,
+            token_budget, count_tokens, dictionary_usage
+        )
+        final_content = _insert_sections(prompt_content, wiki_selected, dictionaries_selected)
+        total_tokens = count_tokens(final_content)
+        if total_tokens <= token_budget or not (wiki_selected or dictionaries_selected):
+            break
+        reserve += total_tokens - token_budget
+    report["prompt_tokens"] = base_tokens
+    report["tokenizer"] = tokenizer_name
+    report["tokens"] = total_tokens
+    return final_content, report
+
+
+def _print_budget_report(report: dict) -> None:
+    print(f"\nPresupuesto de tokens ({report['tokenizer']}): "
+          f"{report['tokens']:,} / {report['token_budget']:,}")
+    if report["tokens"] > report["token_budget"]:
+        print("  ⚠ El prompt sin contexto ya supera el presupuesto")
+    print(f"  - Bloques completos: {len(report['included'])}")
+    for entry in report["truncated"]:
+        print(f"  - Truncado: [{entry['section']}] {entry['title']} "
+              f"({entry['lines_kept']:,}/{entry['lines_total']:,} líneas, "
+              f"{entry['tokens']:,}/{entry['full_tokens']:,} tokens)")
+    for entry in report["dropped"]:
+        print(f"  - Omitido: [{entry['section']}] {entry['title']} ({entry['full_tokens']:,} tokens)")
 
 
 def create_final_output(
     prompt_file: str = "prompt.txt",
     wiki_unified_file: str = "data/wiki_unified.md",
     dictionaries_file: str = "dicc/dictionaries_unified.md",
-    output_file: str = "vibe_SQL_copilot.txt"
+    output_file: str = "vibe_SQL_copilot.txt",
+    token_budget: int = None,
+    tokenizer=None,
+    dictionary_usage: dict = None,
+    report_file: str = None,
+    chunks_dir: str = None
 ) -> str:
     """
     Crea el archivo final combinando el prompt, el contenido unificado de la wiki
     y los diccionarios unificados.
     
+    Con token_budget, en lugar de incluirlo todo se eligen los bloques que caben
+    en ese número de tokens (ver context_budget): primero las páginas de la wiki
+    con definiciones de tablas, luego los diccionarios más usados (truncados por
+    líneas si no caben) y por último el resto de la wiki.
+    
+    Con chunks_dir, el prompt, la wiki y los diccionarios se leen de una salida
+    por fragmentos (ver chunked_output) en lugar de los tres archivos, y se
+    genera el mismo archivo monolítico.
+    
     Args:
         prompt_file: Archivo con el prompt inicial
         wiki_unified_file: Archivo markdown unificado de la wiki
         dictionaries_file: Archivo markdown unificado de diccionarios
         output_file: Archivo de salida final
+        token_budget: Máximo de tokens del archivo final (None = sin límite)
+        tokenizer: Función texto -> tokens o nombre ("approx", "chars4",
+                   "tiktoken:<encoding>"); por defecto la aproximación offline
+        dictionary_usage: Frecuencia de uso por nombre de diccionario (por defecto,
+                          menciones en la wiki)
+        report_file: Archivo JSON donde guardar el informe de lo incluido y omitido
+        chunks_dir: Directorio con manifest.json de create_chunked_output
     
     Returns:
         Ruta del archivo generado
     """
-    # Verificar que existen los archivos de entrada
-    if not os.path.exists(prompt_file):
-        print(f"Error: No se encontró el archivo {prompt_file}")
-        return ""
-    
-    if not os.path.exists(wiki_unified_file):
-        print(f"Error: No se encontró el archivo {wiki_unified_file}")
-        return ""
-    
-    if not os.path.exists(dictionaries_file):
-        print(f"Error: No se encontró el archivo {dictionaries_file}")
-        return ""
-    
-    print(f"Creando archivo final combinando:")
-    print(f"  - {prompt_file}")
-    print(f"  - {wiki_unified_file}")
-    print(f"  - {dictionaries_file}")
-    print(f"  -> {output_file}")
-    
-    # Leer el contenido del prompt
-    try:
-        with open(prompt_file, 'r', encoding='utf-8') as f:
-            prompt_content = f.read()
-    except Exception as e:
-        print(f"Error al leer {prompt_file}: {e}")
-        return ""
-    
-    # Leer el contenido del markdown unificado
-    try:
-        with open(wiki_unified_file, 'r', encoding='utf-8') as f:
-            wiki_content = f.read().strip()
-    except Exception as e:
-        print(f"Error al leer {wiki_unified_file}: {e}")
-        return ""
-    
-    # Leer el contenido de los diccionarios unificados
-    try:
-        with open(dictionaries_file, 'r', encoding='utf-8') as f:
-            dictionaries_content = f.read().strip()
-    except Exception as e:
-        print(f"Error al leer {dictionaries_file}: {e}")
-        return ""
-    
-    # Insertar el contenido en las secciones correspondientes
-    # Primero insertar el contenido de wiki después de "### CONTEXTO ###"
-    if "### CONTEXTO ###" in prompt_content:
-        prompt_content = prompt_content.replace(
-            "### CONTEXTO ###",
-            "### CONTEXTO ###\n\n" + wiki_content
-        )
+    if chunks_dir:
+        print(f"Creando archivo final a partir de los fragmentos de {chunks_dir}")
+        print(f"  -> {output_file}")
+        try:
+            prompt_content, wiki, dictionaries = _chunk_segments(chunks_dir)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error al leer los fragmentos de {chunks_dir}: {e}")
+            return ""
     else:
-        # Si no existe la sección, agregarla al final del prompt
-        prompt_content = prompt_content.strip() + "\n\n### CONTEXTO ###\n\n" + wiki_content
+        # Verificar que existen los archivos de entrada
+        if not os.path.exists(prompt_file):
+            print(f"Error: No se encontró el archivo {prompt_file}")
+            return ""
+        
+        if not os.path.exists(wiki_unified_file):
+            print(f"Error: No se encontró el archivo {wiki_unified_file}")
+            return ""
+        
+        if not os.path.exists(dictionaries_file):
+            print(f"Error: No se encontró el archivo {dictionaries_file}")
+            return ""
+        
+        print(f"Creando archivo final combinando:")
+        print(f"  - {prompt_file}")
+        print(f"  - {wiki_unified_file}")
+        print(f"  - {dictionaries_file}")
+        print(f"  -> {output_file}")
+        
+        # Leer el contenido del prompt (la wiki y los diccionarios se copian por bloques)
+        try:
+            with open(prompt_file, 'r', encoding='utf-8') as f:
+                prompt_content = f.read()
+        except Exception as e:
+            print(f"Error al leer {prompt_file}: {e}")
+            return ""
+        
+        # Rango sin espacios al principio ni al final de cada archivo
+        try:
+            wiki = [FileRange(wiki_unified_file, *_stripped_range(wiki_unified_file))]
+        except Exception as e:
+            print(f"Error al leer {wiki_unified_file}: {e}")
+            return ""
+        
+        try:
+            dictionaries = [FileRange(dictionaries_file, *_stripped_range(dictionaries_file))]
+        except Exception as e:
+            print(f"Error al leer {dictionaries_file}: {e}")
+            return ""
     
-    # Luego insertar el contenido de diccionarios después de "### DICCIONARIOS ###"
-    if "### DICCIONARIOS ###" in prompt_content:
-        prompt_content = prompt_content.replace(
-            "### DICCIONARIOS ###",
-            "### DICCIONARIOS ###\n\n" + dictionaries_content
-        )
+    if token_budget is None:
+        segments = _plan_sections(prompt_content, wiki, dictionaries)
     else:
-        # Si no existe la sección, agregarla al final
-        prompt_content = prompt_content.strip() + "\n\n### DICCIONARIOS ###\n\n" + dictionaries_content
-    
-    final_content = prompt_content
+        try:
+            wiki_content = _read_segments(wiki)
+            dictionaries_content = _read_segments(dictionaries)
+        except (OSError, ValueError) as e:
+            print(f"Error al leer el contenido: {e}")
+            return ""
+        final_content, report = _budgeted_content(
+            prompt_content, wiki_content, dictionaries_content,
+            token_budget, tokenizer, dictionary_usage
+        )
+        segments = [final_content]
+        _print_budget_report(report)
+        if report_file:
+            with open(report_file, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
     
-    # Guardar el archivo final
+    # Guardar el archivo final (temporal + rename)
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(final_content)
+        _write_segments(segments, output_file)
         
         file_size = os.path.getsize(output_file)
         
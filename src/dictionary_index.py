@@ -0,0 +1,357 @@
+"""
+Índice de búsqueda offline (BM25) sobre las entradas de los diccionarios.
+
+En lugar de pegar todo dictionaries_unified.md en cada conversación, se indexan
+las tuplas (ref, descr) y, para cada pregunta, solo se incluyen en el archivo
+final las k entradas más relevantes.
+
+El índice se guarda en un único archivo binario que se abre con mmap: cargarlo
+no lee ni deserializa nada, solo la cabecera, y cada búsqueda toca únicamente
+los términos de la pregunta y sus listas de documentos.
+
+Formato (little-endian, cada bloque alineado a 4 bytes):
+    cabecera   MAGIC + _HEADER (número de documentos, términos, postings, suma de
+               longitudes y desplazamiento de cada bloque)
+    doc_offs   uint32[n_docs + 1]    inicio de cada documento en doc_blob
+    doc_lens   uint16[n_docs]        número de términos de cada documento
+    term_offs  uint32[n_terms + 1]   inicio de cada término en term_blob
+    post_offs  uint32[n_terms + 1]   inicio de la lista de cada término en post_docs
+    post_docs  uint32[n_postings]    documentos de cada término (ordenados)
+    post_tfs   uint16[n_postings]    frecuencia del término en cada documento
+    term_blob  términos UTF-8 ordenados (búsqueda binaria)
+    doc_blob   documentos UTF-8 "sección\\tref\\tdescr"
+
+Uso:
+    python -m src.dictionary_index build
+    python -m src.dictionary_index query "pacientes con diabetes tipo 2 y hemoglobina glicada" -k 30
+"""
+
+import argparse
+import heapq
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import unicodedata
+from array import array
+from collections import Counter
+from typing import Iterator, List, Tuple
+
+from .unify_dictionaries import LAB_WORDS_TO_REMOVE
+
+MAGIC = b"DICCIDX1"
+_HEADER = struct.Struct("<12I")
+
+# Parámetros de BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+DEFAULT_INDEX_FILE = "dicc/dictionaries.idx"
+DEFAULT_TOP_K = 40
+# Salida de las consultas: separada de vibe_SQL_copilot.txt (la salida completa del pipeline)
+DEFAULT_QUERY_OUTPUT = "vibe_SQL_copilot.query.txt"
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Palabras vacías de las preguntas (además de conjunciones y determinantes)
+_QUERY_STOPWORDS = LAB_WORDS_TO_REMOVE | {
+    'pacientes', 'paciente', 'dame', 'quiero', 'cuantos', 'cuantas', 'cuales', 'como',
+    'se', 'su', 'sus', 'lo', 'le', 'les', 'es', 'son', 'han', 'ha', 'tienen', 'tiene', 'esta',
+}
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas y sin acentos (NFKD sin marcas combinantes)."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _stem(word: str) -> str:
+    """Reducción mínima de plurales: diagnósticos -> diagnostico."""
+    if len(word) > 3 and word.endswith("s") and not word.isdigit():
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str, stopwords=LAB_WORDS_TO_REMOVE) -> List[str]:
+    """Términos de un texto: palabras normalizadas, sin palabras vacías."""
+    return [_stem(word) for word in _WORD_RE.findall(normalize_text(text)) if word not in stopwords]
+
+
+def iter_unified_entries(dictionaries_file: str) -> Iterator[Tuple[str, str, str]]:
+    """
+    Recorre dictionaries_unified.md y deshace la compactación por prefijos.
+
+    Las líneas agrupadas prefix:texto_común|sufijo:resto|... se expanden en una
+    tupla por código (prefix + sufijo, texto_común + resto).
+
+    Yields:
+        Tuplas (sección, ref, descr)
+    """
+    section = ""
+    with open(dictionaries_file, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.startswith("## "):
+                section = line[3:].strip()
+                continue
+            if not line.strip():
+                continue
+            parts = line.split("|")
+            if len(parts) == 1:
+                ref, _, descr = line.partition(":")
+                yield section, ref, descr
+                continue
+            prefix, _, common_text = parts[0].partition(":")
+            for part in parts[1:]:
+                suffix, _, diff_text = part.partition(":")
+                descr = f"{common_text} {diff_text}".strip() if common_text else diff_text
+                yield section, prefix + suffix, descr
+
+
+def _pad(data: bytes) -> bytes:
+    return data + b"\0" * (-len(data) % 4)
+
+
+def build_dictionary_index(
+    dictionaries_file: str = "dicc/dictionaries_unified.md",
+    index_file: str = DEFAULT_INDEX_FILE
+) -> str:
+    """
+    Construye el índice BM25 de las entradas de dictionaries_unified.md.
+
+    Args:
+        dictionaries_file: Archivo markdown unificado de diccionarios
+        index_file: Archivo del índice
+
+    Returns:
+        Ruta del índice generado (o "" si hubo un error)
+    """
+    if not os.path.exists(dictionaries_file):
+        print(f"Error: No se encontró el archivo {dictionaries_file}")
+        return ""
+
+    print(f"Indexando {dictionaries_file} -> {index_file}")
+    doc_blob = bytearray()
+    doc_offs = array("I", [0])
+    doc_lens = array("H")
+    postings = {}
+    for doc_id, (section, ref, descr) in enumerate(iter_unified_entries(dictionaries_file)):
+        doc_blob += f"{section}\t{ref}\t{descr}".encode("utf-8")
+        doc_offs.append(len(doc_blob))
+        terms = tokenize(ref) + tokenize(descr)
+        doc_lens.append(min(len(terms), 0xFFFF))
+        for term, tf in Counter(terms).items():
+            postings.setdefault(term, []).append((doc_id, tf))
+
+    term_blob = bytearray()
+    term_offs = array("I", [0])
+    post_offs = array("I", [0])
+    post_docs = array("I")
+    post_tfs = array("H")
+    for term in sorted(postings, key=lambda t: t.encode("utf-8")):
+        term_blob += term.encode("utf-8")
+        term_offs.append(len(term_blob))
+        for doc_id, tf in postings[term]:
+            post_docs.append(doc_id)
+            post_tfs.append(min(tf, 0xFFFF))
+        post_offs.append(len(post_docs))
+
+    blocks = [doc_offs.tobytes(), doc_lens.tobytes(), term_offs.tobytes(), post_offs.tobytes(),
+              post_docs.tobytes(), post_tfs.tobytes(), bytes(term_blob), bytes(doc_blob)]
+    offsets = []
+    position = len(MAGIC) + _HEADER.size
+    for block in blocks:
+        offsets.append(position)
+        position += len(_pad(block))
+    header = _HEADER.pack(len(doc_lens), len(postings), len(post_docs), sum(doc_lens), *offsets)
+
+    # Escritura atómica: el índice anterior sigue válido hasta el reemplazo
+    os.makedirs(os.path.dirname(index_file) or ".", exist_ok=True)
+    temp_file = index_file + ".tmp"
+    with open(temp_file, "wb") as f:
+        f.write(MAGIC + header)
+        for block in blocks:
+            f.write(_pad(block))
+    os.replace(temp_file, index_file)
+
+    print(f"  - Entradas: {len(doc_lens):,}")
+    print(f"  - Términos: {len(postings):,}")
+    print(f"  - Tamaño: {os.path.getsize(index_file):,} bytes")
+    return index_file
+
+
+class DictionaryIndex:
+    """
+    Índice abierto con mmap.
+
+    Uso:
+        with DictionaryIndex("dicc/dictionaries.idx") as index:
+            for score, section, ref, descr in index.search("hemoglobina glicada", k=10):
+                ...
+    """
+
+    def __init__(self, index_file: str = DEFAULT_INDEX_FILE):
+        self._file = open(index_file, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{index_file} no es un índice de diccionarios")
+        (self.n_docs, self.n_terms, n_postings, total_length,
+         *offsets) = _HEADER.unpack_from(self._mm, len(MAGIC))
+        self._avg_length = total_length / self.n_docs if self.n_docs else 0.0
+        view = memoryview(self._mm)
+        counts = [self.n_docs + 1, self.n_docs, self.n_terms + 1, self.n_terms + 1, n_postings, n_postings]
+        formats = ["I", "H", "I", "I", "I", "H"]
+        sizes = [4, 2, 4, 4, 4, 2]
+        (self._doc_offs, self._doc_lens, self._term_offs, self._post_offs,
+         self._post_docs, self._post_tfs) = [
+            view[offset:offset + count * size].cast(fmt)
+            for offset, count, fmt, size in zip(offsets, counts, formats, sizes)
+        ]
+        self._term_blob = offsets[6]
+        self._doc_blob = offsets[7]
+
+    def close(self):
+        for name in ("_doc_offs", "_doc_lens", "_term_offs", "_post_offs", "_post_docs", "_post_tfs"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        if not self._mm.closed:
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _term(self, i: int) -> bytes:
+        start = self._term_blob + self._term_offs[i]
+        return self._mm[start:self._term_blob + self._term_offs[i + 1]]
+
+    def _find_term(self, term: str) -> int:
+        """Posición del término en el diccionario de términos (-1 si no está)."""
+        key = term.encode("utf-8")
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self.n_terms and self._term(lo) == key else -1
+
+    def document(self, doc_id: int) -> Tuple[str, str, str]:
+        """Devuelve (sección, ref, descr) de un documento."""
+        start = self._doc_blob + self._doc_offs[doc_id]
+        end = self._doc_blob + self._doc_offs[doc_id + 1]
+        section, ref, descr = self._mm[start:end].decode("utf-8").split("\t", 2)
+        return section, ref, descr
+
+    def search(self, question: str, k: int = DEFAULT_TOP_K) -> List[Tuple[float, str, str, str]]:
+        """
+        Las k entradas con mayor puntuación BM25 para la pregunta.
+
+        Returns:
+            Lista de (puntuación, sección, ref, descr), de mayor a menor puntuación
+        """
+        scores = {}
+        for term in set(tokenize(question, _QUERY_STOPWORDS)):
+            i = self._find_term(term)
+            if i < 0:
+                continue
+            start, end = self._post_offs[i], self._post_offs[i + 1]
+            df = end - start
+            idf = math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+            for doc_id, tf in zip(self._post_docs[start:end], self._post_tfs[start:end]):
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lens[doc_id] / self._avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        best = heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(score, *self.document(doc_id)) for doc_id, score in best]
+
+
+def format_matches(matches: List[Tuple[float, str, str, str]]) -> str:
+    """Contenido de ### DICCIONARIOS ### con las entradas encontradas, agrupadas por sección."""
+    sections = {}
+    for _, section, ref, descr in matches:
+        sections.setdefault(section, []).append(f"{ref}:{descr}")
+    return "\n\n".join(f"## {section}\n\n" + "\n".join(lines) for section, lines in sections.items())
+
+
+def create_retrieval_output(
+    question: str,
+    index_file: str = DEFAULT_INDEX_FILE,
+    prompt_file: str = "prompt.txt",
+    wiki_unified_file: str = "data/wiki_unified.md",
+    output_file: str = DEFAULT_QUERY_OUTPUT,
+    top_k: int = DEFAULT_TOP_K
+) -> str:
+    """
+    Crea el archivo final para una pregunta concreta: prompt + wiki + solo las
+    top_k entradas de diccionario más relevantes.
+
+    Por defecto no sobrescribe vibe_SQL_copilot.txt. Se escribe en un temporal
+    que se renombra al terminar (os.replace).
+
+    Returns:
+        Ruta del archivo generado (o "" si hubo un error)
+    """
+    from .create_final_output import _insert_sections, _write_segments
+
+    for path in (index_file, prompt_file, wiki_unified_file):
+        if not os.path.exists(path):
+            print(f"Error: No se encontró el archivo {path}")
+            return ""
+
+    with DictionaryIndex(index_file) as index:
+        matches = index.search(question, top_k)
+    with open(prompt_file, "r", encoding="utf-8") as f:
+        prompt_content = f.read()
+    with open(wiki_unified_file, "r", encoding="utf-8") as f:
+        wiki_content = f.read().strip()
+
+    final_content = _insert_sections(prompt_content, wiki_content, format_matches(matches))
+    _write_segments([final_content], output_file)
+
+    print(f"Entradas de diccionario para la pregunta: {len(matches)}")
+    print(f"  - Archivo: {output_file}")
+    print(f"  - Tamaño: {os.path.getsize(output_file):,} bytes")
+    return output_file
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Índice de búsqueda de los diccionarios")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Construye el índice")
+    build_parser.add_argument("--dictionaries", default="dicc/dictionaries_unified.md")
+    build_parser.add_argument("--index", default=DEFAULT_INDEX_FILE)
+
+    query_parser = subparsers.add_parser("query", help="Genera el archivo final para una pregunta")
+    query_parser.add_argument("question")
+    query_parser.add_argument("-k", "--top-k", type=int, default=DEFAULT_TOP_K)
+    query_parser.add_argument("--index", default=DEFAULT_INDEX_FILE)
+    query_parser.add_argument("--prompt", default="prompt.txt")
+    query_parser.add_argument("--wiki", default="data/wiki_unified.md")
+    query_parser.add_argument("--output", default=DEFAULT_QUERY_OUTPUT)
+    query_parser.add_argument("--print", action="store_true", dest="print_only",
+                              help="Solo mostrar las entradas encontradas")
+
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        return 0 if build_dictionary_index(args.dictionaries, args.index) else 1
+    if args.print_only:
+        with DictionaryIndex(args.index) as index:
+            for score, section, ref, descr in index.search(args.question, args.top_k):
+                print(f"{score:7.2f}  [{section}] {ref}:{descr}")
+        return 0
+    return 0 if create_retrieval_output(args.question, args.index, args.prompt, args.wiki,
+                                        args.output, args.top_k) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
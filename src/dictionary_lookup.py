@@ -0,0 +1,298 @@
+"""
+Búsqueda aproximada de códigos (ref) por descripción en los diccionarios.
+
+Los diccionarios mezclan castellano y catalán, con y sin acentos
+("Interpretació", "Atención"), y en dictionaries_unified.md las descripciones
+aparecen partidas en fragmentos de prefijo/sufijo. Este módulo lee las tuplas
+(ref, descr) completas de los CSV de dicc/ y las busca por similitud de
+trigramas sobre una clave normalizada (minúsculas, sin acentos, sin
+puntuación y sin conjunciones ni determinantes, como _clean_lab_description).
+
+Puntuación de una entrada: media entre la cobertura de la consulta (trigramas
+de la consulta presentes en la entrada) y la similitud de Jaccard (penaliza
+descripciones mucho más largas que la consulta). Como la puntuación nunca supera
+la cobertura, con min_similarity = s una entrada válida comparte al menos
+ceil(s * |Q|) trigramas con la consulta.
+
+Los trigramas compartidos se cuentan para todas las claves a la vez con
+enteros de Python usados como bitsets (un bit por clave): un contador binario
+"en paralelo" suma los bitsets de los trigramas de la consulta plano a plano,
+sin recorrer listas de claves en Python. Los trigramas frecuentes guardan su
+bitset ya construido; los raros lo construyen al consultar. Las claves se
+puntúan por niveles, de más a menos trigramas compartidos, y la búsqueda para
+en cuanto ningún nivel restante puede entrar entre los `limit` mejores.
+
+Uso:
+    from src.dictionary_lookup import lookup
+    lookup("hemoglobina glicada")   # [(puntuación, diccionario, ref, descr), ...]
+
+    python -m src.dictionary_lookup "hemoglobina glicada" "neumonia"
+    python -m src.dictionary_lookup --dictionary lab      # consultas por stdin
+"""
+
+import argparse
+import glob
+import math
+import os
+import re
+import sys
+import time
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .dictionary_index import normalize_text
+from .unify_dictionaries import (
+    LAB_PUNCTUATION, LAB_WORDS_TO_REMOVE, _dictionary_name, _dictionary_reader, _iter_dictionary_rows
+)
+
+MIN_SIMILARITY = 0.4
+DEFAULT_LIMIT = 10
+
+# Trigramas con al menos este número de claves guardan su bitset precalculado
+MASK_MIN_POSTINGS = 256
+
+_SET_BIT_RE = re.compile("1")
+
+LookupMatch = Tuple[float, str, str, str]
+
+
+def lookup_key(text: str) -> str:
+    """Clave normalizada: minúsculas, sin acentos, sin puntuación ni palabras vacías."""
+    words = (word.strip(LAB_PUNCTUATION) for word in normalize_text(text).split())
+    return " ".join(word for word in words if word and word not in LAB_WORDS_TO_REMOVE)
+
+
+def _trigrams(key: str) -> set:
+    """Trigramas de cada palabra, con dos espacios delante y uno detrás (como pg_trgm)."""
+    trigrams = set()
+    for word in key.split():
+        padded = f"  {word} "
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def iter_csv_entries(dicc_dir: str = "dicc") -> Iterator[Tuple[str, str, str]]:
+    """
+    Tuplas de los CSV de diccionarios, leídas igual que en unify_dictionaries.
+
+    Yields:
+        Tuplas (diccionario, ref, descr)
+    """
+    for csv_file in sorted(glob.glob(os.path.join(dicc_dir, "*.csv"))):
+        file_name = os.path.basename(csv_file)
+        with open(csv_file, "r", encoding="utf-8") as f:
+            reader, ref_col, descr_col = _dictionary_reader(f, file_name)
+            if not ref_col or not descr_col:
+                continue
+            name = _dictionary_name(file_name)
+            is_lab_dict = "lab" in file_name.lower()
+            for ref, descr in _iter_dictionary_rows(reader, ref_col, descr_col, is_lab_dict):
+                yield name, ref, descr
+
+
+class DictionaryLookup:
+    """
+    Índice de trigramas en memoria sobre las entradas de los diccionarios.
+
+    Las entradas con la misma clave normalizada comparten una única posición en
+    el índice (p. ej. todas las "Interpretació" de lab).
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str, str]]):
+        self.entries: List[Tuple[str, str, str]] = []
+        self._keys: List[str] = []
+        self._key_ids: Dict[str, int] = {}
+        self._key_entries: List[List[int]] = []
+        self._refs: Dict[str, List[int]] = {}
+        postings: Dict[str, List[int]] = {}
+        self._key_sizes = array("H")
+
+        for dictionary, ref, descr in entries:
+            entry_id = len(self.entries)
+            self.entries.append((dictionary, ref, descr))
+            self._refs.setdefault(ref.upper(), []).append(entry_id)
+            key = lookup_key(descr)
+            key_id = self._key_ids.get(key)
+            if key_id is None:
+                key_id = self._key_ids[key] = len(self._keys)
+                self._keys.append(key)
+                self._key_entries.append([])
+                trigrams = _trigrams(key)
+                self._key_sizes.append(min(len(trigrams), 0xFFFF))
+                for trigram in trigrams:
+                    postings.setdefault(trigram, []).append(key_id)
+            self._key_entries[key_id].append(entry_id)
+
+        self._postings = {trigram: array("I", ids) for trigram, ids in postings.items()}
+        self._masks = {
+            trigram: self._mask(ids) for trigram, ids in self._postings.items() if len(ids) >= MASK_MIN_POSTINGS
+        }
+        self._key_dictionaries = [
+            {self.entries[entry_id][0].lower() for entry_id in entry_ids} for entry_ids in self._key_entries
+        ]
+
+    def _mask(self, key_ids) -> int:
+        """Bitset (entero) con un bit a 1 por cada clave de la lista."""
+        bits = bytearray((len(self._keys) + 7) // 8)
+        for key_id in key_ids:
+            bits[key_id >> 3] |= 1 << (key_id & 7)
+        return int.from_bytes(bits, "little")
+
+    def _shared_counts(self, trigrams: List[str]) -> List[int]:
+        """
+        Cuenta, para todas las claves a la vez, cuántos de los trigramas contienen.
+
+        Returns:
+            Planos del contador: el bit i del plano j es el bit j del número de
+            trigramas que comparte la clave i
+        """
+        planes = [0] * len(trigrams).bit_length()
+        for trigram in trigrams:
+            carry = self._masks.get(trigram)
+            if carry is None:
+                carry = self._mask(self._postings[trigram])
+            # Suma con acarreo, plano a plano
+            for j, plane in enumerate(planes):
+                planes[j], carry = plane ^ carry, plane & carry
+                if not carry:
+                    break
+        return planes
+
+    def _at_least(self, planes: List[int], threshold: int) -> int:
+        """Bitset de las claves cuyo contador es >= threshold."""
+        greater = 0
+        equal = (1 << len(self._keys)) - 1
+        for j in range(len(planes) - 1, -1, -1):
+            if threshold >> j & 1:
+                equal &= planes[j]
+            else:
+                greater |= equal & planes[j]
+                equal &= ~planes[j]
+        return greater | equal
+
+    @classmethod
+    def from_csv_dir(cls, dicc_dir: str = "dicc") -> "DictionaryLookup":
+        """Construye el índice a partir de los CSV de dicc/."""
+        return cls(iter_csv_entries(dicc_dir))
+
+    def lookup(
+        self,
+        query: str,
+        limit: int = DEFAULT_LIMIT,
+        min_similarity: float = MIN_SIMILARITY,
+        dictionary: Optional[str] = None
+    ) -> List[LookupMatch]:
+        """
+        Busca las entradas cuya descripción se parece más a la consulta.
+
+        Args:
+            query: Texto a buscar (o un ref exacto)
+            limit: Máximo de resultados
+            min_similarity: Puntuación mínima (0-1)
+            dictionary: Limitar a un diccionario ("lab", "diagnostic"...)
+
+        Returns:
+            Lista de (puntuación, diccionario, ref, descr), de mayor a menor puntuación
+        """
+        dictionary = dictionary.lower() if dictionary else None
+        matches = []
+        seen = set()
+
+        # Un ref exacto va primero
+        for entry_id in self._refs.get(query.strip().upper(), []):
+            if dictionary is None or self.entries[entry_id][0].lower() == dictionary:
+                matches.append((1.0, *self.entries[entry_id]))
+                seen.add(entry_id)
+
+        all_trigrams = _trigrams(lookup_key(query))
+        query_size = len(all_trigrams)
+        query_trigrams = [t for t in all_trigrams if t in self._postings]
+        if not query_trigrams:
+            return matches[:limit]
+
+        min_shared = max(1, math.ceil(min_similarity * query_size))
+        if min_shared > len(query_trigrams):
+            return matches[:limit]
+        planes = self._shared_counts(query_trigrams)
+
+        # Claves por número de trigramas compartidos, de más a menos: una clave que
+        # comparte count trigramas no puede puntuar más que count / query_size
+        best = []
+        above = 0
+        for count in range(len(query_trigrams), min_shared - 1, -1):
+            if len(best) == limit and -best[-1][0] > count / query_size:
+                break
+            at_least = self._at_least(planes, count)
+            level, above = at_least & ~above, at_least
+            # Bits de menor a mayor como texto: la clave i está en la posición i
+            for bit in _SET_BIT_RE.finditer(format(level, "b")[::-1]):
+                key_id = bit.start()
+                if dictionary is not None and dictionary not in self._key_dictionaries[key_id]:
+                    continue
+                jaccard = count / (query_size + self._key_sizes[key_id] - count)
+                score = 0.5 * count / query_size + 0.5 * jaccard
+                if score >= min_similarity:
+                    best.append((-score, self._keys[key_id], key_id))
+            best.sort()
+            del best[limit:]
+
+        for neg_score, _, key_id in best:
+            for entry_id in self._key_entries[key_id]:
+                entry = self.entries[entry_id]
+                if entry_id in seen or (dictionary is not None and entry[0].lower() != dictionary):
+                    continue
+                matches.append((round(-neg_score, 4), *entry))
+            if len(matches) >= limit:
+                break
+        return matches[:limit]
+
+
+_lookups: Dict[str, DictionaryLookup] = {}
+
+
+def lookup(query: str, limit: int = DEFAULT_LIMIT, dicc_dir: str = "dicc", **kwargs) -> List[LookupMatch]:
+    """
+    Busca refs por descripción en los diccionarios de dicc_dir.
+
+    El índice se construye la primera vez y se reutiliza en las siguientes
+    llamadas del mismo proceso.
+
+    Returns:
+        Lista de (puntuación, diccionario, ref, descr), de mayor a menor puntuación
+    """
+    if dicc_dir not in _lookups:
+        _lookups[dicc_dir] = DictionaryLookup.from_csv_dir(dicc_dir)
+    return _lookups[dicc_dir].lookup(query, limit, **kwargs)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Búsqueda aproximada de refs en los diccionarios")
+    parser.add_argument("queries", nargs="*", help="Consultas (sin consultas se leen de stdin, una por línea)")
+    parser.add_argument("--dicc-dir", default="dicc")
+    parser.add_argument("-n", "--limit", type=int, default=DEFAULT_LIMIT)
+    parser.add_argument("--dictionary", help="Limitar a un diccionario (lab, diagnostic...)")
+    parser.add_argument("--min-similarity", type=float, default=MIN_SIMILARITY)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    index = DictionaryLookup.from_csv_dir(args.dicc_dir)
+    if not index.entries:
+        print(f"Error: No se encontraron diccionarios CSV en {args.dicc_dir}")
+        return 1
+    print(f"{len(index.entries):,} entradas indexadas en {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+    queries = args.queries or (line.strip() for line in sys.stdin)
+    for query in queries:
+        if not query:
+            continue
+        start = time.perf_counter()
+        matches = index.lookup(query, args.limit, args.min_similarity, args.dictionary)
+        elapsed = time.perf_counter() - start
+        print(f"\n{query}  ({len(matches)} resultados, {elapsed * 1000:.1f} ms)")
+        for score, dictionary, ref, descr in matches:
+            print(f"  {score:.2f}  [{dictionary}] {ref}:{descr}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,18 +19,26 @@ import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse, urljoin, unquote
 import os
-import time
 import shutil
 import re
 import json
 import hashlib
+import codecs
+import contextlib
 import logging
 import html
 from datetime import datetime
 from pathlib import Path
-from typing import Set, List, Dict, Optional, Tuple
+from typing import Set, List, Dict, Optional, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor, Future
 from copy import copy
 
+from .crawl_frontier import CrawlFrontier
+from .hash_index import HashIndex, file_sha256
+from .http_fetcher import HttpFetcher
+from .link_scanner import scan_link_areas
+from .page_exclusions import ExclusionMatcher
+
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
@@ -39,13 +47,518 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Tamaño de bloque al volcar una respuesta a disco
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Por debajo de este tamaño la respuesta se considera un error (página vacía)
+MIN_CONTENT_BYTES = 100
+
+
+def _page_file_path(output_path: Path, page_name: str) -> Path:
+    """
+    Determina la ruta del HTML de una página respetando la estructura de carpetas.
+    
+    Ej: "datanex/overview" -> output_path/datanex/overview.html
+    """
+    page_path_parts = page_name.split('/')
+    if len(page_path_parts) > 1:
+        # Página anidada
+        subfolder = output_path / Path(*page_path_parts[:-1])
+        subfolder.mkdir(parents=True, exist_ok=True)
+        return subfolder / (page_path_parts[-1] + '.html')
+    # Página en raíz
+    return output_path / f"{page_name}.html"
+
+
+def _write_json_atomic(path: Path, data, indent: Optional[int] = None) -> None:
+    """
+    Escribe un JSON de forma atómica: primero en un archivo temporal y luego
+    os.replace, de modo que una interrupción nunca deja el archivo a medias.
+    """
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _obtain_page(
+    fetcher: HttpFetcher,
+    page_name: str,
+    page_url: str,
+    file_path: Optional[Path],
+    expected_hash: Optional[str],
+    validators: Optional[Dict[str, str]] = None,
+    revalidate: bool = False,
+    hash_index: Optional[HashIndex] = None,
+    verify: bool = False,
+    cached_links: Optional[List[Tuple[str, str]]] = None
+) -> Dict:
+    """
+    Obtiene el HTML de una página: desde la caché si el checksum coincide o
+    descargándolo con el fetcher (reintentos con backoff exponencial y rate limit).
+    
+    Con file_path=None (páginas excluidas en modo discover_excluded) la página se
+    descarga solo para extraer sus enlaces y no se escribe en disco. Su "copia
+    cacheada" son los enlaces extraídos en la ejecución anterior (cached_links):
+    se revalidan con el mismo GET condicional y un 304 los devuelve en 'links'
+    sin transferir la página.
+    
+    Con revalidate=True la copia cacheada intacta no se usa directamente: se hace
+    un GET condicional (If-None-Match / If-Modified-Since con los validadores
+    guardados) y un 304 indica que la copia local sigue vigente.
+    
+    Con hash_index, el hash de la copia local sale del índice si su stat no cambió
+    (verify=True lo recalcula siempre) y las páginas descargadas se registran en él.
+    
+    No modifica estado compartido, por lo que puede ejecutarse en un worker.
+    
+    Returns:
+        Diccionario con 'html' (None si falló, '' si no es HTML), 'from_cache', 'sha256',
+        'validators' (ETag / Last-Modified y Content-Type recibidos) y 'log' (entradas para
+        download_log.jsonl en orden). Con file_path=None, además 'discover_only': True y
+        'links' (los enlaces cacheados si la página no cambió, None si hay que extraerlos
+        del HTML)
+    """
+    result = {'html': None, 'from_cache': False, 'sha256': None, 'validators': {}, 'log': []}
+    cached_html = None
+    cached_hash = None
+    cached_size = 0
+    discover_only = file_path is None
+    
+    if discover_only:
+        result['discover_only'] = True
+        result['links'] = None
+        # Los enlaces de la ejecución anterior hacen de copia cacheada (sin HTML)
+        if cached_links is not None:
+            cached_html = ''
+            if not revalidate:
+                logger.info(f"[OK] Excluida sin cambios: {page_name} (usando enlaces cacheados)")
+                result.update(html='', from_cache=True, links=cached_links)
+                return result
+    # Verificar si ya existe y tiene el mismo checksum
+    elif expected_hash and file_path.exists():
+        # Los adjuntos (no HTML) se guardaron sin decodificar: no se leen como texto
+        is_html = _is_html_entry(validators)
+        cached_bytes = None
+        if hash_index is not None:
+            current_hash = hash_index.sha256(file_path, verify=verify)
+        elif is_html:
+            # Calcular hash del archivo existente (una sola lectura: el texto sale de los mismos bytes)
+            with open(file_path, 'rb') as f:
+                cached_bytes = f.read()
+            current_hash = hashlib.sha256(cached_bytes).hexdigest()
+        else:
+            current_hash = file_sha256(file_path)
+        if current_hash == expected_hash:
+            if is_html:
+                # Aún así leer el contenido para extraer enlaces
+                if cached_bytes is None:
+                    with open(file_path, 'rb') as f:
+                        cached_bytes = f.read()
+                cached_html = cached_bytes.decode('utf-8', errors='replace')
+                cached_size = len(cached_bytes)
+            else:
+                cached_html = ''
+                cached_size = file_path.stat().st_size
+            cached_hash = current_hash
+            if not revalidate:
+                logger.info(f"[OK] Sin cambios: {page_name} (usando versión cacheada)")
+                result['html'] = cached_html
+                result['from_cache'] = True
+                result['sha256'] = current_hash
+                return result
+    
+    # Cabeceras condicionales: solo si la copia local está intacta
+    request_headers = {}
+    if cached_html is not None and validators:
+        if validators.get('etag'):
+            request_headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            request_headers['If-Modified-Since'] = validators['last_modified']
+    
+    def log_failure(attempt: int, error: Exception) -> None:
+        result['log'].append({
+            'timestamp': datetime.now().isoformat(),
+            'page_name': page_name,
+            'url': page_url,
+            'attempt': attempt,
+            'success': False,
+            'error': str(error)
+        })
+    
+    # Descargar con reintentos (los intentos fallidos quedan en el log). El fetcher
+    # reintenta los errores de conexión y de status; con stream=True el cuerpo se lee
+    # después, así que un corte a mitad del cuerpo se reintenta aquí, continuando la
+    # numeración y gastando intentos del mismo presupuesto (fetcher.max_retries)
+    attempt = 0
+    while attempt < fetcher.max_retries:
+        try:
+            response, attempt = fetcher.get(page_url, label=page_name, headers=request_headers or None,
+                                            on_failure=log_failure, first_attempt=attempt + 1, stream=True)
+        except requests.exceptions.RequestException:
+            # El fetcher ya registró cada intento fallido
+            break
+        try:
+            # Cerrar la respuesta devuelve la conexión al pool
+            with response:
+                _store_response(response, attempt, page_name, page_url, file_path, result,
+                                validators or {}, cached_html, cached_hash, cached_size)
+            if hash_index is not None and result['sha256'] and not result['from_cache'] and not discover_only:
+                hash_index.update(file_path, result['sha256'])
+            break
+        except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+            log_failure(attempt, e)
+            logger.warning(f"[FAIL] Descarga interrumpida de {page_name}: {e}")
+            if attempt < fetcher.max_retries:
+                fetcher.backoff(attempt, e)
+        except Exception as e:
+            logger.error(f"[ERROR] Error inesperado en {page_name}: {e}")
+            break
+    
+    if discover_only:
+        for entry in result['log']:
+            if entry['success']:
+                entry['discover_only'] = True
+        if result['from_cache']:
+            result['links'] = cached_links
+            logger.info(f"[OK] Excluida sin cambios (304): {page_name} (usando enlaces cacheados)")
+        elif result['html'] is not None:
+            logger.info(f"[OK] Excluida, solo se extraen sus enlaces: {page_name}")
+    return result
+
+
+def _store_response(
+    response: requests.Response,
+    attempt: int,
+    page_name: str,
+    page_url: str,
+    file_path: Path,
+    result: Dict,
+    validators: Dict[str, str],
+    cached_html: Optional[str],
+    cached_hash: Optional[str],
+    cached_size: int
+) -> None:
+    """
+    Procesa la respuesta de _obtain_page: un 304 reutiliza la copia cacheada;
+    el resto se guarda en disco con _stream_to_file (con file_path=None solo se
+    lee, sin escribirlo). Rellena `result`.
+    """
+    # 304 Not Modified: la copia cacheada sigue vigente
+    if response.status_code == 304 and cached_html is not None:
+        result['log'].append({
+            'timestamp': datetime.now().isoformat(),
+            'page_name': page_name,
+            'url': page_url,
+            'status_code': response.status_code,
+            'content_length': cached_size,
+            'sha256': cached_hash,
+            'attempt': attempt,
+            'success': True,
+            'not_modified': True
+        })
+        result['html'] = cached_html
+        result['from_cache'] = True
+        result['sha256'] = cached_hash
+        result['validators'] = {
+            'etag': response.headers.get('ETag') or validators.get('etag'),
+            'last_modified': response.headers.get('Last-Modified') or validators.get('last_modified'),
+            'content_type': validators.get('content_type')
+        }
+        if file_path is not None:
+            logger.info(f"[OK] Sin cambios (304): {page_name} (usando versión cacheada)")
+        return
+    
+    # Validar que la respuesta es HTML; el resto (adjuntos) se guarda sin decodificar
+    content_type = response.headers.get('Content-Type', '')
+    is_html = 'text/html' in content_type
+    if not is_html:
+        logger.warning(f"[WARN] Pagina {page_name} no es HTML (Content-Type: {content_type})")
+    
+    encoding = _declared_encoding(content_type)
+    content_hash, size, content = _stream_to_file(response, file_path, keep_content=is_html)
+    
+    html_content = ''
+    if is_html:
+        html_content = content.decode(encoding, errors='replace')
+        if encoding != 'utf-8':
+            # Las etapas siguientes leen las páginas como UTF-8
+            content = html_content.encode('utf-8')
+            content_hash = hashlib.sha256(content).hexdigest()
+            size = len(content)
+            if file_path is not None:
+                _write_bytes_atomic(file_path, content)
+        del content
+    
+    # Registrar en log estructurado
+    result['log'].append({
+        'timestamp': datetime.now().isoformat(),
+        'page_name': page_name,
+        'url': page_url,
+        'status_code': response.status_code,
+        'content_length': size,
+        'sha256': content_hash,
+        'attempt': attempt,
+        'success': True
+    })
+    result['html'] = html_content
+    result['sha256'] = content_hash
+    result['validators'] = {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'content_type': content_type
+    }
+    
+    if file_path is not None:
+        logger.info(f"[OK] Descargado: {page_name} ({size} bytes, SHA256: {content_hash[:12]}...)")
+
+
+def _is_html_entry(validators: Optional[Dict[str, str]]) -> bool:
+    """
+    True si la copia guardada de una página es HTML, según el Content-Type
+    registrado en http_cache.json (sin registro se asume HTML).
+    """
+    return 'text/html' in (validators or {}).get('content_type', 'text/html')
+
+
+def _declared_encoding(content_type: str) -> str:
+    """Codificación del charset de Content-Type (UTF-8 si no se declara o no se conoce)."""
+    match = re.search(r'charset=["\']?([\w.:-]+)', content_type, re.IGNORECASE)
+    if match:
+        try:
+            return codecs.lookup(match.group(1)).name
+        except LookupError:
+            pass
+    return 'utf-8'
+
+
+def _write_bytes_atomic(path: Path, data: bytes) -> None:
+    """Escribe bytes en un temporal y lo renombra sobre path."""
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _stream_to_file(response: requests.Response, file_path: Optional[Path],
+                    keep_content: bool = True) -> Tuple[str, int, Optional[bytes]]:
+    """
+    Vuelca el cuerpo de una respuesta (stream=True) en file_path por bloques de
+    DOWNLOAD_CHUNK_SIZE, calculando el SHA256 a la vez.
+    
+    Se escribe en un temporal que solo sustituye a file_path (os.replace) si la
+    descarga termina y el contenido no es sospechosamente corto; si no, la copia
+    anterior queda intacta. Con keep_content=False solo hay un bloque en memoria.
+    Con file_path=None el cuerpo se lee y valida igual, pero no se escribe.
+    
+    Returns:
+        Tupla (sha256, tamaño en bytes, contenido o None si keep_content=False)
+    
+    Raises:
+        ValueError: Si el contenido tiene menos de MIN_CONTENT_BYTES
+    """
+    digest = hashlib.sha256()
+    size = 0
+    chunks = []
+    tmp_path = file_path.with_name(file_path.name + '.tmp') if file_path is not None else None
+    try:
+        with open(tmp_path, 'wb') if tmp_path is not None else contextlib.nullcontext() as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+                if f is not None:
+                    f.write(chunk)
+                size += len(chunk)
+                if keep_content:
+                    chunks.append(chunk)
+        # Validar que el contenido no está vacío
+        if size < MIN_CONTENT_BYTES:
+            raise ValueError(f"Contenido sospechosamente corto: {size} bytes")
+        if tmp_path is not None:
+            os.replace(tmp_path, file_path)
+    except BaseException:
+        if tmp_path is not None and tmp_path.exists():
+            tmp_path.unlink()
+        raise
+    return digest.hexdigest(), size, b''.join(chunks) if keep_content else None
+
+
+def _load_exclusions(excluded_pages: Optional[Union[str, ExclusionMatcher]]) -> Optional[ExclusionMatcher]:
+    """Matcher de exclusiones a partir de una ruta o un matcher ya compilado (None si no hay)."""
+    if excluded_pages is None or isinstance(excluded_pages, ExclusionMatcher):
+        return excluded_pages or None
+    try:
+        exclusions = ExclusionMatcher.from_file(excluded_pages)
+    except FileNotFoundError:
+        logger.warning(f"[WARN] No se encontró {excluded_pages}, no se excluye ninguna página")
+        return None
+    logger.info(f"Páginas excluidas de la descarga: {len(exclusions)} patrones de {excluded_pages}")
+    return exclusions or None
+
+
+def _scan_link_areas_soup(html_content: str) -> List[Tuple[str, Dict]]:
+    """
+    Implementación de referencia con BeautifulSoup de `link_scanner.scan_link_areas`.
+    
+    Construye el árbol completo y aplica los selectores de sidebar y contenido
+    uno a uno. Se mantiene para comparar resultados y en los benchmarks.
+    
+    Returns:
+        Lista de tuplas (área, atributos del enlace) en orden de descubrimiento
+    """
+    areas: List[Tuple[str, Dict]] = []
+    
+    # Parsear HTML para encontrar enlaces a otras páginas de la wiki
+    soup = BeautifulSoup(html_content, 'html.parser')
+    
+    # IMPORTANTE: En GitLab, el sidebar del wiki está en un atributo data-custom-sidebar-content
+    # que contiene HTML escapado. Necesitamos extraer y parsear ese contenido.
+    sidebar_data_elem = soup.find(attrs={'data-custom-sidebar-content': True})
+    
+    if sidebar_data_elem:
+        sidebar_html_escaped = sidebar_data_elem.get('data-custom-sidebar-content')
+        if sidebar_html_escaped:
+            # Des-escapar el HTML (convierte &lt; a <, &gt; a >, etc.)
+            sidebar_html_unescaped = html.unescape(sidebar_html_escaped)
+            # Parsear el HTML del sidebar
+            sidebar_soup = BeautifulSoup(sidebar_html_unescaped, 'html.parser')
+            # Buscar todos los enlaces con data-wiki-page en el sidebar
+            for link in sidebar_soup.find_all('a', attrs={'data-wiki-page': True}):
+                areas.append(('custom-sidebar', link.attrs))
+    
+    # También buscar en el sidebar HTML tradicional (por si acaso)
+    sidebar_selectors = [
+        'aside',
+        'div.wiki-sidebar',
+        'div.wiki-sidebar-custom-content',
+        'nav.wiki-sidebar',
+        'div[class*="sidebar"]',
+        'ul.wiki-pages-list',
+        'div[data-testid="wiki-sidebar"]',
+        'nav[aria-label*="Wiki"]'
+    ]
+    
+    sidebar = None
+    for selector in sidebar_selectors:
+        sidebar = soup.select_one(selector)
+        if sidebar:
+            break
+    
+    # Buscar también en el contenido principal
+    main_content = None
+    for selector in ['div.wiki-page-details', 'article', 'main', 'div.content', 'div[class*="wiki-page"]']:
+        main_content = soup.select_one(selector)
+        if main_content:
+            break
+    
+    if not main_content:
+        body = soup.find('body')
+        if body:
+            main_content = body
+        else:
+            main_content = soup
+    
+    # Áreas donde buscar enlaces (sidebar primero, luego contenido principal)
+    if sidebar:
+        areas.extend(('sidebar', link.attrs) for link in sidebar.find_all('a', href=True))
+    if main_content:
+        areas.extend(('content', link.attrs) for link in main_content.find_all('a', href=True))
+    
+    return areas
+
+
+def _extract_wiki_links(
+    html_content: str,
+    page_url: str,
+    page_name: str,
+    netloc: str,
+    engine: str = 'stream'
+) -> List[Tuple[str, str]]:
+    """
+    Extrae los enlaces a otras páginas de la wiki en orden de aparición.
+    
+    Busca primero en el sidebar personalizado (data-custom-sidebar-content),
+    después en el sidebar HTML tradicional y por último en el contenido principal.
+    
+    Args:
+        html_content: HTML de la página
+        page_url: URL absoluta de la página (para resolver enlaces relativos)
+        page_name: Nombre de la página actual (se excluye de los resultados)
+        netloc: Dominio del wiki; se ignoran enlaces a otros dominios
+        engine: 'stream' (una sola pasada con HTMLParser, ver link_scanner) o
+            'soup' (árbol BeautifulSoup completo)
+    
+    Returns:
+        Lista de tuplas (área, nombre de página) en orden de descubrimiento,
+        puede contener duplicados
+    """
+    links: List[Tuple[str, str]] = []
+    
+    if engine == 'soup':
+        areas = _scan_link_areas_soup(html_content)
+    else:
+        areas = scan_link_areas(html_content)
+    
+    for area_name, attrs in areas:
+        if area_name == 'custom-sidebar':
+            # Enlaces del sidebar personalizado: el nombre viene en data-wiki-page
+            wiki_page = attrs.get('data-wiki-page')
+            if wiki_page and wiki_page not in ['', '#'] and wiki_page != page_name:
+                links.append((area_name, wiki_page))
+            continue
+        
+        href = attrs['href']
+        
+        # Normalizar URL (resolver relativos)
+        absolute_url = urljoin(page_url, href)
+        parsed_link = urlparse(absolute_url)
+        
+        # Verificar que el enlace pertenece al mismo dominio y al wiki
+        is_same_domain = parsed_link.netloc == netloc
+        is_wiki_path = '/-/wikis/' in absolute_url
+        
+        if is_same_domain and is_wiki_path:
+            # Extraer el nombre de la página
+            wiki_page = None
+            
+            # Intentar obtener del atributo data-wiki-page (más confiable)
+            if attrs.get('data-wiki-page'):
+                wiki_page = attrs.get('data-wiki-page')
+            else:
+                # Extraer del path de la URL
+                wiki_path = absolute_url.split('/-/wikis/')[-1]
+                # Limpiar parámetros y fragmentos
+                wiki_page = wiki_path.split('#')[0].split('?')[0].strip()
+            
+            # URL decode (por si hay caracteres especiales)
+            if wiki_page:
+                wiki_page = unquote(wiki_page)
+                wiki_page = wiki_page.strip('/')
+                
+                # Validar que no es vacío y no es el mismo que ya estamos procesando
+                if wiki_page and wiki_page not in ['', '#'] and wiki_page != page_name:
+                    links.append((area_name, wiki_page))
+    
+    return links
+
 
 def download_wiki_pages(
-    base_url: str, 
+    base_url: str,
     output_dir: str = "data/wiki_html",
     rate_limit: float = 2.0,
     max_retries: int = 3,
-    respect_existing: bool = True
+    respect_existing: bool = True,
+    workers: int = 1,
+    revalidate: bool = True,
+    priority_sidebar: bool = False,
+    max_depth: Optional[int] = None,
+    resume: bool = False,
+    checkpoint_every: int = 10,
+    fetcher: Optional[HttpFetcher] = None,
+    verify: bool = False,
+    excluded_pages: Optional[Union[str, ExclusionMatcher]] = None,
+    discover_excluded: bool = True
 ) -> Dict[str, str]:
     """
     Descarga todas las páginas de una wiki de GitLab de forma robusta y responsable.
@@ -59,16 +572,59 @@ def download_wiki_pages(
         rate_limit: Segundos de espera entre requests (default: 2.0 para ser conservador)
         max_retries: Número máximo de reintentos por página (default: 3)
         respect_existing: Si True, no redownload páginas sin cambios (default: True)
+        workers: Número de descargas concurrentes (default: 1, secuencial). Con
+            workers > 1 un pool de hilos pre-descarga las siguientes páginas de la
+            cola y un token bucket global limita el caudal a 1/rate_limit requests
+            por segundo. Las páginas se procesan en el mismo orden que en modo
+            secuencial, de modo que los archivos y metadatos generados son idénticos.
+        revalidate: Si True (y respect_existing), las páginas cacheadas se revalidan
+            con el servidor mediante GET condicional (If-None-Match / If-Modified-Since)
+            usando los ETag / Last-Modified guardados; un 304 reutiliza el HTML local
+            sin transferir la página. Si False, la copia local intacta se usa sin
+            consultar al servidor (default: True)
+        priority_sidebar: Si True, las páginas enlazadas desde el sidebar se descargan
+            antes que las encontradas en el contenido (default: False, FIFO puro)
+        max_depth: Profundidad máxima de enlaces desde la página inicial; None = sin límite
+        resume: Si True y existe metadata/crawl_checkpoint.json de una ejecución
+            interrumpida con la misma base_url, continúa desde ese punto (cola,
+            páginas visitadas, checksums y entradas de log pendientes) (default: False)
+        checkpoint_every: Cada cuántas páginas procesadas se guarda el checkpoint
+            (escritura atómica con rename); 0 desactiva los checkpoints intermedios
+        fetcher: Cliente HTTP compartido (ver http_fetcher); por defecto se crea uno
+            con rate_limit, max_retries y una conexión keep-alive por worker
+        verify: Si True, recalcula el SHA256 de todas las páginas cacheadas en lugar
+            de fiarse de metadata/hash_index.json (tamaño, mtime e inodo de cada
+            archivo); útil si se sospecha que los archivos cambiaron sin cambiar su
+            stat (default: False)
+        excluded_pages: Páginas que no se guardan: ruta de un archivo como
+            pags_descarte.txt o un ExclusionMatcher (nombres exactos, globs
+            "glob:datanex/*" y regex "re:..."; ver page_exclusions). La página
+            inicial siempre se descarga, pero si está excluida no se guarda (default: None)
+        discover_excluded: Si True, las páginas excluidas se descargan solo para
+            extraer sus enlaces (páginas que solo se alcanzan a través de ellas), sin
+            guardarlas en disco, en los checksums ni en el resultado, de modo que se
+            obtienen las mismas páginas que sin exclusiones. Se revalidan con el mismo
+            GET condicional que el resto: sus enlaces se guardan en
+            metadata/discover_links.json y un 304 los reutiliza sin transferir la
+            página (con revalidate=False ni se piden). Si False, los enlaces a
+            páginas excluidas no se siguen (no cuestan ninguna request), pero las
+            páginas que solo se alcanzan a través de ellas no se descargan (default: True)
     
     Returns:
-        Diccionario con el nombre de la página como clave y el contenido HTML como valor
-        
+        Diccionario con el nombre de la página como clave y el contenido HTML como valor.
+        Los adjuntos que no son HTML (imágenes, PDFs...) se guardan en disco sin
+        decodificar y su valor es ''
+    
     Estructura de salida:
         output_dir/
           ├── metadata/
           │   ├── manifest.json          # Inventario completo de descarga
           │   ├── download_log.jsonl     # Log estructurado de cada operación
-          │   └── page_checksums.json    # Hashes para detección de cambios
+          │   ├── page_checksums.json    # Hashes para detección de cambios
+          │   ├── http_cache.json        # ETag / Last-Modified (GET condicional) y Content-Type
+          │   ├── hash_index.json        # (tamaño, mtime, inodo, SHA256) por archivo
+          │   ├── discover_links.json    # Enlaces de las páginas excluidas (304 sin HTML)
+          │   └── crawl_checkpoint.json  # Estado de una descarga en curso (se borra al terminar)
           ├── home.html
           ├── datanex/
           │   ├── overview.html
@@ -83,7 +639,7 @@ def download_wiki_pages(
     
     logger.info(f"Iniciando descarga de wiki desde: {base_url}")
     logger.info(f"Directorio de salida: {output_dir}")
-    logger.info(f"Rate limit: {rate_limit}s | Reintentos: {max_retries} | Respetar existentes: {respect_existing}")
+    logger.info(f"Rate limit: {rate_limit}s | Reintentos: {max_retries} | Respetar existentes: {respect_existing} | Workers: {workers}")
     
     # Extraer información del dominio
     parsed_url = urlparse(base_url)
@@ -106,267 +662,211 @@ def download_wiki_pages(
         except Exception as e:
             logger.warning(f"No se pudieron cargar checksums existentes: {e}")
     
+    # Cargar validadores HTTP (ETag / Last-Modified) de descargas anteriores
+    http_cache_file = metadata_dir / "http_cache.json"
+    http_cache: Dict[str, Dict[str, str]] = {}
+    if respect_existing and http_cache_file.exists():
+        try:
+            with open(http_cache_file, 'r', encoding='utf-8') as f:
+                http_cache = json.load(f)
+            logger.info(f"Cargados {len(http_cache)} validadores HTTP existentes")
+        except Exception as e:
+            logger.warning(f"No se pudieron cargar validadores HTTP existentes: {e}")
+    
+    # Enlaces de las páginas excluidas (discover_excluded): hacen de copia cacheada
+    # para que un 304 no necesite el HTML, que no se guarda
+    discover_links_file = metadata_dir / "discover_links.json"
+    discover_links: Dict[str, List[List[str]]] = {}
+    if respect_existing and discover_links_file.exists():
+        try:
+            with open(discover_links_file, 'r', encoding='utf-8') as f:
+                discover_links = json.load(f)
+        except Exception as e:
+            logger.warning(f"No se pudieron cargar los enlaces de páginas excluidas: {e}")
+    
+    # Hashes de las páginas cacheadas: solo se recalculan si cambió su stat
+    hash_index = HashIndex(metadata_dir / "hash_index.json", output_path)
+    
     # Conjunto para rastrear páginas procesadas
     downloaded_pages: Set[str] = set()
-    pages_to_download: List[str] = []
+    # Páginas excluidas: sin discover_excluded ni siquiera se encolan
+    exclusions = _load_exclusions(excluded_pages)
+    frontier_exclude = None if discover_excluded else exclusions
+    discover_only: Set[str] = set()
+    pages_to_download = CrawlFrontier(priority=priority_sidebar, max_depth=max_depth, exclude=frontier_exclude)
     pages_content: Dict[str, str] = {}
     download_log: List[Dict] = []
     
     # Empezar con la página inicial
     initial_page = base_url.split('/')[-1] if '/' in base_url else 'home'
-    pages_to_download.append(initial_page)
-    
-    # Headers explícitos para identificación responsable
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (compatible; DataScopeWikiArchiver/1.0; +Clinical/Research)',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
-        'Accept-Encoding': 'gzip, deflate',
-        'Connection': 'keep-alive',
-        'Cache-Control': 'max-age=0'
-    }
+    pages_to_download.push(initial_page, downloaded_pages)
+    
+    # Reanudar una descarga interrumpida desde el checkpoint
+    checkpoint_file = metadata_dir / "crawl_checkpoint.json"
+    if resume and checkpoint_file.exists():
+        try:
+            with open(checkpoint_file, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            if checkpoint.get('base_url') != base_url:
+                logger.warning(f"[WARN] Checkpoint de otra URL ({checkpoint.get('base_url')}), se ignora")
+            else:
+                pages_to_download = CrawlFrontier.from_dict(checkpoint['frontier'], exclude=frontier_exclude)
+                discover_only = set(checkpoint.get('discover_only', []))
+                downloaded_pages.update(discover_only)
+                existing_checksums = checkpoint['checksums']
+                http_cache = checkpoint['http_cache']
+                discover_links = checkpoint.get('discover_links', discover_links)
+                download_log = checkpoint['pending_log']
+                for name in checkpoint['visited']:
+                    file_path = _page_file_path(output_path, name)
+                    if file_path.exists():
+                        if _is_html_entry(http_cache.get(name)):
+                            with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                                pages_content[name] = f.read()
+                        else:
+                            pages_content[name] = ''
+                        downloaded_pages.add(name)
+                    else:
+                        logger.warning(f"[WARN] Falta {file_path}, se vuelve a encolar")
+                        pages_to_download.push(name, downloaded_pages)
+                logger.info(f"[OK] Reanudando desde checkpoint del {checkpoint['timestamp']}: "
+                            f"{len(downloaded_pages)} páginas hechas, {len(pages_to_download)} en cola")
+        except Exception as e:
+            logger.warning(f"No se pudo cargar el checkpoint, se empieza de cero: {e}")
+    
+    def save_checkpoint(in_progress: Optional[str] = None) -> None:
+        frontier = pages_to_download.to_dict()
+        if in_progress is not None and in_progress not in downloaded_pages:
+            # La página a medio procesar vuelve a ser la primera de la cola
+            (frontier['high'] if frontier['priority'] else frontier['low']).insert(0, in_progress)
+        _write_json_atomic(checkpoint_file, {
+            'timestamp': datetime.now().isoformat(),
+            'base_url': base_url,
+            'visited': list(pages_content),
+            'discover_only': sorted(discover_only),
+            'frontier': frontier,
+            'checksums': existing_checksums,
+            'http_cache': http_cache,
+            'discover_links': discover_links,
+            'pending_log': download_log
+        })
     
     logger.info(f"Comenzando desde página inicial: {initial_page}")
     
-    session = requests.Session()
-    session.headers.update(headers)
+    # Una sola sesión con pool de conexiones keep-alive, reintentos y rate limit
+    # (en modo concurrente el token bucket del fetcher limita el caudal global)
+    own_fetcher = fetcher is None
+    if own_fetcher:
+        fetcher = HttpFetcher(rate_limit=rate_limit, max_retries=max_retries, pool_maxsize=workers)
     
-    while pages_to_download:
-        page_name = pages_to_download.pop(0)
-        
-        if page_name in downloaded_pages:
-            continue
-        
-        # Construir URL de la página
-        page_url = f"{wiki_base}/{page_name}"
-        
-        # Determinar estructura de carpetas (detectar rutas anidadas)
-        # Ej: "datanex/overview" -> crear carpeta datanex/
-        page_path_parts = page_name.split('/')
-        if len(page_path_parts) > 1:
-            # Página anidada
-            subfolder = output_path / Path(*page_path_parts[:-1])
-            subfolder.mkdir(parents=True, exist_ok=True)
-            file_name = page_path_parts[-1] + '.html'
-            file_path = subfolder / file_name
-        else:
-            # Página en raíz
-            file_path = output_path / f"{page_name}.html"
-        
-        # Verificar si ya existe y tiene el mismo checksum
-        skip_download = False
-        if respect_existing and file_path.exists():
-            existing_hash = existing_checksums.get(page_name)
-            if existing_hash:
-                # Calcular hash del archivo existente
-                with open(file_path, 'rb') as f:
-                    current_hash = hashlib.sha256(f.read()).hexdigest()
-                if current_hash == existing_hash:
-                    logger.info(f"[OK] Sin cambios: {page_name} (usando versión cacheada)")
-                    downloaded_pages.add(page_name)
-                    # Aún así leer el contenido para extraer enlaces
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        html_content = f.read()
-                    pages_content[page_name] = html_content
-                    skip_download = True
-        
-        if not skip_download:
-            # Descargar con reintentos
-            html_content = None
-            last_error = None
+    # Modo concurrente: pool de hilos que pre-descarga las siguientes páginas de la cola.
+    # Los resultados se consumen en orden FIFO para que el recorrido sea idéntico al secuencial.
+    executor = None
+    in_flight: Dict[str, Future] = {}
+    if workers > 1:
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='wiki-crawler')
+    
+    def obtain(name: str) -> Dict:
+        if exclusions is not None and exclusions.matches(name):
+            # Mismo GET condicional que el resto de páginas, sin escribir en disco
+            return _obtain_page(
+                fetcher, name, f"{wiki_base}/{name}", None, None,
+                http_cache.get(name), revalidate and respect_existing,
+                cached_links=discover_links.get(name)
+            )
+        return _obtain_page(
+            fetcher, name, f"{wiki_base}/{name}", _page_file_path(output_path, name),
+            existing_checksums.get(name) if respect_existing else None,
+            http_cache.get(name), revalidate and respect_existing, hash_index, verify
+        )
+    
+    def submit(name: str) -> Future:
+        return executor.submit(obtain, name)
+    
+    page_name = None
+    try:
+        while pages_to_download:
+            page_name = pages_to_download.pop()
             
-            for attempt in range(1, max_retries + 1):
-                try:
-                    logger.info(f"[{attempt}/{max_retries}] Descargando: {page_name}")
-                    
-                    response = session.get(page_url, timeout=30, allow_redirects=True)
-                    response.raise_for_status()
-                    
-                    # Validar que la respuesta es HTML
-                    content_type = response.headers.get('Content-Type', '')
-                    if 'text/html' not in content_type:
-                        logger.warning(f"[WARN] Pagina {page_name} no es HTML (Content-Type: {content_type})")
-                    
-                    html_content = response.text
-                    
-                    # Validar que el contenido no está vacío
-                    if len(html_content) < 100:
-                        raise ValueError(f"Contenido sospechosamente corto: {len(html_content)} bytes")
-                    
-                    # Calcular checksum
-                    content_hash = hashlib.sha256(html_content.encode('utf-8')).hexdigest()
-                    
-                    # Guardar HTML
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(html_content)
-                    
-                    # Registrar en log estructurado
-                    log_entry = {
-                        'timestamp': datetime.now().isoformat(),
-                        'page_name': page_name,
-                        'url': page_url,
-                        'status_code': response.status_code,
-                        'content_length': len(html_content),
-                        'sha256': content_hash,
-                        'attempt': attempt,
-                        'success': True
-                    }
-                    download_log.append(log_entry)
-                    
-                    # Guardar checksum para futuras comparaciones
-                    existing_checksums[page_name] = content_hash
-                    
-                    pages_content[page_name] = html_content
-                    downloaded_pages.add(page_name)
-                    
-                    logger.info(f"[OK] Descargado: {page_name} ({len(html_content)} bytes, SHA256: {content_hash[:12]}...)")
-                    break  # Éxito, salir del loop de reintentos
-                    
-                except requests.exceptions.RequestException as e:
-                    last_error = e
-                    logger.warning(f"[FAIL] Intento {attempt} fallido para {page_name}: {e}")
-                    
-                    log_entry = {
-                        'timestamp': datetime.now().isoformat(),
-                        'page_name': page_name,
-                        'url': page_url,
-                        'attempt': attempt,
-                        'success': False,
-                        'error': str(e)
-                    }
-                    download_log.append(log_entry)
-                    
-                    if attempt < max_retries:
-                        # Backoff exponencial: 2^attempt segundos
-                        backoff = 2 ** attempt
-                        logger.info(f"  Reintentando en {backoff}s...")
-                        time.sleep(backoff)
-                    else:
-                        logger.error(f"[ERROR] Error permanente en {page_name} tras {max_retries} intentos: {last_error}")
-                        continue
-                
-                except Exception as e:
-                    last_error = e
-                    logger.error(f"[ERROR] Error inesperado en {page_name}: {e}")
-                    break
+            if page_name in downloaded_pages:
+                in_flight.pop(page_name, None)
+                continue
+            
+            # Construir URL de la página
+            page_url = f"{wiki_base}/{page_name}"
+            
+            if executor is not None:
+                # Rellenar la ventana de pre-descarga con las siguientes páginas de la cola
+                for queued in pages_to_download:
+                    if len(in_flight) >= workers:
+                        break
+                    if queued not in downloaded_pages and queued not in in_flight and queued != page_name:
+                        in_flight[queued] = submit(queued)
+                future = in_flight.pop(page_name, None) or submit(page_name)
+                result = future.result()
+            else:
+                result = obtain(page_name)
+            
+            download_log.extend(result['log'])
+            html_content = result['html']
             
             # Si no se pudo descargar, continuar con la siguiente
             if html_content is None:
                 continue
             
-            # Rate limiting: esperar antes de la siguiente request
-            time.sleep(rate_limit)
-        
-        # Parsear HTML para encontrar enlaces a otras páginas de la wiki
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Buscar enlaces en el sidebar/menú lateral y contenido principal
-        links_found = set()
-        
-        # IMPORTANTE: En GitLab, el sidebar del wiki está en un atributo data-custom-sidebar-content
-        # que contiene HTML escapado. Necesitamos extraer y parsear ese contenido.
-        sidebar_data_elem = soup.find(attrs={'data-custom-sidebar-content': True})
-        sidebar_html_escaped = None
-        
-        if sidebar_data_elem:
-            sidebar_html_escaped = sidebar_data_elem.get('data-custom-sidebar-content')
-            if sidebar_html_escaped:
-                logger.info(f"[OK] Encontrado data-custom-sidebar-content con {len(sidebar_html_escaped)} caracteres")
-                # Des-escapar el HTML (convierte &lt; a <, &gt; a >, etc.)
-                sidebar_html_unescaped = html.unescape(sidebar_html_escaped)
-                # Parsear el HTML del sidebar
-                sidebar_soup = BeautifulSoup(sidebar_html_unescaped, 'html.parser')
-                # Buscar todos los enlaces con data-wiki-page en el sidebar
-                for link in sidebar_soup.find_all('a', attrs={'data-wiki-page': True}):
-                    wiki_page = link.get('data-wiki-page')
-                    if wiki_page and wiki_page not in ['', '#'] and wiki_page != page_name:
-                        if wiki_page not in downloaded_pages and wiki_page not in pages_to_download:
-                            links_found.add(wiki_page)
-                            pages_to_download.append(wiki_page)
-                            logger.debug(f"  Enlace encontrado en sidebar: {wiki_page}")
-                
-                logger.info(f"[OK] Extraidas {len(links_found)} paginas del sidebar personalizado")
-        
-        # También buscar en el sidebar HTML tradicional (por si acaso)
-        sidebar_selectors = [
-            'aside', 
-            'div.wiki-sidebar', 
-            'div.wiki-sidebar-custom-content',
-            'nav.wiki-sidebar',
-            'div[class*="sidebar"]',
-            'ul.wiki-pages-list',
-            'div[data-testid="wiki-sidebar"]',
-            'nav[aria-label*="Wiki"]'
-        ]
-        
-        sidebar = None
-        for selector in sidebar_selectors:
-            sidebar = soup.select_one(selector)
-            if sidebar:
-                logger.debug(f"Sidebar HTML encontrado con selector: {selector}")
-                break
-        
-        # Buscar también en el contenido principal
-        main_content = None
-        for selector in ['div.wiki-page-details', 'article', 'main', 'div.content', 'div[class*="wiki-page"]']:
-            main_content = soup.select_one(selector)
-            if main_content:
-                break
-        
-        if not main_content:
-            body = soup.find('body')
-            if body:
-                main_content = body
-            else:
-                main_content = soup
-        
-        # Áreas donde buscar enlaces (sidebar primero, luego contenido principal)
-        search_areas = []
-        if sidebar:
-            search_areas.append(('sidebar', sidebar))
-        if main_content:
-            search_areas.append(('content', main_content))
-        
-        # Buscar enlaces en todas las áreas
-        for area_name, area in search_areas:
-            for link in area.find_all('a', href=True):
-                href = link['href']
-                
-                # Normalizar URL (resolver relativos)
-                absolute_url = urljoin(page_url, href)
-                parsed_link = urlparse(absolute_url)
-                
-                # Verificar que el enlace pertenece al mismo dominio y al wiki
-                is_same_domain = parsed_link.netloc == parsed_url.netloc
-                is_wiki_path = '/-/wikis/' in absolute_url
-                
-                if is_same_domain and is_wiki_path:
-                    # Extraer el nombre de la página
-                    wiki_page = None
-                    
-                    # Intentar obtener del atributo data-wiki-page (más confiable)
-                    if link.get('data-wiki-page'):
-                        wiki_page = link.get('data-wiki-page')
-                    else:
-                        # Extraer del path de la URL
-                        wiki_path = absolute_url.split('/-/wikis/')[-1]
-                        # Limpiar parámetros y fragmentos
-                        wiki_page = wiki_path.split('#')[0].split('?')[0].strip()
-                    
-                    # URL decode (por si hay caracteres especiales)
-                    if wiki_page:
-                        wiki_page = unquote(wiki_page)
-                        wiki_page = wiki_page.strip('/')
-                        
-                        # Validar que no es vacío y no es el mismo que ya estamos procesando
-                        if wiki_page and wiki_page not in ['', '#'] and wiki_page != page_name:
-                            if wiki_page not in downloaded_pages and wiki_page not in pages_to_download:
-                                links_found.add(wiki_page)
-                                pages_to_download.append(wiki_page)
-                                logger.debug(f"  Nuevo enlace encontrado en {area_name}: {wiki_page}")
-        
-        if links_found:
-            logger.info(f"  -> {len(links_found)} paginas nuevas encontradas: {', '.join(sorted(list(links_found)[:5]))}{'...' if len(links_found) > 5 else ''}")
+            if result.get('discover_only'):
+                discover_only.add(page_name)
+            elif not result['from_cache']:
+                # Guardar checksum para futuras comparaciones
+                existing_checksums[page_name] = result['sha256']
+            
+            # Guardar ETag / Last-Modified para el próximo GET condicional
+            validators = {k: v for k, v in result['validators'].items() if v}
+            if validators:
+                http_cache[page_name] = validators
+            
+            # Buscar enlaces en el sidebar/menú lateral y contenido principal
+            links_found = set()
+            custom_sidebar_count = 0
+            pages_to_download.pages_parsed += 1
+            page_links = result.get('links')
+            if page_links is None:
+                page_links = _extract_wiki_links(html_content, page_url, page_name, parsed_url.netloc)
+            if result.get('discover_only'):
+                discover_links[page_name] = [list(link) for link in page_links]
+            for area_name, wiki_page in page_links:
+                if pages_to_download.push(wiki_page, downloaded_pages, area=area_name, parent=page_name):
+                    links_found.add(wiki_page)
+                    if area_name == 'custom-sidebar':
+                        custom_sidebar_count += 1
+                    logger.debug(f"  Nuevo enlace encontrado en {area_name}: {wiki_page}")
+            
+            if custom_sidebar_count:
+                logger.info(f"[OK] Extraidas {custom_sidebar_count} paginas del sidebar personalizado")
+            if links_found:
+                logger.info(f"  -> {len(links_found)} paginas nuevas encontradas: {', '.join(sorted(list(links_found)[:5]))}{'...' if len(links_found) > 5 else ''}")
+            
+            # La página cuenta como visitada solo cuando sus enlaces ya están en la cola,
+            # así un checkpoint nunca pierde enlaces de una página a medio procesar
+            downloaded_pages.add(page_name)
+            if page_name not in discover_only:
+                pages_content[page_name] = html_content
+            
+            # Checkpoint periódico para poder reanudar si se interrumpe
+            if checkpoint_every and len(downloaded_pages) % checkpoint_every == 0:
+                save_checkpoint()
+    except BaseException:
+        # Interrupción (Ctrl-C, pérdida de red...): guardar el estado antes de salir
+        save_checkpoint(in_progress=page_name)
+        logger.error(f"[ERROR] Descarga interrumpida. Checkpoint guardado en {checkpoint_file} (usar resume=True)")
+        raise
+    finally:
+        if executor is not None:
+            for future in in_flight.values():
+                future.cancel()
+            executor.shutdown(wait=True)
+        if own_fetcher:
+            fetcher.close()
     
     # Guardar metadatos de la descarga
     logger.info("\n" + "="*60)
@@ -378,12 +878,15 @@ def download_wiki_pages(
         'base_url': base_url,
         'wiki_base': wiki_base,
         'domain': domain,
-        'total_pages': len(downloaded_pages),
-        'pages': sorted(list(downloaded_pages)),
+        'total_pages': len(pages_content),
+        'pages': sorted(pages_content),
+        'discover_only_pages': sorted(discover_only),
         'output_directory': str(output_path),
         'rate_limit': rate_limit,
         'max_retries': max_retries,
-        'respect_existing': respect_existing
+        'respect_existing': respect_existing,
+        'revalidate': revalidate,
+        'discovery_stats': pages_to_download.stats()
     }
     
     manifest_file = metadata_dir / 'manifest.json'
@@ -403,7 +906,25 @@ def download_wiki_pages(
         json.dump(existing_checksums, f, indent=2, ensure_ascii=False)
     logger.info(f"[OK] Checksums guardados: {checksums_file} ({len(existing_checksums)} paginas)")
     
-    # 4. README de metadatos
+    # Índice de hashes para la próxima ejecución
+    hash_index.save()
+    logger.info(f"[OK] Índice de hashes guardado: {hash_index.index_file} "
+                f"({hash_index.hits} sin rehashear, {hash_index.misses} rehasheadas)")
+    
+    # 4. Validadores HTTP para GET condicional
+    with open(http_cache_file, 'w', encoding='utf-8') as f:
+        json.dump(http_cache, f, indent=2, ensure_ascii=False)
+    logger.info(f"[OK] Validadores HTTP guardados: {http_cache_file} ({len(http_cache)} paginas)")
+    
+    # 5. Enlaces de las páginas excluidas para revalidarlas sin guardar su HTML
+    _write_json_atomic(discover_links_file, discover_links, indent=2)
+    logger.info(f"[OK] Enlaces de páginas excluidas guardados: {discover_links_file} ({len(discover_links)} paginas)")
+    
+    # La descarga terminó: el checkpoint ya no es necesario
+    if checkpoint_file.exists():
+        checkpoint_file.unlink()
+    
+    # 6. README de metadatos
     readme_file = metadata_dir / 'README.md'
     readme_content = f"""# Metadatos de Descarga - Wiki Datascope
 
@@ -419,6 +940,7 @@ Inventario completo de la descarga incluyendo:
 - Timestamp de descarga
 - URLs base
 - Lista completa de páginas descargadas
+- Páginas excluidas descargadas solo para extraer enlaces (`discover_only_pages`)
 - Configuración utilizada
 
 ### `download_log.jsonl`
@@ -440,6 +962,29 @@ Checksums SHA256 de cada página para:
 - Validación de integridad
 - Optimización (evitar re-descargas innecesarias)
 
+### `http_cache.json`
+Validadores HTTP (`ETag` / `Last-Modified`) de cada página. En la siguiente
+ejecución se envían como `If-None-Match` / `If-Modified-Since`; un `304 Not Modified`
+reutiliza el HTML cacheado sin volver a transferirlo. También guarda el `Content-Type`
+de cada página: los adjuntos que no son HTML no se leen como texto al reutilizarlos.
+
+### `discover_links.json`
+Enlaces extraídos de cada página excluida que se descargó solo para seguir sus
+enlaces (`discover_excluded`). Como su HTML no se guarda, esta lista hace de copia
+cacheada: la página se revalida con los validadores de `http_cache.json` y un
+`304 Not Modified` reutiliza los enlaces sin volver a transferirla.
+
+### `hash_index.json`
+Tamaño, mtime, inodo y SHA256 de cada HTML. Si el stat de un archivo no cambió,
+su hash se toma de aquí en lugar de volver a leerlo; `verify=True` fuerza el
+recálculo de todos.
+
+### `crawl_checkpoint.json`
+Solo existe mientras una descarga está en curso o si se interrumpió. Guarda la cola
+de páginas pendientes, las páginas visitadas, checksums y entradas de log aún no
+volcadas. Se reescribe de forma atómica cada pocas páginas; `resume=True` continúa
+la descarga desde ese punto.
+
 ## Reproducibilidad
 
 Para reproducir esta descarga exacta:
@@ -469,42 +1014,152 @@ El log completo permite auditar cada operación realizada.
     return pages_content
 
 
+# Modos de colocar las páginas en el directorio de trabajo (filter_useful_pages)
+LINK_MODES = ('copy', 'hardlink', 'reflink', 'symlink', 'auto')
+
+# ioctl de Linux para clonar un archivo (copy-on-write en Btrfs, XFS...)
+FICLONE = 0x40049409
+
+
+class PageFile(os.PathLike):
+    """
+    Página del directorio de trabajo que solo se lee cuando se pide.
+    
+    filter_useful_pages(lazy=True) devuelve estos objetos en lugar del contenido,
+    para no cargar todo el corpus en memoria. Se pueden usar como ruta (open(page)).
+    """
+    
+    __slots__ = ('path',)
+    
+    def __init__(self, path: str):
+        self.path = path
+    
+    def __fspath__(self) -> str:
+        return self.path
+    
+    def read(self) -> str:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return f.read()
+    
+    def __repr__(self) -> str:
+        return f"PageFile({self.path!r})"
+
+
+def _reflink(source: str, target: str) -> None:
+    """Clona source en target con FICLONE (sin copiar datos); OSError si el sistema no lo soporta."""
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError("reflink no disponible en esta plataforma")
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    shutil.copystat(source, target)
+
+
+def _symlink(source: str, target: str) -> None:
+    os.symlink(os.path.relpath(os.path.abspath(source), os.path.dirname(os.path.abspath(target))), target)
+
+
+_LINKERS = {'reflink': _reflink, 'hardlink': os.link, 'symlink': _symlink}
+_LINK_ATTEMPTS = {
+    'copy': (),
+    'hardlink': ('hardlink',),
+    'reflink': ('reflink',),
+    'symlink': ('symlink',),
+    'auto': ('reflink', 'hardlink'),
+}
+
+
+def _place_file(source: str, target: str, link_mode: str) -> str:
+    """
+    Coloca source en target según link_mode, con copia como último recurso
+    (hardlink entre dispositivos, reflink en un sistema de archivos sin soporte...).
+    Se crea en un temporal y se renombra, así que target nunca queda a medias.
+    
+    Returns:
+        Método usado: 'reflink', 'hardlink', 'symlink' o 'copy'
+    """
+    tmp_path = target + '.tmp'
+    for method in _LINK_ATTEMPTS[link_mode]:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            _LINKERS[method](source, tmp_path)
+        except OSError:
+            continue
+        os.replace(tmp_path, target)
+        return method
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    shutil.copy2(source, tmp_path)
+    os.replace(tmp_path, target)
+    return 'copy'
+
+
+def _is_current(source: str, target: str, source_index: HashIndex, target_index: HashIndex) -> bool:
+    """
+    True si target ya tiene el contenido de source: es el mismo inodo (hardlink),
+    un symlink a source o un archivo con el mismo tamaño y SHA256 (desde los
+    índices de hashes, sin releer los archivos cuyo stat no cambió).
+    """
+    if os.path.islink(target):
+        return os.path.realpath(target) == os.path.realpath(source)
+    if not os.path.exists(target):
+        return False
+    if os.path.samefile(source, target):
+        return True
+    return (os.path.getsize(source) == os.path.getsize(target)
+            and source_index.sha256(source) == target_index.sha256(target))
+
+
 def filter_useful_pages(
     useful_pages_file: str = "pags_descarte.txt",
     source_dir: str = "data/wiki_html",
-    output_dir: str = "data/wiki_work_html"
-) -> Dict[str, str]:
+    output_dir: str = "data/wiki_work_html",
+    link_mode: str = "copy",
+    lazy: bool = False
+) -> Dict[str, Union[str, PageFile]]:
     """
     Filtra y copia los archivos HTML excluyendo los que están en pags_descarte.txt.
     
     Esta función copia TODAS las páginas HTML del directorio fuente EXCEPTO las que
-    están listadas en pags_descarte.txt. La página "Overview" siempre se incluye, incluso
-    si está en la lista de exclusión.
+    cubre pags_descarte.txt (nombres exactos, "glob:" o "re:"; ver page_exclusions).
+    La página "Overview" siempre se incluye, incluso si está en la lista de exclusión.
     
     Args:
         useful_pages_file: Archivo de texto con los nombres de páginas a EXCLUIR (uno por línea)
         source_dir: Directorio donde están los HTML descargados
         output_dir: Directorio donde guardar los HTML filtrados
+        link_mode: Cómo se colocan las páginas en output_dir: 'copy' (copia),
+            'hardlink', 'reflink' (clon copy-on-write con FICLONE, Btrfs/XFS),
+            'symlink' o 'auto' (reflink, si no hardlink). Si el modo no es posible
+            (otro dispositivo, sistema de archivos sin soporte) se copia. Con
+            hardlink y symlink output_dir comparte los datos con source_dir: no
+            editar las páginas de output_dir (default: 'copy')
+        lazy: Si True, devuelve PageFile (la ruta, se lee al pedirla) en lugar del
+            contenido de cada página (default: False)
+    
+    Las páginas que ya están en output_dir con el mismo contenido (mismo inodo,
+    symlink a la fuente o mismo SHA256) no se vuelven a escribir.
     
     Returns:
-        Diccionario con el nombre de la página como clave y el contenido HTML como valor
+        Diccionario con el nombre de la página como clave y el contenido HTML como
+        valor (o un PageFile con lazy=True)
     """
+    if link_mode not in LINK_MODES:
+        raise ValueError(f"link_mode debe ser uno de {LINK_MODES}: {link_mode!r}")
+    
     # Crear directorio de salida si no existe
     os.makedirs(output_dir, exist_ok=True)
     
-    # Leer la lista de páginas a excluir
-    excluded_pages = set()
+    # Leer la lista de páginas a excluir (nombres exactos, globs y regex)
     try:
-        with open(useful_pages_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                page_name = line.strip()
-                if page_name:  # Ignorar líneas vacías
-                    excluded_pages.add(page_name)
-        print(f"Páginas a excluir leídas: {len(excluded_pages)}")
+        exclusions = ExclusionMatcher.from_file(useful_pages_file)
+        print(f"Páginas a excluir leídas: {len(exclusions)}")
     except FileNotFoundError:
         print(f"[WARN] Advertencia: No se encontro el archivo {useful_pages_file}")
         print("  Se procesarán todas las páginas disponibles")
-        excluded_pages = set()
+        exclusions = ExclusionMatcher()
     
     # Obtener todos los archivos HTML en el directorio fuente
     if not os.path.exists(source_dir):
@@ -514,18 +1169,24 @@ def filter_useful_pages(
     all_html_files = [f for f in os.listdir(source_dir) if f.endswith('.html')]
     all_pages = {f.replace('.html', '') for f in all_html_files}
     
-    # Filtrar páginas: incluir todas EXCEPTO las que están en excluded_pages
-    # Pero siempre incluir Overview aunque esté en excluded_pages
-    pages_to_include = all_pages - excluded_pages
+    # Filtrar páginas: incluir todas EXCEPTO las excluidas
+    # Pero siempre incluir Overview aunque esté excluida
+    excluded_but_found = {page for page in all_pages if exclusions.matches(page)}
+    pages_to_include = all_pages - excluded_but_found
     pages_to_include.add('Overview')  # Overview siempre se incluye
     
     print(f"\nFiltrando páginas desde {source_dir}...")
     print(f"  - Total de páginas disponibles: {len(all_pages)}")
-    print(f"  - Páginas a excluir: {len(excluded_pages)}")
+    print(f"  - Páginas a excluir: {len(exclusions)}")
     print(f"  - Páginas que se incluirán: {len(pages_to_include)}")
     
-    # Copiar los archivos que deben incluirse
-    filtered_pages: Dict[str, str] = {}
+    # Hashes de las páginas: los de la fuente los mantiene download_wiki_pages
+    source_index = HashIndex(os.path.join(source_dir, "metadata", "hash_index.json"), source_dir)
+    output_index = HashIndex(os.path.join(output_dir, ".hash_index.json"), output_dir)
+    
+    # Colocar (copiar o enlazar) los archivos que deben incluirse
+    filtered_pages: Dict[str, Union[str, PageFile]] = {}
+    methods: Dict[str, int] = {}
     copied_count = 0
     skipped_count = 0
     
@@ -534,26 +1195,35 @@ def filter_useful_pages(
         output_file = os.path.join(output_dir, f"{page_name}.html")
         
         if os.path.exists(source_file):
-            # Copiar el archivo
-            shutil.copy2(source_file, output_file)
+            if _is_current(source_file, output_file, source_index, output_index):
+                method = 'sin cambios'
+            else:
+                method = _place_file(source_file, output_file, link_mode)
+            methods[method] = methods.get(method, 0) + 1
             
-            # Leer el contenido para devolverlo
-            with open(source_file, 'r', encoding='utf-8') as f:
-                filtered_pages[page_name] = f.read()
+            if lazy:
+                filtered_pages[page_name] = PageFile(output_file)
+            else:
+                with open(source_file, 'r', encoding='utf-8') as f:
+                    filtered_pages[page_name] = f.read()
             
             copied_count += 1
-            print(f"  [OK] Incluido: {page_name}")
+            print(f"  [OK] Incluido: {page_name} ({method})")
         else:
             skipped_count += 1
             print(f"  [WARN] No encontrado (sera omitido): {page_name}")
     
     # Mostrar páginas excluidas
-    excluded_but_found = excluded_pages & all_pages
     if excluded_but_found:
         print(f"\n  Páginas excluidas: {', '.join(sorted(excluded_but_found))}")
     
+    if copied_count:
+        if os.path.isdir(os.path.join(source_dir, "metadata")):
+            source_index.save()
+        output_index.save()
+    
     print(f"\nFiltrado completado:")
-    print(f"  - Páginas incluidas: {copied_count}")
+    print(f"  - Páginas incluidas: {copied_count} ({', '.join(f'{m}: {n}' for m, n in sorted(methods.items()))})")
     print(f"  - Páginas excluidas: {len(excluded_but_found)}")
     print(f"  - Total guardado en: {output_dir}")
     
@@ -563,7 +1233,10 @@ def filter_useful_pages(
 def download_linked_pages(
     markdown_dir: str = "data/wiki_markdown",
     output_dir: str = "data/wiki_html",
-    base_url: str = "https://gitlab.com/dsc-clinic/datascope/-/wikis"
+    base_url: str = "https://gitlab.com/dsc-clinic/datascope/-/wikis",
+    rate_limit: float = 0.5,
+    max_retries: int = 3,
+    fetcher: Optional[HttpFetcher] = None
 ) -> Dict[str, str]:
     """
     Lee los archivos markdown y descarga los HTML de las páginas referenciadas.
@@ -572,6 +1245,10 @@ def download_linked_pages(
         markdown_dir: Directorio donde están los archivos markdown
         output_dir: Directorio donde guardar los archivos HTML descargados
         base_url: URL base de la wiki (sin el nombre de la página)
+        rate_limit: Segundos mínimos entre requests (default: 0.5)
+        max_retries: Número máximo de intentos por request (default: 3)
+        fetcher: Cliente HTTP compartido (ver http_fetcher); p. ej. el mismo de
+            download_wiki_pages para reutilizar sus conexiones
     
     Returns:
         Diccionario con el nombre de la página como clave y el contenido HTML como valor
@@ -654,10 +1331,10 @@ def download_linked_pages(
     print(f"\nDescargando {len(pages_to_download)} páginas nuevas...")
     print(f"  (Omitiendo {len(existing_pages)} páginas ya descargadas)")
     
-    # Headers para simular un navegador
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    }
+    # Una sola sesión keep-alive para todas las páginas y llamadas a la API
+    own_fetcher = fetcher is None
+    if own_fetcher:
+        fetcher = HttpFetcher(rate_limit=rate_limit, max_retries=max_retries)
     
     downloaded_pages: Dict[str, str] = {}
     success_count = 0
@@ -668,8 +1345,7 @@ def download_linked_pages(
         
         try:
             print(f"  Descargando: {page_name}...")
-            response = requests.get(page_url, headers=headers, timeout=30)
-            response.raise_for_status()
+            response, _ = fetcher.get(page_url, label=page_name)
             
             # Parsear el HTML para extraer información de la API
             soup = BeautifulSoup(response.text, 'html.parser')
@@ -690,8 +1366,7 @@ def download_linked_pages(
                         api_url = f"{parsed_base.scheme}://{parsed_base.netloc}{api_url}"
                     
                     print(f"    Obteniendo contenido desde API...")
-                    api_response = requests.get(api_url, headers=headers, timeout=30)
-                    api_response.raise_for_status()
+                    api_response, _ = fetcher.get(api_url, label=f"{page_name} (API)")
                     api_data = api_response.json()
                     
                     # El contenido está en el campo 'content' del JSON
@@ -733,14 +1408,14 @@ def download_linked_pages(
             downloaded_pages[page_name] = html_content
             success_count += 1
             
-            # Pequeña pausa para no sobrecargar el servidor
-            time.sleep(0.5)
-            
         except requests.exceptions.RequestException as e:
             error_count += 1
             print(f"  [FAIL] Error al descargar {page_name}: {e}")
             continue
     
+    if own_fetcher:
+        fetcher.close()
+    
     print(f"\nDescarga completada:")
     print(f"  - Páginas descargadas: {success_count}")
     print(f"  - Errores: {error_count}")
@@ -6,20 +6,295 @@ from bs4 import BeautifulSoup
 import os
 import json
 import html
-from typing import Dict
+import hashlib
+import io
+import re
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from markdownify import markdownify as md
 
+try:
+    from importlib.metadata import version as _package_version
+    MARKDOWNIFY_VERSION = _package_version('markdownify')
+except Exception:
+    MARKDOWNIFY_VERSION = 'unknown'
+
+
+# Versión de la conversión: incrementarla al cambiar la lógica de _convert_page
+# invalida todos los .md cacheados
+CONVERTER_VERSION = 1
+
+# Opciones de markdownify para el fallback (forman parte de la clave de caché)
+MARKDOWNIFY_OPTIONS = {
+    'heading_style': "ATX",
+    'bullets': "-",
+    'strip': ['script', 'style', 'nav', 'header', 'footer'],
+}
+
+# Máximo de páginas por lote enviado a un proceso con workers > 1
+MAX_CHUNKSIZE = 32
+
+# Índice de la caché dentro del directorio de salida: página -> clave de la fuente
+CACHE_INDEX_FILE = ".extract_cache.json"
+
+
+def _cache_key(html_bytes: bytes) -> str:
+    """Clave de caché: SHA256 del HTML fuente + versión del conversor y sus opciones."""
+    digest = hashlib.sha256(html_bytes).hexdigest()
+    config = json.dumps({
+        'converter': CONVERTER_VERSION,
+        'markdownify': MARKDOWNIFY_VERSION,
+        'options': MARKDOWNIFY_OPTIONS,
+        'html_sha256': digest
+    }, sort_keys=True)
+    return hashlib.sha256(config.encode('utf-8')).hexdigest()
+
+
+def _load_cache_index(output_dir: str) -> Dict[str, Dict]:
+    index_path = Path(output_dir) / CACHE_INDEX_FILE
+    if not index_path.exists():
+        return {}
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"  [WARN] No se pudo leer la caché de conversión {index_path}: {e}")
+        return {}
+
+
+def _save_cache_index(output_dir: str, index: Dict[str, Dict]) -> None:
+    index_path = Path(output_dir) / CACHE_INDEX_FILE
+    tmp_path = index_path.with_name(index_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, index_path)
+
+
+# Atributos de una etiqueta de apertura (mismas reglas que html.parser)
+_ATTR_RE = re.compile(r'\s*([^\s/>"\'=][^\s/>=]*)(?:\s*=\s*("[^"]*"|\'[^\']*\'|[^\s>]*))?')
+_TAG_END_RE = re.compile(r'\s*/?>')
+
+
+def _find_page_info(html_content: str) -> Optional[str]:
+    """
+    Localiza el valor del atributo data-page-info del primer <div> que lo tiene, sin construir un DOM.
+    
+    Busca la cadena 'data-page-info' en el texto, retrocede hasta el '<' de la etiqueta
+    que la contiene y tokeniza solo esa etiqueta; se detiene en cuanto la encuentra.
+    Las apariciones dentro de <script> o de comentarios se ignoran, igual que al
+    parsear con BeautifulSoup.
+    
+    Args:
+        html_content: HTML de la página
+    
+    Returns:
+        Valor del atributo (con las entidades ya decodificadas, como lo devuelve
+        BeautifulSoup), o None si no se encontró
+    """
+    position = html_content.find('data-page-info')
+    while position != -1:
+        tag_start = html_content.rfind('<', 0, position)
+        if (
+            tag_start != -1
+            and html_content[tag_start + 1:tag_start + 4].lower() == 'div'
+            and html_content[tag_start + 4:tag_start + 5].isspace()
+            and html_content.rfind('<script', 0, position) <= html_content.rfind('</script', 0, position)
+            and html_content.rfind('<!--', 0, position) <= html_content.rfind('-->', 0, position)
+        ):
+            attrs = {}
+            offset = tag_start + 4
+            while True:
+                match = _ATTR_RE.match(html_content, offset)
+                if not match or match.end() == offset or _TAG_END_RE.match(html_content, offset):
+                    break
+                name, value = match.group(1).lower(), match.group(2)
+                if value and value[:1] == value[-1:] and value[:1] in ('"', "'"):
+                    value = value[1:-1]
+                attrs[name] = html.unescape(value) if value else ''
+                offset = match.end()
+            # Solo vale si la etiqueta se cerró bien y el '<' era realmente el de esta etiqueta
+            if offset > position and _TAG_END_RE.match(html_content, offset) and 'data-page-info' in attrs:
+                return attrs['data-page-info']
+        position = html_content.find('data-page-info', position + 1)
+    return None
+
+
+def _fast_page_content(html_content: str) -> Optional[str]:
+    """
+    Camino rápido: markdown del campo 'content' de data-page-info sin parsear el documento.
+    
+    Returns:
+        Markdown con saltos de línea normalizados, o None si no se puede obtener
+        (en ese caso se usa el camino completo con BeautifulSoup)
+    """
+    page_info_json = _find_page_info(html_content)
+    if not page_info_json:
+        return None
+    try:
+        page_info = json.loads(html.unescape(page_info_json))
+    except ValueError:
+        return None
+    content = page_info.get('content') if isinstance(page_info, dict) else None
+    if not isinstance(content, str) or not content:
+        return None
+    return content.replace('\r\n', '\n')
+
+
+def _convert_page(html_content: str, page_name: str) -> str:
+    """
+    Convierte el HTML de una página de la wiki a Markdown.
+    
+    Args:
+        html_content: HTML de la página
+        page_name: Nombre de la página (se usa como título)
+    
+    Returns:
+        Contenido Markdown con el título de la página al inicio
+    """
+    markdown_content = _fast_page_content(html_content)
+    if markdown_content is None:
+        markdown_content = _convert_page_soup(html_content, page_name)
+    
+    # Limpiar el markdown (eliminar líneas vacías excesivas)
+    lines = markdown_content.split('\n')
+    cleaned_lines = []
+    prev_empty = False
+    for line in lines:
+        is_empty = not line.strip()
+        if not (is_empty and prev_empty):  # No añadir líneas vacías consecutivas
+            cleaned_lines.append(line)
+        prev_empty = is_empty
+    
+    markdown_content = '\n'.join(cleaned_lines).strip()
+    
+    # Añadir título de la página al inicio
+    title = page_name.replace('-', ' ').title()
+    return f"# {title}\n\n{markdown_content}"
+
+
+def _convert_page_soup(html_content: str, page_name: str) -> str:
+    """Extracción completa con BeautifulSoup (data-page-info y, si falla, markdownify)."""
+    # Parsear con BeautifulSoup
+    soup = BeautifulSoup(html_content, 'html.parser')
+    
+    markdown_content = ""
+    
+    # GitLab wiki tiene el contenido en el atributo data-page-info como JSON
+    wiki_app = soup.find('div', attrs={'data-page-info': True})
+    
+    if wiki_app and wiki_app.get('data-page-info'):
+        try:
+            # Extraer y parsear el JSON
+            page_info_json = wiki_app.get('data-page-info')
+            # El JSON está HTML-escapado, necesitamos des-escaparlo
+            page_info_json = html.unescape(page_info_json)
+            page_info = json.loads(page_info_json)
+            
+            # El contenido está en el campo 'content'
+            if 'content' in page_info:
+                markdown_content = page_info['content']
+                # El contenido puede tener \r\n, normalizarlos a \n
+                markdown_content = markdown_content.replace('\r\n', '\n')
+            else:
+                print(f"    [WARN] No se encontró 'content' en data-page-info para {page_name}")
+                
+        except json.JSONDecodeError as e:
+            print(f"    [WARN] Error al parsear JSON de data-page-info: {e}")
+        except Exception as e:
+            print(f"    [WARN] Error al extraer contenido de data-page-info: {e}")
+    
+    # Si no se pudo obtener del JSON, intentar fallback
+    if not markdown_content:
+        print(f"    [INFO] Usando fallback para extraer contenido de {page_name}")
+        # Buscar contenido principal tradicional
+        for selector in ['div.wiki-content', 'div.wiki', 'article', 'main', 'div.content']:
+            main_content = soup.select_one(selector)
+            if main_content:
+                break
+        
+        if not main_content:
+            main_content = soup.find('body')
+            if not main_content:
+                main_content = soup
+        
+        markdown_content = md(str(main_content), **MARKDOWNIFY_OPTIONS)
+    
+    return markdown_content
+
+
+def _convert_file(task: Tuple[str, str]) -> Tuple[Optional[str], str, Optional[str]]:
+    """
+    Convierte un archivo HTML (unidad de trabajo, ejecutable en otro proceso).
+    
+    Los avisos que imprime la conversión se capturan y se devuelven para que el
+    proceso principal los muestre en orden.
+    
+    Args:
+        task: Tupla (ruta del HTML, nombre de la página)
+    
+    Returns:
+        Tupla (markdown o None si falló, salida capturada, mensaje de error o None)
+    """
+    html_path, page_name = task
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            # Mismo texto que open(..., 'r'): saltos de línea universales
+            with open(html_path, 'r', encoding='utf-8') as f:
+                html_content = f.read()
+            markdown_content = _convert_page(html_content, page_name)
+        return markdown_content, output.getvalue(), None
+    except Exception as e:
+        return None, output.getvalue(), str(e)
+
+
+def _discard_stale_markdown(markdown_path: str, page_name: str) -> None:
+    """
+    Elimina el .md de una ejecución anterior cuando la conversión de su página falla.
+    
+    Ese .md ya no corresponde al HTML actual y, como la página sale del índice de
+    la caché, la poda posterior no lo vería nunca: unify_markdowns lo seguiría
+    incluyendo indefinidamente.
+    """
+    if os.path.exists(markdown_path):
+        os.remove(markdown_path)
+        print(f"  [PRUNE] Eliminado (conversión fallida): {page_name}.md")
+
+
+def _chunksize(num_tasks: int, workers: int) -> int:
+    """Páginas por lote enviado a cada proceso: ~4 lotes por proceso para equilibrar carga sin ahogar en IPC."""
+    return max(1, min(MAX_CHUNKSIZE, num_tasks // (workers * 4)))
+
 
 def extract_text(
     source_dir: str = "data/wiki_work_html",
-    output_dir: str = "data/wiki_markdown"
+    output_dir: str = "data/wiki_markdown",
+    use_cache: bool = True,
+    workers: int = 1
 ) -> Dict[str, str]:
     """
     Extrae el contenido textual y tablas de los archivos HTML y los convierte a Markdown.
     
+    Con use_cache=True cada .md se asocia (en output_dir/.extract_cache.json) a la
+    clave SHA256 de su HTML fuente + versión y opciones del conversor; si la clave
+    no cambió y el .md sigue en disco, se reutiliza sin volver a parsear el HTML.
+    Los .md registrados en la caché cuya página fuente ya no existe se eliminan
+    (con use_cache=False no se elimina nada). Si la conversión de una página falla,
+    se elimina su .md de una ejecución anterior para no dejar contenido obsoleto.
+    
+    Con workers > 1 las páginas a convertir se reparten en lotes entre procesos
+    (el parseo con BeautifulSoup es CPU pura y no escala con hilos). Los resultados
+    se recogen y escriben en el mismo orden que en modo secuencial, por lo que el
+    diccionario devuelto, los archivos, los mensajes y los contadores son idénticos.
+    
     Args:
         source_dir: Directorio donde están los archivos HTML
         output_dir: Directorio donde guardar los archivos Markdown
+        use_cache: Si True, reutiliza los .md cuyo HTML fuente no cambió
+        workers: Número de procesos para la conversión (1 = secuencial)
     
     Returns:
         Diccionario con el nombre de la página como clave y el contenido Markdown como valor
@@ -34,105 +309,113 @@ def extract_text(
         print(f"No se encontraron archivos HTML en {source_dir}")
         return {}
     
+    cache_index = _load_cache_index(output_dir) if use_cache else {}
+    new_index: Dict[str, Dict] = {}
+    
     markdown_pages: Dict[str, str] = {}
     converted_count = 0
+    cached_count = 0
     error_count = 0
     
     print(f"\nExtrayendo texto y convirtiendo a Markdown desde {source_dir}...")
     
+    # 1) Comprobar la caché y decidir qué páginas hay que convertir
+    keys: Dict[str, str] = {}
+    read_errors: Dict[str, str] = {}
+    pending: List[Tuple[str, str]] = []
     for html_file in html_files:
         page_name = html_file.replace('.html', '')
         html_path = os.path.join(source_dir, html_file)
         markdown_path = os.path.join(output_dir, f"{page_name}.md")
         
         try:
-            # Leer el archivo HTML
-            with open(html_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            
-            # Parsear con BeautifulSoup
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            markdown_content = ""
-            
-            # GitLab wiki tiene el contenido en el atributo data-page-info como JSON
-            wiki_app = soup.find('div', attrs={'data-page-info': True})
+            with open(html_path, 'rb') as f:
+                keys[page_name] = _cache_key(f.read())
             
-            if wiki_app and wiki_app.get('data-page-info'):
-                try:
-                    # Extraer y parsear el JSON
-                    page_info_json = wiki_app.get('data-page-info')
-                    # El JSON está HTML-escapado, necesitamos des-escaparlo
-                    page_info_json = html.unescape(page_info_json)
-                    page_info = json.loads(page_info_json)
-                    
-                    # El contenido está en el campo 'content'
-                    if 'content' in page_info:
-                        markdown_content = page_info['content']
-                        # El contenido puede tener \r\n, normalizarlos a \n
-                        markdown_content = markdown_content.replace('\r\n', '\n')
-                    else:
-                        print(f"    [WARN] No se encontró 'content' en data-page-info para {page_name}")
-                        
-                except json.JSONDecodeError as e:
-                    print(f"    [WARN] Error al parsear JSON de data-page-info: {e}")
-                except Exception as e:
-                    print(f"    [WARN] Error al extraer contenido de data-page-info: {e}")
-            
-            # Si no se pudo obtener del JSON, intentar fallback
-            if not markdown_content:
-                print(f"    [INFO] Usando fallback para extraer contenido de {page_name}")
-                # Buscar contenido principal tradicional
-                for selector in ['div.wiki-content', 'div.wiki', 'article', 'main', 'div.content']:
-                    main_content = soup.select_one(selector)
-                    if main_content:
-                        break
-                
-                if not main_content:
-                    main_content = soup.find('body')
-                    if not main_content:
-                        main_content = soup
-                
-                markdown_content = md(
-                    str(main_content),
-                    heading_style="ATX",
-                    bullets="-",
-                    strip=['script', 'style', 'nav', 'header', 'footer'],
-                )
-            
-            # Limpiar el markdown (eliminar líneas vacías excesivas)
-            lines = markdown_content.split('\n')
-            cleaned_lines = []
-            prev_empty = False
-            for line in lines:
-                is_empty = not line.strip()
-                if not (is_empty and prev_empty):  # No añadir líneas vacías consecutivas
-                    cleaned_lines.append(line)
-                prev_empty = is_empty
-            
-            markdown_content = '\n'.join(cleaned_lines).strip()
-            
-            # Añadir título de la página al inicio
-            title = page_name.replace('-', ' ').title()
-            markdown_content = f"# {title}\n\n{markdown_content}"
+            cached = cache_index.get(page_name)
+            if cached and cached.get('key') == keys[page_name] and os.path.exists(markdown_path):
+                with open(markdown_path, 'r', encoding='utf-8') as f:
+                    markdown_pages[page_name] = f.read()
+                new_index[page_name] = cached
+                cached_count += 1
+                continue
+        except Exception as e:
+            read_errors[page_name] = str(e)
+            continue
+        
+        pending.append((html_path, page_name))
+    
+    # 2) Convertir las páginas pendientes (en orden, secuencial o en un pool de procesos)
+    if workers > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_convert_file, pending, chunksize=_chunksize(len(pending), workers)))
+    else:
+        results = [_convert_file(task) for task in pending]
+    converted = {page_name: result for (_, page_name), result in zip(pending, results)}
+    
+    # 3) Escribir y registrar los resultados en el orden del directorio
+    for html_file in html_files:
+        page_name = html_file.replace('.html', '')
+        markdown_path = os.path.join(output_dir, f"{page_name}.md")
+        
+        if page_name in read_errors:
+            error_count += 1
+            print(f"  [FAIL] Error al convertir {page_name}: {read_errors[page_name]}")
+            _discard_stale_markdown(markdown_path, page_name)
+            continue
+        if page_name not in converted:
+            continue
+        
+        markdown_content, log_output, error = converted[page_name]
+        if log_output:
+            print(log_output, end='')
+        
+        try:
+            if error is not None:
+                raise RuntimeError(error)
             
             # Guardar el archivo Markdown
             with open(markdown_path, 'w', encoding='utf-8') as f:
                 f.write(markdown_content)
             
             markdown_pages[page_name] = markdown_content
+            new_index[page_name] = {
+                'key': keys[page_name],
+                'source': html_file,
+                'converted_at': datetime.now().isoformat()
+            }
             converted_count += 1
             print(f"  [OK] Convertido: {page_name}")
             
         except Exception as e:
             error_count += 1
             print(f"  [FAIL] Error al convertir {page_name}: {e}")
+            _discard_stale_markdown(markdown_path, page_name)
             continue
     
+    # Mismo orden de claves que el recorrido del directorio (caché y convertidas mezcladas)
+    page_order = [html_file.replace('.html', '') for html_file in html_files]
+    markdown_pages = {name: markdown_pages[name] for name in page_order if name in markdown_pages}
+    
+    # Eliminar los .md cuya página fuente ya no existe, solo si la caché registra que
+    # los generó esta función (otros .md del directorio no se tocan)
+    source_pages = {html_file.replace('.html', '') for html_file in html_files}
+    pruned_count = 0
+    for page_name in sorted(set(cache_index) - source_pages):
+        markdown_path = os.path.join(output_dir, f"{page_name}.md")
+        if os.path.exists(markdown_path):
+            os.remove(markdown_path)
+            pruned_count += 1
+            print(f"  [PRUNE] Eliminado (sin fuente): {page_name}.md")
+    
+    if use_cache:
+        _save_cache_index(output_dir, new_index)
+    
     print(f"\nConversión completada:")
     print(f"  - Archivos convertidos: {converted_count}")
+    print(f"  - Reutilizados de caché: {cached_count}")
+    print(f"  - Eliminados sin fuente: {pruned_count}")
     print(f"  - Errores: {error_count}")
     print(f"  - Total guardado en: {output_dir}")
     
     return markdown_pages
-
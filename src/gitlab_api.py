@@ -0,0 +1,237 @@
+"""
+Backend de ingesta de la wiki a través de la API JSON de GitLab.
+
+En lugar de descargar el HTML renderizado de cada página (cientos de KB por
+página para unos pocos KB de contenido), lista y obtiene todas las páginas con
+`GET /api/v4/projects/:id/wikis?with_content=1` en unas pocas requests paginadas.
+
+Escribe la misma estructura en disco que `download_wiki_pages` (un HTML por
+página con el atributo `data-page-info` y la carpeta `metadata/`), de modo que
+`filter_useful_pages`, `extract_text`, `unify_markdowns` y `create_final_output`
+funcionan sin cambios.
+"""
+
+import requests
+import os
+import json
+import hashlib
+import logging
+import html
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse, quote
+
+from .download_wiki import _page_file_path, _write_bytes_atomic, _write_json_atomic
+from .http_fetcher import HttpFetcher
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_wiki_url(base_url: str) -> Tuple[str, str, str]:
+    """
+    Descompone la URL de una wiki de GitLab.
+
+    Ej: https://gitlab.com/dsc-clinic/datascope/-/wikis/home
+        -> ('https://gitlab.com', 'dsc-clinic/datascope', 'https://gitlab.com/dsc-clinic/datascope/-/wikis')
+
+    Returns:
+        Tupla (dominio, ruta del proyecto, URL base de la wiki)
+    """
+    if '/-/wikis' not in base_url:
+        raise ValueError("URL debe contener '/-/wikis/' para ser un wiki de GitLab válido")
+    parsed_url = urlparse(base_url)
+    domain = f"{parsed_url.scheme}://{parsed_url.netloc}"
+    project_path = parsed_url.path.split('/-/wikis')[0].strip('/')
+    return domain, project_path, f"{domain}/{project_path}/-/wikis"
+
+
+def render_page_html(page: Dict) -> str:
+    """
+    Genera un HTML mínimo con la misma estructura que la página renderizada por GitLab.
+
+    El contenido markdown se guarda, igual que en GitLab, en el atributo
+    `data-page-info` (JSON HTML-escapado) del div `js-vue-wiki-app`, que es lo
+    que lee `extract_text`.
+
+    Args:
+        page: Página devuelta por la API (slug, title, format, content)
+
+    Returns:
+        HTML de la página
+    """
+    page_info = {
+        'slug': page.get('slug'),
+        'title': page.get('title'),
+        'format': page.get('format', 'markdown'),
+        'content': page.get('content', ''),
+    }
+    page_info_attr = html.escape(json.dumps(page_info, ensure_ascii=False), quote=True)
+    title = html.escape(page.get('title') or page.get('slug') or '')
+    return (
+        '<!DOCTYPE html>\n'
+        '<html>\n'
+        f'<head><meta charset="utf-8"><title>{title} · Wiki</title></head>\n'
+        '<body>\n'
+        f'<div id="js-vue-wiki-app" data-page-info="{page_info_attr}"></div>\n'
+        '</body>\n'
+        '</html>\n'
+    )
+
+
+def download_wiki_api(
+    base_url: str,
+    output_dir: str = "data/wiki_html",
+    per_page: int = 100,
+    rate_limit: float = 0.5,
+    max_retries: int = 3,
+    respect_existing: bool = True,
+    token: Optional[str] = None,
+    fetcher: Optional[HttpFetcher] = None
+) -> Dict[str, str]:
+    """
+    Descarga todas las páginas de una wiki de GitLab mediante la API de wikis.
+
+    Args:
+        base_url: URL de la wiki (ej: https://gitlab.com/dsc-clinic/datascope/-/wikis/home)
+        output_dir: Directorio raíz donde guardar los archivos HTML
+        per_page: Páginas de wiki por request de la API (default: 100)
+        rate_limit: Segundos mínimos entre requests paginadas (default: 0.5)
+        max_retries: Número máximo de reintentos por request (default: 3)
+        respect_existing: Si True, no reescribe páginas cuyo contenido no cambió (default: True)
+        token: Token de acceso de GitLab para wikis privadas (default: variable
+            de entorno GITLAB_TOKEN si existe)
+        fetcher: Cliente HTTP compartido (ver http_fetcher), con su política de
+            reintentos y rate limit; por defecto se crea uno con rate_limit y max_retries
+
+    Returns:
+        Diccionario con el nombre de la página como clave y el contenido HTML como valor
+    """
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    metadata_dir = output_path / "metadata"
+    metadata_dir.mkdir(exist_ok=True)
+
+    domain, project_path, wiki_base = _parse_wiki_url(base_url)
+    api_url = f"{domain}/api/v4/projects/{quote(project_path, safe='')}/wikis"
+
+    logger.info(f"Iniciando descarga de wiki vía API: {api_url}")
+    logger.info(f"Directorio de salida: {output_dir}")
+
+    # Cargar checksums existentes si existen
+    checksums_file = metadata_dir / "page_checksums.json"
+    existing_checksums = {}
+    if respect_existing and checksums_file.exists():
+        try:
+            with open(checksums_file, 'r', encoding='utf-8') as f:
+                existing_checksums = json.load(f)
+            logger.info(f"Cargados {len(existing_checksums)} checksums existentes")
+        except Exception as e:
+            logger.warning(f"No se pudieron cargar checksums existentes: {e}")
+
+    request_headers = {'Accept': 'application/json'}
+    token = token or os.environ.get('GITLAB_TOKEN')
+    if token:
+        request_headers['PRIVATE-TOKEN'] = token
+
+    download_log: List[Dict] = []
+    api_pages: List[Dict] = []
+
+    def log_failure(attempt: int, error: Exception) -> None:
+        download_log.append({
+            'timestamp': datetime.now().isoformat(),
+            'url': api_url,
+            'attempt': attempt,
+            'success': False,
+            'error': str(error)
+        })
+
+    # Misma sesión, reintentos con backoff y rate limit que el crawler HTML
+    own_fetcher = fetcher is None
+    if own_fetcher:
+        fetcher = HttpFetcher(rate_limit=rate_limit, max_retries=max_retries)
+
+    # Recorrer la paginación de la API (cabecera X-Next-Page)
+    page_number = 1
+    try:
+        while page_number:
+            params = {'with_content': 1, 'per_page': per_page, 'page': page_number}
+            try:
+                response, attempt = fetcher.get(api_url, label=f"página API {page_number}", headers=request_headers,
+                                                on_failure=log_failure, params=params)
+            except requests.exceptions.RequestException as e:
+                raise RuntimeError(f"No se pudo listar la wiki tras {fetcher.max_retries} intentos: {api_url}") from e
+            download_log.append({
+                'timestamp': datetime.now().isoformat(),
+                'url': response.url,
+                'status_code': response.status_code,
+                'content_length': len(response.content),
+                'attempt': attempt,
+                'success': True
+            })
+
+            batch = response.json()
+            api_pages.extend(batch)
+            next_page = response.headers.get('X-Next-Page', '').strip()
+            page_number = int(next_page) if next_page and batch else None
+    finally:
+        if own_fetcher:
+            fetcher.close()
+
+    logger.info(f"[OK] {len(api_pages)} páginas obtenidas de la API")
+
+    # Escribir un HTML por página con la misma estructura que el crawler
+    pages_content: Dict[str, str] = {}
+    for page in api_pages:
+        page_name = page.get('slug')
+        if not page_name:
+            continue
+        html_content = render_page_html(page)
+        content_hash = hashlib.sha256(html_content.encode('utf-8')).hexdigest()
+        file_path = _page_file_path(output_path, page_name)
+
+        if respect_existing and existing_checksums.get(page_name) == content_hash and file_path.exists():
+            logger.info(f"[OK] Sin cambios: {page_name}")
+        else:
+            _write_bytes_atomic(file_path, html_content.encode('utf-8'))
+            existing_checksums[page_name] = content_hash
+            download_log.append({
+                'timestamp': datetime.now().isoformat(),
+                'page_name': page_name,
+                'url': f"{wiki_base}/{page_name}",
+                'content_length': len(html_content),
+                'sha256': content_hash,
+                'success': True,
+                'source': 'api'
+            })
+            logger.info(f"[OK] Guardado: {page_name} ({len(html_content)} bytes, SHA256: {content_hash[:12]}...)")
+
+        pages_content[page_name] = html_content
+
+    # Guardar metadatos con el mismo formato que download_wiki_pages
+    manifest = {
+        'download_timestamp': datetime.now().isoformat(),
+        'base_url': base_url,
+        'wiki_base': wiki_base,
+        'domain': domain,
+        'api_url': api_url,
+        'backend': 'api',
+        'total_pages': len(pages_content),
+        'pages': sorted(pages_content),
+        'output_directory': str(output_path),
+        'per_page': per_page,
+        'rate_limit': rate_limit,
+        'max_retries': max_retries,
+        'respect_existing': respect_existing
+    }
+    _write_json_atomic(metadata_dir / 'manifest.json', manifest, indent=2)
+
+    with open(metadata_dir / 'download_log.jsonl', 'a', encoding='utf-8') as f:
+        for entry in download_log:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    _write_json_atomic(checksums_file, existing_checksums, indent=2)
+
+    logger.info(f"[OK] Descarga vía API completada: {len(pages_content)} páginas en {output_path}")
+
+    return pages_content
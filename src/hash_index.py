@@ -0,0 +1,113 @@
+"""
+Índice de hashes de archivos validado por stat, al estilo del índice de git.
+
+download_wiki_pages compara cada página cacheada con page_checksums.json; sin
+índice eso supone leer y hashear el corpus entero en cada ejecución, aunque no
+haya cambiado nada. HashIndex guarda, por archivo, (tamaño, mtime_ns, inodo,
+sha256) y solo vuelve a calcular el SHA256 cuando cambia alguno de los tres
+primeros valores.
+
+Archivos "racy" (como en git): si un archivo se modificó en el mismo instante
+en que se guardó el índice, su mtime no basta para saber si cambió después.
+Las entradas con mtime_ns >= el mtime del propio archivo del índice se
+rehashean siempre.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Union
+
+INDEX_VERSION = 1
+
+# Tamaño de bloque al hashear archivos (cuando no hay hashlib.file_digest)
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: Union[str, Path]) -> str:
+    """SHA256 de un archivo leído por bloques (sin cargarlo entero en memoria)."""
+    with open(path, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+        digest = hashlib.sha256()
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+        return digest.hexdigest()
+
+
+class HashIndex:
+    """
+    Caché de SHA256 de los archivos de un directorio, guardada en un JSON.
+
+    Las claves son rutas relativas a `root`. Es segura entre hilos (los workers
+    de download_wiki_pages la consultan y actualizan a la vez).
+
+    Args:
+        index_file: Archivo JSON del índice (se crea al guardar)
+        root: Directorio base de las rutas
+    """
+
+    def __init__(self, index_file: Union[str, Path], root: Union[str, Path]):
+        self.index_file = Path(index_file)
+        self.root = Path(root)
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, List] = {}
+        self._saved_ns = 0
+        self._lock = threading.Lock()
+        if self.index_file.exists():
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == INDEX_VERSION:
+                    self._entries = data['files']
+                    self._saved_ns = os.stat(self.index_file).st_mtime_ns
+            except (OSError, ValueError, KeyError):
+                self._entries = {}
+
+    def _key(self, path: Path) -> str:
+        return Path(os.path.relpath(path, self.root)).as_posix()
+
+    def sha256(self, path: Union[str, Path], verify: bool = False) -> str:
+        """
+        SHA256 del archivo: el del índice si su stat no cambió, o recalculado.
+
+        Args:
+            path: Archivo dentro de root
+            verify: Si True, rehashea siempre (y actualiza el índice)
+
+        Raises:
+            OSError: Si el archivo no existe o no se puede leer
+        """
+        path = Path(path)
+        key = self._key(path)
+        st = os.stat(path)
+        stat = [st.st_size, st.st_mtime_ns, st.st_ino]
+        with self._lock:
+            entry = self._entries.get(key)
+            if not verify and entry is not None and entry[:3] == stat and st.st_mtime_ns < self._saved_ns:
+                self.hits += 1
+                return entry[3]
+            self.misses += 1
+        digest = file_sha256(path)
+        with self._lock:
+            self._entries[key] = stat + [digest]
+        return digest
+
+    def update(self, path: Union[str, Path], sha256: str) -> None:
+        """Registra el hash de un archivo recién escrito (ya calculado al escribirlo)."""
+        path = Path(path)
+        st = os.stat(path)
+        with self._lock:
+            self._entries[self._key(path)] = [st.st_size, st.st_mtime_ns, st.st_ino, sha256]
+
+    def save(self) -> None:
+        """Guarda el índice de forma atómica (temporal + os.replace)."""
+        with self._lock:
+            data = {'version': INDEX_VERSION, 'files': dict(sorted(self._entries.items()))}
+        tmp_path = self.index_file.with_name(self.index_file.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.index_file)
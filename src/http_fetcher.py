@@ -0,0 +1,194 @@
+"""
+Cliente HTTP compartido por las descargas de la wiki.
+
+download_wiki_pages y download_linked_pages hacen muchas requests seguidas al
+mismo host. HttpFetcher las hace todas a través de una única requests.Session
+con un pool de conexiones keep-alive (una conexión TCP+TLS por worker en lugar
+de una por request), con la misma política de reintentos con backoff
+exponencial y el mismo rate limit (token bucket) para ambas.
+
+Política de reintentos: se reintentan los errores de red, los timeouts y las
+respuestas 408, 429 y 5xx, esperando base^intento segundos (o lo que indique
+Retry-After, si es mayor). El resto de errores HTTP (404, 403...) no cambian
+al repetir la request y fallan en el primer intento.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Headers explícitos para identificación responsable
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (compatible; DataScopeWikiArchiver/1.0; +Clinical/Research)',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Cache-Control': 'max-age=0'
+}
+
+RETRY_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+# Espera máxima entre reintentos (también limita Retry-After)
+MAX_BACKOFF = 60.0
+
+
+class TokenBucket:
+    """
+    Limitador de tasa global tipo token bucket, seguro entre hilos.
+
+    Cada request consume un token; los tokens se reponen a `rate` por segundo
+    hasta un máximo de `capacity`. Con capacity=1 el caudal medio nunca supera
+    `rate` requests/segundo, pero la latencia de red de varios workers se solapa.
+
+    Args:
+        rate: Tokens (requests) por segundo
+        capacity: Máximo de tokens acumulables (tamaño de ráfaga)
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Bloquea hasta que haya un token disponible y lo consume."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _is_retryable(error: requests.exceptions.RequestException) -> bool:
+    response = getattr(error, 'response', None)
+    return response is None or response.status_code in RETRY_STATUS_CODES
+
+
+def _retry_after(error: requests.exceptions.RequestException) -> float:
+    """Segundos indicados en la cabecera Retry-After de la respuesta (0 si no hay)."""
+    response = getattr(error, 'response', None)
+    value = response.headers.get('Retry-After', '') if response is not None else ''
+    return float(value) if value.strip().isdigit() else 0.0
+
+
+class HttpFetcher:
+    """
+    Sesión HTTP con pool de conexiones, reintentos con backoff y rate limit.
+
+    Es segura entre hilos: los workers de download_wiki_pages comparten la misma
+    instancia. Se puede pasar una misma instancia a varias funciones para que
+    reutilicen las conexiones abiertas.
+
+    Args:
+        rate_limit: Segundos mínimos entre requests (0 = sin límite)
+        max_retries: Intentos por request (incluido el primero)
+        pool_maxsize: Conexiones keep-alive por host (una por worker)
+        timeout: Timeout de cada request en segundos
+        backoff_base: Espera antes del reintento n: backoff_base ** n segundos
+        headers: Headers adicionales (se combinan con DEFAULT_HEADERS)
+    """
+
+    def __init__(
+        self,
+        rate_limit: float = 0.0,
+        max_retries: int = 3,
+        pool_maxsize: int = 1,
+        timeout: float = 30,
+        backoff_base: float = 2.0,
+        headers: Optional[Dict[str, str]] = None
+    ):
+        self.max_retries = max(1, max_retries)
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.limiter = TokenBucket(rate=1.0 / rate_limit if rate_limit > 0 else 0)
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        if headers:
+            self.session.headers.update(headers)
+        # pool_block: con más hilos que conexiones, los hilos esperan una conexión
+        # libre en lugar de abrir conexiones extra que luego se descartan
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, pool_maxsize), pool_block=True)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(
+        self,
+        url: str,
+        label: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        on_failure: Optional[Callable[[int, Exception], None]] = None,
+        first_attempt: int = 1,
+        **kwargs
+    ) -> Tuple[requests.Response, int]:
+        """
+        GET con reintentos. Cada intento espera su turno en el rate limit.
+
+        Args:
+            url: URL a descargar
+            label: Nombre para los mensajes de log (default: la URL)
+            headers: Headers de esta request
+            on_failure: Función (intento, error) llamada tras cada intento fallido
+            first_attempt: Número del primer intento. Quien ya gastó intentos en la
+                misma descarga (p. ej. un corte al leer el cuerpo con stream=True)
+                continúa la cuenta, de modo que el total nunca supera max_retries
+            **kwargs: Argumentos adicionales de requests (stream, params...)
+
+        Returns:
+            Tupla (respuesta, número de intento que tuvo éxito)
+
+        Raises:
+            requests.exceptions.RequestException: Error del último intento
+        """
+        label = label or url
+        for attempt in range(first_attempt, self.max_retries + 1):
+            self.limiter.acquire()
+            logger.info(f"[{attempt}/{self.max_retries}] Descargando: {label}")
+            try:
+                response = self.session.get(url, timeout=self.timeout, allow_redirects=True,
+                                            headers=headers, **kwargs)
+                response.raise_for_status()
+                return response, attempt
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"[FAIL] Intento {attempt} fallido para {label}: {e}")
+                # Con stream=True la respuesta fallida retiene su conexión hasta cerrarla
+                if getattr(e, 'response', None) is not None:
+                    e.response.close()
+                if on_failure is not None:
+                    on_failure(attempt, e)
+                if attempt < self.max_retries and _is_retryable(e):
+                    self.backoff(attempt, e)
+                    continue
+                logger.error(f"[ERROR] Error permanente en {label} tras {attempt} intentos: {e}")
+                raise
+        raise requests.exceptions.RetryError(f"Sin intentos disponibles para {label}")
+
+    def backoff(self, attempt: int, error: Optional[Exception] = None) -> None:
+        """Espera antes del reintento que sigue al intento `attempt` (backoff_base ** attempt o Retry-After)."""
+        backoff = min(MAX_BACKOFF, max(self.backoff_base ** attempt, _retry_after(error)))
+        logger.info(f"  Reintentando en {backoff:g}s...")
+        time.sleep(backoff)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,171 @@
+"""
+Extracción de enlaces de la wiki en una sola pasada sin construir un DOM.
+
+`WikiLinkScanner` recorre el HTML con `html.parser.HTMLParser` y, en la misma
+pasada, localiza:
+- el atributo `data-custom-sidebar-content` (sidebar personalizado de GitLab),
+- el primer elemento de cada selector de sidebar y de contenido principal que
+  usaba el crawler con BeautifulSoup,
+- los enlaces `<a href>` contenidos en cada una de esas regiones.
+
+Al final se elige la región con la misma prioridad de selectores que la
+implementación con BeautifulSoup, por lo que el conjunto de enlaces es el mismo.
+"""
+
+import html
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+
+# Elementos HTML sin etiqueta de cierre
+VOID_ELEMENTS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr'
+}
+
+
+def _has_class(attrs: Dict[str, str], name: str) -> bool:
+    return name in (attrs.get('class') or '').split()
+
+
+def _class_contains(attrs: Dict[str, str], text: str) -> bool:
+    return text in (attrs.get('class') or '')
+
+
+# Mismos selectores (y en el mismo orden de prioridad) que el crawler con BeautifulSoup
+SIDEBAR_SELECTORS = [
+    ('aside', lambda tag, a: tag == 'aside'),
+    ('div.wiki-sidebar', lambda tag, a: tag == 'div' and _has_class(a, 'wiki-sidebar')),
+    ('div.wiki-sidebar-custom-content', lambda tag, a: tag == 'div' and _has_class(a, 'wiki-sidebar-custom-content')),
+    ('nav.wiki-sidebar', lambda tag, a: tag == 'nav' and _has_class(a, 'wiki-sidebar')),
+    ('div[class*="sidebar"]', lambda tag, a: tag == 'div' and _class_contains(a, 'sidebar')),
+    ('ul.wiki-pages-list', lambda tag, a: tag == 'ul' and _has_class(a, 'wiki-pages-list')),
+    ('div[data-testid="wiki-sidebar"]', lambda tag, a: tag == 'div' and a.get('data-testid') == 'wiki-sidebar'),
+    ('nav[aria-label*="Wiki"]', lambda tag, a: tag == 'nav' and 'Wiki' in (a.get('aria-label') or '')),
+]
+
+CONTENT_SELECTORS = [
+    ('div.wiki-page-details', lambda tag, a: tag == 'div' and _has_class(a, 'wiki-page-details')),
+    ('article', lambda tag, a: tag == 'article'),
+    ('main', lambda tag, a: tag == 'main'),
+    ('div.content', lambda tag, a: tag == 'div' and _has_class(a, 'content')),
+    ('div[class*="wiki-page"]', lambda tag, a: tag == 'div' and _class_contains(a, 'wiki-page')),
+    ('body', lambda tag, a: tag == 'body'),
+]
+
+# Etiquetas que pueden abrir alguna región (evita evaluar selectores en el resto)
+REGION_TAGS = {'aside', 'div', 'nav', 'ul', 'article', 'main', 'body'}
+
+
+class WikiLinkScanner(HTMLParser):
+    """
+    Parser en streaming que recoge los enlaces de cada región candidata.
+
+    Tras `feed()` + `close()`:
+        - `custom_sidebar`: contenido (ya des-escapado) de data-custom-sidebar-content, o None
+        - `regions[selector]`: atributos de los `<a href>` del primer elemento que
+          cumple cada selector, en orden de documento
+        - `document_links`: atributos de todos los `<a href>` del documento
+
+    Args:
+        link_attr: Atributo que deben tener los `<a>` para recogerse
+            ('href' en la página, 'data-wiki-page' en el sidebar personalizado)
+    """
+
+    def __init__(self, link_attr: str = 'href'):
+        super().__init__(convert_charrefs=True)
+        self.link_attr = link_attr
+        self.custom_sidebar: Optional[str] = None
+        self.regions: Dict[str, List[Dict[str, str]]] = {}
+        self.document_links: List[Dict[str, str]] = []
+        self._stack: List[str] = []
+        # Regiones abiertas: (selector, profundidad de la pila al abrir)
+        self._open: List[Tuple[str, int]] = []
+        self._selectors = SIDEBAR_SELECTORS + CONTENT_SELECTORS
+
+    def handle_starttag(self, tag, attrs):
+        if attrs:
+            attrs = {name: (value if value is not None else '') for name, value in attrs}
+
+            if self.custom_sidebar is None and 'data-custom-sidebar-content' in attrs:
+                self.custom_sidebar = attrs['data-custom-sidebar-content']
+
+            if tag == 'a' and self.link_attr in attrs:
+                self.document_links.append(attrs)
+                for selector, _ in self._open:
+                    self.regions[selector].append(attrs)
+        else:
+            attrs = {}
+
+        if tag in VOID_ELEMENTS:
+            return
+
+        self._stack.append(tag)
+        if tag in REGION_TAGS:
+            for selector, matches in self._selectors:
+                if selector not in self.regions and matches(tag, attrs):
+                    self.regions[selector] = []
+                    self._open.append((selector, len(self._stack)))
+
+    def handle_startendtag(self, tag, attrs):
+        # <div/>: BeautifulSoup crea el elemento vacío, así que también abre (y cierra) región
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        # Igual que el tree builder de BeautifulSoup: cerrar hasta la última
+        # etiqueta abierta con ese nombre; ignorar cierres sin apertura
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i] == tag:
+                del self._stack[i:]
+                if self._open:
+                    self._open = [(s, depth) for s, depth in self._open if depth <= len(self._stack)]
+                return
+
+    def first_region(self, selectors) -> Optional[List[Dict[str, str]]]:
+        """Devuelve los enlaces de la región del primer selector (por prioridad) encontrado."""
+        for selector, _ in selectors:
+            if selector in self.regions:
+                return self.regions[selector]
+        return None
+
+
+def scan_link_areas(html_content: str) -> List[Tuple[str, Dict[str, str]]]:
+    """
+    Devuelve los enlaces candidatos de una página en orden de descubrimiento.
+
+    Orden: enlaces `data-wiki-page` del sidebar personalizado, luego `<a href>` del
+    sidebar HTML y por último los del contenido principal (o el body, o todo el
+    documento si no hay contenedor reconocible).
+
+    Args:
+        html_content: HTML de la página
+
+    Returns:
+        Lista de tuplas (área, atributos del enlace) con área en
+        'custom-sidebar', 'sidebar' o 'content'
+    """
+    scanner = WikiLinkScanner()
+    scanner.feed(html_content)
+    scanner.close()
+
+    areas: List[Tuple[str, Dict[str, str]]] = []
+
+    if scanner.custom_sidebar:
+        # El valor del atributo está escapado dentro del propio HTML del sidebar
+        sidebar_scanner = WikiLinkScanner(link_attr='data-wiki-page')
+        sidebar_scanner.feed(html.unescape(scanner.custom_sidebar))
+        sidebar_scanner.close()
+        areas.extend(('custom-sidebar', attrs) for attrs in sidebar_scanner.document_links)
+
+    sidebar = scanner.first_region(SIDEBAR_SELECTORS)
+    if sidebar is not None:
+        areas.extend(('sidebar', attrs) for attrs in sidebar)
+
+    content = scanner.first_region(CONTENT_SELECTORS)
+    if content is None:
+        content = scanner.document_links
+    areas.extend(('content', attrs) for attrs in content)
+
+    return areas
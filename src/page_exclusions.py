@@ -0,0 +1,94 @@
+"""
+Lista de páginas excluidas (pags_descarte.txt) compilada para consultas rápidas.
+
+Cada línea no vacía del archivo es un patrón. Por defecto es un nombre exacto
+de página (aunque contenga "*", "?", "[" o empiece por "#"); los globs y las
+regex se activan con un prefijo:
+
+    FAQs                    nombre exacto de página
+    glob:datanex/*          glob (*, ?, [...]); * también cruza "/" (todo el subárbol)
+    re:^Tutorial-.*-old$    expresión regular, debe cubrir el nombre entero
+
+Los nombres exactos se buscan en un conjunto y los globs se combinan en una
+única expresión regular, de modo que comprobar una página no recorre la lista
+de patrones. Cada regex se compila por separado (sus flags en línea como (?i)
+y sus referencias a grupos solo afectan a su propia línea).
+
+Un patrón no válido es un error (ValueError con el número de línea) en todos
+los pasos que usan la lista, nunca se ignora en silencio.
+
+La usan el crawler (download_wiki_pages no descarga las páginas excluidas),
+filter_useful_pages y unify_markdowns, así que las tres aplican exactamente las
+mismas reglas.
+"""
+
+import fnmatch
+import re
+from typing import Iterable, List, Optional
+
+REGEX_PREFIX = "re:"
+GLOB_PREFIX = "glob:"
+
+
+class ExclusionMatcher:
+    """
+    Conjunto compilado de patrones de exclusión (nombres exactos, globs y regex).
+
+    Args:
+        patterns: Patrones, con la misma sintaxis que las líneas de pags_descarte.txt
+
+    Raises:
+        ValueError: Si una regex no es válida (indica la línea y el patrón)
+    """
+
+    def __init__(self, patterns: Iterable[str] = ()):
+        self.patterns: List[str] = []
+        self.exact = set()
+        self.regexes: List[re.Pattern] = []
+        globs = []
+        for line_number, pattern in enumerate(patterns, 1):
+            pattern = pattern.strip()
+            if not pattern:
+                continue
+            self.patterns.append(pattern)
+            if pattern.startswith(REGEX_PREFIX):
+                try:
+                    self.regexes.append(re.compile(pattern[len(REGEX_PREFIX):]))
+                except re.error as e:
+                    raise ValueError(f"Regex no válida en la línea {line_number} ({pattern!r}): {e}") from e
+            elif pattern.startswith(GLOB_PREFIX):
+                globs.append(fnmatch.translate(pattern[len(GLOB_PREFIX):]))
+            else:
+                self.exact.add(pattern)
+        self._glob_regex: Optional[re.Pattern] = re.compile("|".join(globs)) if globs else None
+
+    @classmethod
+    def from_file(cls, path: str) -> "ExclusionMatcher":
+        """
+        Lee los patrones de un archivo (uno por línea).
+
+        Raises:
+            FileNotFoundError: Si el archivo no existe
+            ValueError: Si un patrón no es válido (el mensaje incluye la ruta y la línea)
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            try:
+                return cls(f)
+            except ValueError as e:
+                raise ValueError(f"{path}: {e}") from e
+
+    def matches(self, page_name: str) -> bool:
+        """True si la página está excluida."""
+        if page_name in self.exact:
+            return True
+        if self._glob_regex is not None and self._glob_regex.fullmatch(page_name) is not None:
+            return True
+        return any(regex.fullmatch(page_name) is not None for regex in self.regexes)
+
+    __contains__ = matches
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
@@ -0,0 +1,240 @@
+"""
+Ejecución incremental del pipeline basada en hashes de contenido.
+
+Cada paso se declara con sus entradas y salidas (archivos, directorios o
+patrones glob) y sus parámetros. Antes de ejecutar un paso se calcula una huella
+de sus entradas, parámetros y código; si coincide con la de la última ejecución
+registrada en el archivo de estado y las salidas siguen intactas, el paso se
+omite. Como en make, pero comparando contenido en lugar de fechas: si un paso se
+vuelve a ejecutar y produce exactamente las mismas salidas, los pasos siguientes
+también se omiten.
+"""
+
+import ast
+import glob
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+
+@dataclass
+class Stage:
+    """
+    Paso del pipeline.
+
+    Attributes:
+        name: Nombre único del paso (clave en el archivo de estado)
+        func: Función que ejecuta el paso
+        kwargs: Parámetros con los que se llama a func (forman parte de la huella)
+        inputs: Archivos, directorios o patrones glob que lee el paso
+        outputs: Archivos, directorios o patrones glob que escribe el paso
+        ignore_kwargs: Parámetros que solo afectan a la ejecución y no a las salidas
+            (p. ej. workers); no forman parte de la huella
+    """
+    name: str
+    func: Callable
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    ignore_kwargs: List[str] = field(default_factory=list)
+
+
+def _hash_file(path: str, digest) -> None:
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+
+
+def _expand(pattern: str) -> List[str]:
+    """Expande un patrón a la lista ordenada de archivos que cubre."""
+    if os.path.isdir(pattern):
+        return sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(pattern)
+            for name in names
+        )
+    return sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+
+
+def fingerprint_paths(patterns: List[str]) -> str:
+    """
+    Calcula una huella SHA256 del contenido de todos los archivos cubiertos por los patrones.
+
+    Incluye las rutas relativas, de modo que añadir, borrar o renombrar un archivo
+    también cambia la huella. Un patrón sin archivos cuenta como "ausente".
+
+    Args:
+        patterns: Archivos, directorios o patrones glob
+
+    Returns:
+        Hash hexadecimal
+    """
+    digest = hashlib.sha256()
+    for pattern in patterns:
+        digest.update(f"pattern:{pattern}\n".encode('utf-8'))
+        files = _expand(pattern)
+        if not files:
+            digest.update(b"<missing>\n")
+        for path in files:
+            digest.update(f"file:{os.path.relpath(path, pattern) if os.path.isdir(pattern) else path}\n".encode('utf-8'))
+            _hash_file(path, digest)
+    return digest.hexdigest()
+
+
+def _imported_modules(module_name: str, source_file: str) -> Set[str]:
+    """
+    Módulos del mismo paquete de primer nivel que importa un archivo fuente
+    (también los imports dentro de funciones y los relativos).
+    """
+    package = module_name.split('.')[0]
+    try:
+        with open(source_file, 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read(), filename=source_file)
+    except (OSError, SyntaxError, ValueError):
+        return set()
+    candidates = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            candidates.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = '.' * node.level + (node.module or '')
+            try:
+                base = importlib.util.resolve_name(base, module_name.rpartition('.')[0] or module_name)
+            except (ImportError, ValueError):
+                continue
+            candidates.add(base)
+            # from paquete import modulo
+            candidates.update(f"{base}.{alias.name}" for alias in node.names)
+    return {name for name in candidates if name.split('.')[0] == package}
+
+
+def _module_source(module_name: str) -> Optional[str]:
+    """Archivo .py de un módulo (None si no existe o no es un módulo)."""
+    try:
+        spec = importlib.util.find_spec(module_name)
+    except (ImportError, AttributeError, ValueError):
+        return None
+    if spec is None or not spec.origin or not spec.origin.endswith('.py'):
+        return None
+    return spec.origin
+
+
+def _code_fingerprint(func: Callable) -> str:
+    """
+    Hash del código del paso: el archivo fuente de la función y, recursivamente,
+    los módulos de su mismo paquete que importa (p. ej. context_budget para
+    create_final_output). Cambiar cualquiera de ellos invalida el paso.
+    """
+    digest = hashlib.sha256(getattr(func, '__qualname__', repr(func)).encode('utf-8'))
+    try:
+        source_file = inspect.getsourcefile(func)
+    except TypeError:
+        source_file = None
+    if not source_file:
+        return digest.hexdigest()
+    module_name = getattr(func, '__module__', None) or '__main__'
+    sources = {source_file}
+    pending = [(module_name, source_file)]
+    while pending:
+        name, path = pending.pop()
+        for imported in _imported_modules(name, path):
+            imported_source = _module_source(imported)
+            if imported_source and imported_source not in sources:
+                sources.add(imported_source)
+                pending.append((imported, imported_source))
+    for path in sorted(sources):
+        try:
+            _hash_file(path, digest)
+        except OSError:
+            pass
+    return digest.hexdigest()
+
+
+class PipelineRunner:
+    """
+    Ejecuta pasos del pipeline omitiendo los que no tienen cambios.
+
+    Args:
+        state_file: Archivo JSON donde se guardan las huellas de cada paso
+        force: Si True, ejecuta todos los pasos aunque no haya cambios
+    """
+
+    def __init__(self, state_file: str = "data/pipeline_state.json", force: bool = False):
+        self.state_file = Path(state_file)
+        self.force = force
+        self.state: Dict[str, Dict] = {}
+        if self.state_file.exists():
+            try:
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    self.state = json.load(f)
+            except Exception as e:
+                print(f"[WARN] No se pudo leer el estado del pipeline {self.state_file}: {e}")
+
+    def _save_state(self) -> None:
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.state_file.with_name(self.state_file.name + '.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, self.state_file)
+
+    def input_fingerprint(self, stage: Stage) -> str:
+        """Huella de entradas + parámetros + código del paso."""
+        digest = hashlib.sha256()
+        digest.update(fingerprint_paths(stage.inputs).encode('utf-8'))
+        kwargs = {k: v for k, v in stage.kwargs.items() if k not in stage.ignore_kwargs}
+        digest.update(json.dumps(kwargs, sort_keys=True, default=str).encode('utf-8'))
+        digest.update(_code_fingerprint(stage.func).encode('utf-8'))
+        return digest.hexdigest()
+
+    def is_up_to_date(self, stage: Stage, inputs: Optional[str] = None) -> bool:
+        """True si las entradas no cambiaron y las salidas siguen como se dejaron."""
+        previous = self.state.get(stage.name)
+        if self.force or not previous:
+            return False
+        if previous.get('inputs') != (inputs or self.input_fingerprint(stage)):
+            return False
+        return previous.get('outputs') == fingerprint_paths(stage.outputs)
+
+    def run_stage(self, stage: Stage) -> Optional[Any]:
+        """
+        Ejecuta un paso si sus entradas cambiaron.
+
+        Un resultado vacío (None, "", {}) se considera fallo del paso y no se
+        registra, de modo que se vuelve a intentar en la siguiente ejecución.
+
+        Returns:
+            El valor devuelto por la función, o None si el paso se omitió
+        """
+        inputs = self.input_fingerprint(stage)
+        if self.is_up_to_date(stage, inputs):
+            print(f"[SKIP] {stage.name}: entradas sin cambios, se reutilizan las salidas")
+            return None
+
+        result = stage.func(**stage.kwargs)
+        if not result:
+            self.state.pop(stage.name, None)
+            self._save_state()
+            return result
+
+        self.state[stage.name] = {
+            'inputs': inputs,
+            'outputs': fingerprint_paths(stage.outputs),
+            'timestamp': datetime.now().isoformat()
+        }
+        self._save_state()
+        return result
+
+    def run(self, stages: List[Stage]) -> Dict[str, Any]:
+        """
+        Ejecuta los pasos en orden.
+
+        Returns:
+            Diccionario nombre del paso -> valor devuelto (None si se omitió)
+        """
+        return {stage.name: self.run_stage(stage) for stage in stages}
@@ -5,11 +5,34 @@ Módulo para unificar diccionarios CSV en un markdown.
 import os
 import csv
 import glob
+import heapq
+import io
+import contextlib
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
 from pathlib import Path
-from collections import defaultdict
 import re
 
 
+# Palabras a eliminar de las descripciones de lab (conjunciones y determinantes)
+LAB_WORDS_TO_REMOVE = frozenset({
+    'el', 'la', 'los', 'las', 'un', 'una', 'unos', 'unas',
+    'y', 'o', 'e', 'ni', 'pero', 'mas', 'sino', 'que', 'de', 'del', 'al',
+    'a', 'en', 'por', 'para', 'con', 'sin', 'sobre', 'bajo', 'entre'
+})
+
+# Signos de puntuación que se eliminan al inicio/final de cada palabra
+LAB_PUNCTUATION = ',.;:()[]{}'
+
+# Separador de filas al limpiar una columna entera (no puede aparecer en las descripciones)
+_ROW_SEPARATOR = '\x00'
+
+# Filas que se limpian de una vez al leer un diccionario de lab
+CLEAN_BATCH_ROWS = 10000
+
+
 def _clean_lab_description(text):
     """
     Limpia la descripción del diccionario de lab eliminando:
@@ -23,13 +46,6 @@ def _clean_lab_description(text):
     Returns:
         Texto limpio
     """
-    # Lista de palabras a eliminar (conjunciones y determinantes)
-    words_to_remove = {
-        'el', 'la', 'los', 'las', 'un', 'una', 'unos', 'unas',
-        'y', 'o', 'e', 'ni', 'pero', 'mas', 'sino', 'que', 'de', 'del', 'al',
-        'a', 'en', 'por', 'para', 'con', 'sin', 'sobre', 'bajo', 'entre'
-    }
-    
     # Dividir en palabras
     words = text.split()
     
@@ -37,18 +53,72 @@ def _clean_lab_description(text):
     cleaned_words = []
     for word in words:
         # Eliminar comas y otros signos de puntuación al inicio/final
-        word_clean = word.strip(',.;:()[]{}')
+        word_clean = word.strip(LAB_PUNCTUATION)
         # Convertir a minúsculas para comparar
         word_lower = word_clean.lower()
         
         # Si no es una palabra a eliminar y no está vacía, agregarla
-        if word_lower not in words_to_remove and word_clean:
+        if word_lower not in LAB_WORDS_TO_REMOVE and word_clean:
             cleaned_words.append(word_clean)
     
     # Unir palabras con espacios
     return ' '.join(cleaned_words)
 
 
+def _clean_lab_descriptions(texts, use_pandas=False):
+    """
+    Limpia una columna entera de descripciones de lab.
+    
+    Equivale a aplicar _clean_lab_description a cada texto (salida idéntica), pero
+    sin bucles Python por palabra: la columna se une en un único texto, se divide
+    en palabras de una vez y la limpieza se decide una sola vez por palabra
+    distinta (el vocabulario de un diccionario de lab se repite mucho).
+    
+    Args:
+        texts: Lista de descripciones
+        use_pandas: Usar las operaciones de texto de pandas (requiere pandas)
+    
+    Returns:
+        Lista de descripciones limpias, en el mismo orden
+    """
+    if use_pandas:
+        return _clean_lab_descriptions_pandas(texts)
+    if not texts:
+        return []
+    
+    joined = f" {_ROW_SEPARATOR} ".join(texts)
+    if joined.count(_ROW_SEPARATOR) != len(texts) - 1:
+        # El separador aparece dentro de alguna descripción
+        return [_clean_lab_description(text) for text in texts]
+    words = joined.split()
+    
+    # Solo se guardan las palabras que cambian ('' = se elimina); el resto se deja igual
+    replacements = {}
+    for word in set(words):
+        word_clean = word.strip(LAB_PUNCTUATION)
+        if word_clean.lower() in LAB_WORDS_TO_REMOVE or not word_clean:
+            replacements[word] = ''
+        elif word_clean != word:
+            replacements[word] = word_clean
+    
+    cleaned = ' '.join(filter(None, map(replacements.get, words, words)))
+    # Quitar los espacios alrededor de los separadores (también entre filas vacías)
+    cleaned = cleaned.replace(f" {_ROW_SEPARATOR}", _ROW_SEPARATOR).replace(f"{_ROW_SEPARATOR} ", _ROW_SEPARATOR)
+    return cleaned.split(_ROW_SEPARATOR)
+
+
+def _clean_lab_descriptions_pandas(texts):
+    """Versión de _clean_lab_descriptions con las operaciones de texto de pandas."""
+    import pandas as pd
+    
+    # dtype object: las operaciones .str usan los métodos de str de Python (misma salida)
+    words = pd.Series(texts, dtype=object).str.split().explode()
+    words = words.str.strip(LAB_PUNCTUATION)
+    keep = words.notna() & words.ne('') & ~words.str.lower().isin(LAB_WORDS_TO_REMOVE)
+    cleaned = words[keep].groupby(level=0, sort=False).agg(' '.join)
+    return cleaned.reindex(range(len(texts)), fill_value='').tolist()
+
+
 def _find_common_prefix(texts):
     """
     Encuentra el prefijo común más largo entre una lista de textos.
@@ -65,10 +135,13 @@ def _find_common_prefix(texts):
     # Encontrar el prefijo común
     common = texts[0]
     for text in texts[1:]:
+        # Caso habitual en grupos: el texto empieza exactamente por el prefijo actual
+        if text.startswith(common):
+            continue
         # Encontrar hasta dónde coinciden
         min_len = min(len(common), len(text))
         i = 0
-        while i < min_len and common[i].lower() == text[i].lower():
+        while i < min_len and (common[i] == text[i] or common[i].lower() == text[i].lower()):
             i += 1
         common = common[:i]
         if not common:
@@ -83,6 +156,158 @@ def _find_common_prefix(texts):
     return common.strip()
 
 
+# Mínimo de entradas para agrupar bajo un prefijo común y longitud mínima del prefijo
+MIN_GROUP_SIZE = 3
+MIN_PREFIX_LEN = 3
+# Máximo de entradas por grupo: evita líneas gigantes (p. ej. todos los códigos "LAB...")
+# y acota la memoria de la compactación en streaming
+MAX_GROUP_SIZE = 50
+
+
+def _format_single(ref, descr):
+    """Formatea una entrada individual: ref:descr."""
+    # La limpieza de lab ya se aplicó antes, solo limpiar caracteres problemáticos
+    descr_clean = descr.replace('|', ' ').replace('\n', ' ').replace('\r', ' ').replace(':', ';').strip()
+    if len(descr_clean) > 100:
+        descr_clean = descr_clean[:97] + "..."
+    return f"{ref}:{descr_clean}"
+
+
+def _format_group(prefix, group):
+    """
+    Formatea un grupo de entradas que comparten prefijo de código.
+    
+    Args:
+        prefix: Prefijo común de los códigos
+        group: Lista de tuplas (sufijo del código, descr)
+    
+    Returns:
+        Línea prefix:common_text|suffix1:diff1|suffix2:diff2|... (o prefix|... sin texto común)
+    """
+    # Encontrar texto común en las descripciones
+    descriptions = [descr for _, descr in group]
+    common_text = _find_common_prefix(descriptions)
+    
+    # Limpiar y procesar descripciones
+    group_entries = []
+    for suffix, descr in group:
+        # Extraer solo la parte diferente
+        if common_text and descr.lower().startswith(common_text.lower()):
+            diff_text = descr[len(common_text):].strip()
+            # Si la diferencia empieza con " con", " de", etc., mantenerlo
+            if diff_text and not diff_text.startswith((' con', ' de', ' y', ' o', ' a', ' en')):
+                diff_text = ' ' + diff_text
+        else:
+            diff_text = descr
+        
+        # Limpiar caracteres problemáticos
+        diff_text = diff_text.replace('|', ' ').replace('\n', ' ').replace('\r', ' ').replace(':', ';').strip()
+        # Nota: La limpieza de lab (conjunciones, determinantes, comas) ya se aplicó antes
+        if len(diff_text) > 80:
+            diff_text = diff_text[:77] + "..."
+        
+        group_entries.append(f"{suffix}:{diff_text}")
+    
+    # Crear entrada compactada: prefix:common_text|suffix1:diff1|suffix2:diff2|...
+    if common_text:
+        return f"{prefix}:{common_text}|{'|'.join(group_entries)}"
+    # Si no hay texto común, usar formato sin texto común
+    return f"{prefix}|{'|'.join(group_entries)}"
+
+
+class _TrieNode:
+    """Nodo abierto del trie durante la compactación: profundidad y entradas aún sin agrupar."""
+    __slots__ = ('depth', 'rows', 'overflow')
+    
+    def __init__(self, depth, rows=None):
+        self.depth = depth
+        self.rows = rows if rows is not None else []
+        # True si el subárbol ya superó MAX_GROUP_SIZE entradas: ni él ni sus ancestros agrupan
+        self.overflow = False
+
+
+def _compact_sorted(rows):
+    """
+    Compacta filas ordenadas por ref en una sola pasada, con memoria acotada.
+    
+    Recorre el trie de códigos implícito en el orden de las filas manteniendo solo
+    la rama abierta (una pila de nodos, uno por punto de bifurcación). Al cerrarse
+    un nodo con prefijo de al menos MIN_PREFIX_LEN caracteres, las entradas de su
+    subárbol que no se agruparon más abajo forman un grupo si son entre
+    MIN_GROUP_SIZE y MAX_GROUP_SIZE y la línea agrupada es más corta que las
+    entradas individuales; si no, suben al nodo padre. Así cada subárbol elige su
+    propio punto de agrupación. Las entradas que ya no pueden agruparse (más de
+    MAX_GROUP_SIZE en el subárbol, o prefijo demasiado corto) se emiten en el acto.
+    
+    Args:
+        rows: Iterable de tuplas (ref, descr, posición original), ordenado por ref
+    
+    Yields:
+        Tuplas (posición de la primera entrada, entrada), donde la entrada es una
+        tupla (ref, descr) individual o una línea agrupada
+    """
+    ready = []
+    
+    def emit_singles(node_rows):
+        for ref, descr, index in node_rows:
+            ready.append((index, (ref, descr)))
+    
+    def close(node, parent):
+        """Cierra un nodo: agrupa sus entradas o las pasa al padre."""
+        node_rows = node.rows
+        if not node.overflow and node.depth >= MIN_PREFIX_LEN and MIN_GROUP_SIZE <= len(node_rows) <= MAX_GROUP_SIZE:
+            members = sorted(node_rows, key=itemgetter(2))
+            prefix = members[0][0][:node.depth]
+            group_line = _format_group(prefix, [(ref[node.depth:], descr) for ref, descr, _ in members])
+            singles_size = sum(len(_format_single(ref, descr)) + 1 for ref, descr, _ in members)
+            if len(group_line) + 1 < singles_size:
+                ready.append((members[0][2], group_line))
+                return
+        
+        overflow = node.overflow or len(node_rows) > MAX_GROUP_SIZE
+        if overflow or parent.overflow or parent.depth < MIN_PREFIX_LEN:
+            emit_singles(node_rows)
+            parent.overflow = parent.overflow or overflow
+            return
+        
+        parent.rows.extend(node_rows)
+        if len(parent.rows) > MAX_GROUP_SIZE:
+            emit_singles(parent.rows)
+            parent.rows = []
+            parent.overflow = True
+    
+    stack = [_TrieNode(0)]
+    previous_ref = None
+    for row in rows:
+        ref = row[0]
+        lcp = len(os.path.commonprefix([previous_ref, ref])) if previous_ref is not None else 0
+        
+        # Cerrar los nodos de la rama anterior más profundos que el prefijo común
+        while stack[-1].depth > lcp:
+            node = stack.pop()
+            if stack[-1].depth < lcp:
+                # Nuevo punto de bifurcación entre el padre y el nodo cerrado
+                stack.append(_TrieNode(lcp))
+            close(node, stack[-1])
+        
+        if stack[-1].depth == len(ref):
+            # Código repetido (o nodo que ya termina en este código)
+            stack[-1].rows.append(row)
+        else:
+            stack.append(_TrieNode(len(ref), [row]))
+        previous_ref = ref
+        
+        if ready:
+            yield from ready
+            ready.clear()
+    
+    while len(stack) > 1:
+        node = stack.pop()
+        close(node, stack[-1])
+    emit_singles(stack[0].rows)
+    yield from ready
+
+
 def _compact_tree_structure(tuples):
     """
     Compacta tuplas eliminando prefijos comunes del sistema de árbol.
@@ -93,97 +318,315 @@ def _compact_tree_structure(tuples):
     - 6000030: Aborto espontaneo con complicacion neom completo
     -> 60000:Aborto espontaneo|29:con alteracion metabolica incompleto|30:con complicacion neom completo
     
+    Los códigos se ordenan y se recorren como un trie con _compact_sorted, de modo
+    que cada subárbol elige su propio prefijo de agrupación.
+    
     Args:
         tuples: Lista de tuplas (ref, descr)
     
     Returns:
-        Lista de entradas compactadas (pueden ser tuplas individuales o strings agrupados)
+        Lista de entradas compactadas (pueden ser tuplas individuales o strings agrupados),
+        en el orden de aparición de su primera entrada
     """
     if not tuples:
         return []
     
-    # Analizar prefijos comunes
-    # Agrupar por diferentes longitudes de prefijo (de más largo a más corto)
-    max_ref_len = max(len(str(ref)) for ref, _ in tuples)
+    # sorted es estable: los códigos repetidos conservan su orden original
+    rows = sorted(((str(ref), descr, i) for i, (ref, descr) in enumerate(tuples)), key=itemgetter(0))
+    compacted = sorted(_compact_sorted(rows), key=itemgetter(0))
+    return [entry for _, entry in compacted]
+
+
+def _entry_line(entry):
+    """Línea de salida de una entrada compactada (tupla individual o grupo ya formateado)."""
+    if isinstance(entry, tuple):
+        # Entrada individual: ref:descr
+        return _format_single(*entry)
+    # Entrada agrupada: prefix|suffix1:descr1|suffix2:descr2|...
+    return entry
+
+
+def _dictionary_reader(f, file_name):
+    """
+    Crea el lector de un CSV de diccionario y localiza sus columnas *_ref y *_descr.
+    
+    Returns:
+        Tupla (reader, ref_col, descr_col); las columnas son None si no se encontraron
+    """
+    # Detectar delimitador
+    sample = f.read(1024)
+    f.seek(0)
+    sniffer = csv.Sniffer()
+    delimiter = sniffer.sniff(sample).delimiter
     
-    # Probar diferentes longitudes de prefijo, empezando por prefijos más largos
-    for prefix_len in range(max_ref_len - 1, 2, -1):  # Desde prefijos largos a cortos
-        prefix_groups = defaultdict(list)
-        
-        for ref, descr in tuples:
-            ref_str = str(ref)
-            if len(ref_str) >= prefix_len:
-                prefix = ref_str[:prefix_len]
-                suffix = ref_str[prefix_len:]
-                prefix_groups[prefix].append((suffix, descr))
+    reader = csv.DictReader(f, delimiter=delimiter)
+    
+    # Encontrar columnas ref y descr
+    ref_col = None
+    descr_col = None
+    
+    for col in reader.fieldnames:
+        if col.endswith('_ref'):
+            ref_col = col
+        elif col.endswith('_descr'):
+            descr_col = col
+    
+    return reader, ref_col, descr_col
+
+
+def _dictionary_name(file_name):
+    """Título del diccionario a partir del nombre del CSV: dic_lab.csv -> Lab."""
+    return file_name.replace('.csv', '').replace('dic_', '').replace('_', ' ').title()
+
+
+def _iter_dictionary_rows(reader, ref_col, descr_col, is_lab_dict):
+    """Genera las tuplas (ref, descr) válidas del CSV, fila a fila."""
+    batch = []
+    for row in reader:
+        ref_value = row.get(ref_col, '').strip()
+        descr_value = row.get(descr_col, '').strip()
         
-        # Si encontramos grupos con al menos 3 entradas, compactar
-        compacted = []
-        used_refs = set()
+        if ref_value and descr_value:
+            if not is_lab_dict:
+                yield (ref_value, descr_value)
+                continue
+            # dic_lab: las descripciones se limpian por lotes (conjunciones, determinantes y comas)
+            batch.append((ref_value, descr_value))
+            if len(batch) >= CLEAN_BATCH_ROWS:
+                yield from _clean_lab_batch(batch)
+                batch = []
+    if batch:
+        yield from _clean_lab_batch(batch)
+
+
+def _clean_lab_batch(rows):
+    """Limpia las descripciones de un lote de tuplas (ref, descr) de dic_lab."""
+    refs = [ref for ref, _ in rows]
+    return zip(refs, _clean_lab_descriptions([descr for _, descr in rows]))
+
+
+def _spill_run(rows, tmp_dir):
+    """Escribe un tramo ordenado de filas en un archivo temporal y devuelve su ruta."""
+    fd, path = tempfile.mkstemp(suffix='.csv', dir=tmp_dir)
+    with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+        csv.writer(f).writerows(rows)
+    return path
+
+
+def _read_run(path):
+    """Lee un tramo escrito por _spill_run."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for ref, descr, index in csv.reader(f):
+            yield (ref, descr, int(index))
+
+
+def _external_sort(rows, chunk_rows, tmp_dir):
+    """
+    Ordena las filas por ref con memoria acotada (ordenación externa).
+    
+    Ordena tramos de chunk_rows filas (ref, descr, posición) en memoria, los vuelca
+    a archivos temporales y los mezcla con heapq.merge. La ordenación es estable:
+    filas con el mismo ref conservan su orden original.
+    """
+    runs = []
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_rows:
+            chunk.sort(key=itemgetter(0))
+            runs.append(_spill_run(chunk, tmp_dir))
+            chunk = []
+    chunk.sort(key=itemgetter(0))
+    # El último tramo se queda en memoria y va al final para mantener la estabilidad
+    yield from heapq.merge(*[_read_run(path) for path in runs], chunk, key=itemgetter(0))
+
+
+def _dictionary_content(csv_file):
+    """
+    Procesa un CSV de diccionario en memoria.
+    
+    Returns:
+        Lista de líneas del diccionario (título, entradas y línea en blanco final),
+        o lista vacía si el CSV no tiene las columnas esperadas
+    """
+    content = []
+    file_name = os.path.basename(csv_file)
+    print(f"\nProcesando {file_name}...")
+    
+    try:
+        with open(csv_file, 'r', encoding='utf-8') as f:
+            reader, ref_col, descr_col = _dictionary_reader(f, file_name)
+            
+            if not ref_col or not descr_col:
+                print(f"  [WARN] No se encontraron columnas *_ref y *_descr en {file_name}")
+                return content
+            
+            print(f"  [OK] Columnas encontradas: {ref_col} -> {descr_col}")
+            
+            # Agregar título del diccionario (formato compacto)
+            dict_name = _dictionary_name(file_name)
+            content.append(f"## {dict_name}\n")
+            
+            # Leer y procesar filas
+            is_lab_dict = 'lab' in file_name.lower()
+            tuples = list(_iter_dictionary_rows(reader, ref_col, descr_col, is_lab_dict))
+            
+            # Compactar eliminando prefijos comunes (sistema de árbol)
+            # Agrupar por prefijos comunes para reducir redundancia
+            compacted_tuples = _compact_tree_structure(tuples)
+            
+            # Agregar tuplas al contenido en formato compacto
+            for entry in compacted_tuples:
+                content.append(_entry_line(entry))
+            
+            content.append("")  # Línea en blanco entre diccionarios
+            
+            print(f"  [OK] {len(tuples)} tuplas procesadas")
+    
+    except Exception as e:
+        print(f"  [FAIL] Error procesando {file_name}: {e}")
+    
+    return content
+
+
+def _dictionary_part_streaming(csv_file, part_file, chunk_rows):
+    """
+    Procesa un CSV de diccionario en streaming y escribe sus líneas en part_file.
+    
+    Las líneas van separadas por saltos de línea y sin salto final, como en el modo
+    en memoria, para poder concatenar las partes de varios diccionarios.
+    
+    Returns:
+        True si se escribió alguna línea
+    """
+    file_name = os.path.basename(csv_file)
+    print(f"\nProcesando {file_name}...")
+    lines_written = 0
+    
+    with open(part_file, 'w', encoding='utf-8') as out:
+        def write_line(line):
+            # Separador antes de cada línea salvo la primera
+            nonlocal lines_written
+            out.write(line if lines_written == 0 else '\n' + line)
+            lines_written += 1
         
-        for prefix, group in prefix_groups.items():
-            if len(group) >= 3:  # Solo compactar si hay al menos 3 entradas con el mismo prefijo
-                # Encontrar texto común en las descripciones
-                descriptions = [descr for _, descr in group]
-                common_text = _find_common_prefix(descriptions)
+        try:
+            with open(csv_file, 'r', encoding='utf-8') as f, \
+                    tempfile.TemporaryDirectory(prefix='dicc_sort_') as tmp_dir:
+                reader, ref_col, descr_col = _dictionary_reader(f, file_name)
+                
+                if not ref_col or not descr_col:
+                    print(f"  [WARN] No se encontraron columnas *_ref y *_descr en {file_name}")
+                    return False
+                
+                print(f"  [OK] Columnas encontradas: {ref_col} -> {descr_col}")
+                is_lab_dict = 'lab' in file_name.lower()
+                
+                # Primera pasada: ¿está el CSV ordenado por ref?
+                previous_ref = None
+                is_sorted = True
+                for ref, _ in _iter_dictionary_rows(reader, ref_col, descr_col, False):
+                    if previous_ref is not None and ref < previous_ref:
+                        is_sorted = False
+                        break
+                    previous_ref = ref
+                
+                f.seek(0)
+                reader, ref_col, descr_col = _dictionary_reader(f, file_name)
+                
+                # Filas con su posición original en el CSV (y contador para el resumen)
+                row_count = 0
+                def numbered_rows():
+                    nonlocal row_count
+                    for ref, descr in _iter_dictionary_rows(reader, ref_col, descr_col, is_lab_dict):
+                        yield (ref, descr, row_count)
+                        row_count += 1
                 
-                # Limpiar y procesar descripciones
-                group_entries = []
-                for suffix, descr in group:
-                    # Extraer solo la parte diferente
-                    if common_text and descr.lower().startswith(common_text.lower()):
-                        diff_text = descr[len(common_text):].strip()
-                        # Si la diferencia empieza con " con", " de", etc., mantenerlo
-                        if diff_text and not diff_text.startswith((' con', ' de', ' y', ' o', ' a', ' en')):
-                            diff_text = ' ' + diff_text
-                    else:
-                        diff_text = descr
-                    
-                    # Limpiar caracteres problemáticos
-                    diff_text = diff_text.replace('|', ' ').replace('\n', ' ').replace('\r', ' ').replace(':', ';').strip()
-                    # Nota: La limpieza de lab (conjunciones, determinantes, comas) ya se aplicó antes
-                    if len(diff_text) > 80:
-                        diff_text = diff_text[:77] + "..."
-                    
-                    group_entries.append(f"{suffix}:{diff_text}")
-                    used_refs.add(f"{prefix}{suffix}")
+                rows = numbered_rows()
+                if not is_sorted:
+                    print(f"  [INFO] CSV no ordenado por {ref_col}: ordenación externa en tramos de {chunk_rows} filas")
+                    rows = _external_sort(rows, chunk_rows, tmp_dir)
                 
-                # Crear entrada compactada: prefix:common_text|suffix1:diff1|suffix2:diff2|...
-                if common_text:
-                    compacted.append(f"{prefix}:{common_text}|{'|'.join(group_entries)}")
-                else:
-                    # Si no hay texto común, usar formato anterior
-                    compacted.append(f"{prefix}|{'|'.join(group_entries)}")
-            else:
-                # No compactar este grupo, agregar individualmente
-                for suffix, descr in group:
-                    full_ref = f"{prefix}{suffix}"
-                    if full_ref not in used_refs:
-                        compacted.append((full_ref, descr))
-                        used_refs.add(full_ref)
+                # Agregar título del diccionario (formato compacto)
+                dict_name = _dictionary_name(file_name)
+                write_line(f"## {dict_name}\n")
+                
+                for _, entry in _compact_sorted(rows):
+                    write_line(_entry_line(entry))
+                
+                write_line("")  # Línea en blanco entre diccionarios
+                
+                print(f"  [OK] {row_count} tuplas procesadas")
         
-        # Si compactamos algo, retornar el resultado
-        if any('|' in str(e) and not isinstance(e, tuple) for e in compacted):
-            # Agregar entradas que no fueron agrupadas
-            for ref, descr in tuples:
-                if str(ref) not in used_refs:
-                    compacted.append((str(ref), descr))
-            return compacted
+        except Exception as e:
+            print(f"  [FAIL] Error procesando {file_name}: {e}")
+    
+    return lines_written > 0
+
+
+def _run_captured(task):
+    """
+    Ejecuta una unidad de trabajo (función, argumentos) capturando lo que imprime.
     
-    # Si no se pudo compactar, retornar original
-    return tuples
+    Se usa tanto en secuencial como en el pool de procesos, para que los mensajes
+    se muestren siempre en el orden de los archivos.
+    
+    Returns:
+        Tupla (resultado, salida capturada)
+    """
+    func, args = task
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        result = func(*args)
+    return result, output.getvalue()
 
 
-def unify_dictionaries(dicc_dir: str, output_file: str) -> str:
+def _map_dictionaries(tasks, workers):
+    """Ejecuta las tareas (una por CSV) en orden y muestra su salida; devuelve los resultados."""
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            outcomes = list(executor.map(_run_captured, tasks))
+    else:
+        outcomes = [_run_captured(task) for task in tasks]
+    
+    results = []
+    for result, log_output in outcomes:
+        print(log_output, end='')
+        results.append(result)
+    return results
+
+
+def unify_dictionaries(
+    dicc_dir: str,
+    output_file: str,
+    streaming: bool = False,
+    chunk_rows: int = 200000,
+    workers: int = 1
+) -> str:
     """
     Convierte todos los CSV de diccionarios en la carpeta dicc a un markdown unificado.
     
     Para cada CSV, extrae las columnas que terminan en '_ref' y '_descr' y crea
     tuplas de estos valores.
     
+    Con streaming=True la memoria no crece con el tamaño de los diccionarios: las
+    filas se leen de una en una, se ordenan por ref (directamente si el CSV ya está
+    ordenado; si no, con ordenación externa en tramos de chunk_rows filas volcados
+    a disco), se compactan en una sola pasada manteniendo solo la rama abierta del
+    trie y cada línea se escribe al archivo en cuanto se genera. Las líneas son las
+    mismas que en el modo en memoria, pero en el orden en que se completan (por
+    código) en lugar del orden de aparición en el CSV.
+    
+    Con workers > 1 los diccionarios (independientes entre sí) se procesan en un
+    pool de procesos y se concatenan en el mismo orden de nombre de archivo, por lo
+    que el resultado y los mensajes son idénticos al modo secuencial.
+    
     Args:
         dicc_dir: Directorio que contiene los archivos CSV de diccionarios
         output_file: Ruta del archivo markdown de salida
+        streaming: Si True, procesa en streaming con memoria acotada
+        chunk_rows: Filas por tramo de la ordenación externa (solo con streaming=True)
+        workers: Número de procesos (un diccionario por proceso; 1 = secuencial)
     
     Returns:
         Ruta del archivo markdown creado, o None si hay error
@@ -203,82 +646,14 @@ def unify_dictionaries(dicc_dir: str, output_file: str) -> str:
     for csv_file in csv_files:
         print(f"  - {os.path.basename(csv_file)}")
     
-    unified_content = []
+    if streaming:
+        return _unify_dictionaries_streaming(sorted(csv_files), output_file, chunk_rows, workers)
     
     # Procesar cada archivo CSV
-    for csv_file in sorted(csv_files):
-        file_name = os.path.basename(csv_file)
-        print(f"\nProcesando {file_name}...")
-        
-        try:
-            with open(csv_file, 'r', encoding='utf-8') as f:
-                # Detectar delimitador
-                sample = f.read(1024)
-                f.seek(0)
-                sniffer = csv.Sniffer()
-                delimiter = sniffer.sniff(sample).delimiter
-                
-                reader = csv.DictReader(f, delimiter=delimiter)
-                
-                # Encontrar columnas ref y descr
-                ref_col = None
-                descr_col = None
-                
-                for col in reader.fieldnames:
-                    if col.endswith('_ref'):
-                        ref_col = col
-                    elif col.endswith('_descr'):
-                        descr_col = col
-                
-                if not ref_col or not descr_col:
-                    print(f"  [WARN] No se encontraron columnas *_ref y *_descr en {file_name}")
-                    continue
-                
-                print(f"  [OK] Columnas encontradas: {ref_col} -> {descr_col}")
-                
-                # Agregar título del diccionario (formato compacto)
-                dict_name = file_name.replace('.csv', '').replace('dic_', '').replace('_', ' ').title()
-                unified_content.append(f"## {dict_name}\n")
-                
-                # Leer y procesar filas
-                tuples = []
-                is_lab_dict = 'lab' in file_name.lower()
-                
-                for row in reader:
-                    ref_value = row.get(ref_col, '').strip()
-                    descr_value = row.get(descr_col, '').strip()
-                    
-                    if ref_value and descr_value:
-                        # Limpiar descripción para dic_lab: quitar conjunciones, determinantes y comas
-                        if is_lab_dict:
-                            descr_value = _clean_lab_description(descr_value)
-                        tuples.append((ref_value, descr_value))
-                
-                # Compactar eliminando prefijos comunes (sistema de árbol)
-                # Agrupar por prefijos comunes para reducir redundancia
-                compacted_tuples = _compact_tree_structure(tuples)
-                
-                # Agregar tuplas al contenido en formato compacto
-                for entry in compacted_tuples:
-                    if isinstance(entry, tuple):
-                        # Entrada individual: ref:descr
-                        ref, descr = entry
-                        # La limpieza de lab ya se aplicó antes, solo limpiar caracteres problemáticos
-                        descr_clean = descr.replace('|', ' ').replace('\n', ' ').replace('\r', ' ').replace(':', ';').strip()
-                        if len(descr_clean) > 100:
-                            descr_clean = descr_clean[:97] + "..."
-                        unified_content.append(f"{ref}:{descr_clean}")
-                    else:
-                        # Entrada agrupada: prefix|suffix1:descr1|suffix2:descr2|...
-                        unified_content.append(entry)
-                
-                unified_content.append("")  # Línea en blanco entre diccionarios
-                
-                print(f"  [OK] {len(tuples)} tuplas procesadas")
-        
-        except Exception as e:
-            print(f"  [FAIL] Error procesando {file_name}: {e}")
-            continue
+    unified_content = []
+    tasks = [(_dictionary_content, (csv_file,)) for csv_file in sorted(csv_files)]
+    for content in _map_dictionaries(tasks, workers):
+        unified_content.extend(content)
     
     # Escribir archivo unificado
     if unified_content:
@@ -291,3 +666,36 @@ def unify_dictionaries(dicc_dir: str, output_file: str) -> str:
         print("\n[WARN] No se pudo crear el archivo unificado (sin contenido)")
         return None
 
+
+def _unify_dictionaries_streaming(csv_files, output_file: str, chunk_rows: int, workers: int) -> str:
+    """Modo streaming de unify_dictionaries: cada diccionario se escribe en una parte y se concatenan."""
+    output_dir = os.path.dirname(os.path.abspath(output_file))
+    tmp_output = output_file + '.tmp'
+    
+    with tempfile.TemporaryDirectory(prefix='dicc_parts_', dir=output_dir) as parts_dir:
+        part_files = [os.path.join(parts_dir, f"{i:04d}.part") for i in range(len(csv_files))]
+        tasks = [
+            (_dictionary_part_streaming, (csv_file, part_file, chunk_rows))
+            for csv_file, part_file in zip(csv_files, part_files)
+        ]
+        written = _map_dictionaries(tasks, workers)
+        
+        if not any(written):
+            print("\n[WARN] No se pudo crear el archivo unificado (sin contenido)")
+            return None
+        
+        # Concatenar las partes con el mismo separador que '\n'.join
+        with open(tmp_output, 'w', encoding='utf-8') as out:
+            first = True
+            for part_file, has_content in zip(part_files, written):
+                if not has_content:
+                    continue
+                if not first:
+                    out.write('\n')
+                with open(part_file, 'r', encoding='utf-8') as part:
+                    shutil.copyfileobj(part, out)
+                first = False
+    
+    os.replace(tmp_output, output_file)
+    print(f"\n[OK] Archivo unificado creado: {output_file}")
+    return output_file
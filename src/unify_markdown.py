@@ -7,6 +7,8 @@ import re
 from typing import Dict
 from bs4 import BeautifulSoup
 
+from .page_exclusions import ExclusionMatcher
+
 
 def convert_html_tables_to_markdown(content: str) -> str:
     """
@@ -89,16 +91,13 @@ def unify_markdowns(
     Returns:
         Ruta del archivo generado
     """
-    # Leer la lista de páginas a excluir
-    excluded_pages = set()
+    # Leer la lista de páginas a excluir (mismas reglas que filter_useful_pages);
+    # un patrón no válido (ValueError) se propaga igual que en la descarga y el filtrado
+    exclusions = ExclusionMatcher()
     if os.path.exists(excluded_pages_file):
         try:
-            with open(excluded_pages_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    page_name = line.strip()
-                    if page_name:  # Ignorar líneas vacías
-                        excluded_pages.add(page_name)
-        except Exception as e:
+            exclusions = ExclusionMatcher.from_file(excluded_pages_file)
+        except OSError as e:
             print(f"[WARN] Advertencia: No se pudo leer {excluded_pages_file}: {e}")
     
     # Obtener todos los archivos markdown
@@ -113,7 +112,7 @@ def unify_markdowns(
     excluded_count = 0
     for md_file in all_md_files:
         page_name = md_file.replace('.md', '')
-        if page_name not in excluded_pages:
+        if not exclusions.matches(page_name):
             md_files.append(md_file)
         else:
             excluded_count += 1
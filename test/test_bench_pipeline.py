@@ -0,0 +1,80 @@
+"""
+Test del benchmark del pipeline (bench/bench_pipeline.py) con un corpus pequeño.
+"""
+
+import contextlib
+import copy
+import io
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bench.bench_pipeline import STAGES, compare_results, main, run_benchmark
+
+SMALL = dict(pages=5, padding_kb=10, dictionary_rows=2000)
+
+
+def test_bench_pipeline():
+    """Mide todos los pasos, guarda JSON y detecta regresiones respecto a una referencia."""
+    print("="*60)
+    print("TEST: Benchmark del pipeline")
+    print("="*60)
+
+    results = run_benchmark(repeat=2, **SMALL)
+    assert list(results['stages']) == STAGES
+    for name, stage in results['stages'].items():
+        assert len(stage['runs']) == 2 and stage['min_seconds'] <= stage['seconds']
+    assert results['stages']['download_wiki_pages']['items'] == SMALL['pages']
+    assert results['stages']['create_final_output']['bytes'] > results['stages']['unify_dictionaries']['bytes']
+    print(f"✓ {len(STAGES)} pasos medidos en {results['total_seconds'] * 1000:.0f} ms")
+
+    # Comparación: un paso el doble de lento es regresión; las diferencias mínimas no
+    slower = copy.deepcopy(results)
+    slower['stages']['unify_dictionaries']['seconds'] = results['stages']['unify_dictionaries']['seconds'] * 2 + 0.1
+    slower['stages']['extract_text']['seconds'] += 0.001
+    rows = {row['stage']: row for row in compare_results(slower, results, threshold=0.25, min_delta=0.05)}
+    assert rows['unify_dictionaries']['regression'] and rows['unify_dictionaries']['ratio'] > 2
+    assert not rows['extract_text']['regression']
+    assert sum(row['regression'] for row in rows.values()) == 1
+    print("✓ compare_results marca solo el paso que empeoró")
+
+    # Línea de comandos: JSON de salida y código de salida 1 ante una regresión
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = os.path.join(tmp, 'results.json')
+        baseline_file = os.path.join(tmp, 'baseline.json')
+        args = ['--pages', '5', '--padding-kb', '10', '--dictionary-rows', '2000', '--repeat', '1',
+                '--stages', 'unify_markdowns', 'create_final_output']
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert main(args + ['--output', output_file]) == 0
+        saved = json.loads(Path(output_file).read_text(encoding='utf-8'))
+        assert list(saved['stages']) == ['unify_markdowns', 'create_final_output']
+
+        for stage in saved['stages'].values():
+            stage['seconds'] = 1e-6
+        Path(baseline_file).write_text(json.dumps(saved), encoding='utf-8')
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            assert main(args + ['--compare', baseline_file, '--min-delta', '0']) == 1
+        assert "REGRESIÓN" in output.getvalue()
+
+        for stage in saved['stages'].values():
+            stage['seconds'] = 60.0
+        Path(baseline_file).write_text(json.dumps(saved), encoding='utf-8')
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert main(args + ['--compare', baseline_file]) == 0
+    print("✓ --compare termina con código 1 solo si hay regresión")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_bench_pipeline()
+    sys.exit(0 if success else 1)
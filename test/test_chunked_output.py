@@ -0,0 +1,154 @@
+"""
+Test de la salida por fragmentos con manifest.json (chunked_output).
+"""
+
+import contextlib
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.chunked_output import create_chunked_output, load_manifest
+from src.create_final_output import create_final_output
+
+PROMPT = "### PROMPT ###\nEres un creador de querys SQL.\n\n### CONTEXTO ###\n\n\n### DICCIONARIOS ###\n"
+
+
+def _quiet(func, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+def _write_inputs(tmp):
+    wiki = "\n\n---\n\n".join([
+        "# Home\nBienvenido a la wiki",
+        "# The g_labs table\n| a | b |\n| - | - |\n| lab_ref | código |",
+        "# Atención primaria\nTexto con acentos",
+    ])
+    dictionaries = (
+        "## Diagnostic\n\n" + "\n".join(f"A{i:04d}:Diagnóstico número {i}" for i in range(2000))
+        + "\n\n## Lab\n\nLABHG|1:Hemoglobina glicada|2:HbA1c\nLABCREA:Creatinina suero\n"
+    )
+    files = {}
+    for name, content in (('prompt.txt', PROMPT), ('wiki.md', wiki + "\n"), ('dicc.md', dictionaries)):
+        files[name] = os.path.join(tmp, name)
+        Path(files[name]).write_text(content, encoding='utf-8')
+    return files
+
+
+def test_chunked_output():
+    """Fragmentos por página y diccionario, manifest, resincronización y reensamblado."""
+    print("="*60)
+    print("TEST: Salida por fragmentos con manifest")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = _write_inputs(tmp)
+        chunks_dir = os.path.join(tmp, 'chunks')
+        args = (files['prompt.txt'], files['wiki.md'], files['dicc.md'], chunks_dir)
+        manifest_file = _quiet(create_chunked_output, *args, max_chunk_bytes=16 * 1024)
+        assert manifest_file == os.path.join(chunks_dir, 'manifest.json')
+
+        manifest = load_manifest(chunks_dir)
+        paths = [entry['path'] for entry in manifest['chunks']]
+        assert paths[:4] == ['prompt.txt', 'wiki/home.md', 'wiki/the-g-labs-table.md',
+                             'wiki/atencion-primaria.md'], paths
+        assert paths[4] == 'dicc/diagnostic-a0000.md' and paths[-1] == 'dicc/lab.md', paths
+        diagnostic = [entry for entry in manifest['chunks'] if entry['title'] == 'Diagnostic']
+        assert len(diagnostic) > 1 and all(entry['bytes'] <= 16 * 1024 for entry in diagnostic)
+        assert diagnostic[0]['refs'][0] == 'A0000' and diagnostic[-1]['refs'][1] == 'A1999'
+        assert all(entry['path'] == f"dicc/diagnostic-{entry['refs'][0].lower()}.md" for entry in diagnostic)
+        lab = [entry for entry in manifest['chunks'] if entry['title'] == 'Lab']
+        assert len(lab) == 1 and lab[0]['refs'] == ['LABHG', 'LABCREA']
+        for entry in manifest['chunks']:
+            data = Path(chunks_dir, entry['path']).read_bytes()
+            assert len(data) == entry['bytes'] and hashlib.sha256(data).hexdigest() == entry['sha256']
+            assert entry['tokens'] > 0
+        print(f"✓ {len(paths)} fragmentos; Diagnostic partido en {len(diagnostic)} trozos nombrados por su primer ref")
+
+        # Reensamblado: idéntico al archivo monolítico
+        monolithic = os.path.join(tmp, 'full.txt')
+        assembled = os.path.join(tmp, 'assembled.txt')
+        _quiet(create_final_output, files['prompt.txt'], files['wiki.md'], files['dicc.md'], monolithic)
+        assert _quiet(create_final_output, output_file=assembled, chunks_dir=chunks_dir) == assembled
+        assert Path(assembled).read_bytes() == Path(monolithic).read_bytes()
+        assert manifest['output_sha256'] == hashlib.sha256(Path(monolithic).read_bytes()).hexdigest()
+        print("✓ create_final_output(chunks_dir=...) reproduce el archivo monolítico")
+
+        # Sin cambios: no se reescribe nada; un cambio en una página solo reescribe su fragmento
+        mtimes = {path: os.stat(os.path.join(chunks_dir, path)).st_mtime_ns for path in paths}
+        time.sleep(0.01)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            create_chunked_output(*args, max_chunk_bytes=16 * 1024)
+        assert f"Reescritos: 0 de {len(paths)}" in output.getvalue()
+        Path(files['wiki.md']).write_text(
+            Path(files['wiki.md']).read_text(encoding='utf-8').replace("Bienvenido", "Hola"), encoding='utf-8')
+        _quiet(create_chunked_output, *args, max_chunk_bytes=16 * 1024)
+        changed = [path for path in paths if os.stat(os.path.join(chunks_dir, path)).st_mtime_ns != mtimes[path]]
+        assert changed == ['wiki/home.md'], changed
+        new_manifest = load_manifest(chunks_dir)
+        changed_hashes = [new['path'] for old, new in zip(manifest['chunks'], new_manifest['chunks'])
+                          if old['sha256'] != new['sha256']]
+        assert changed_hashes == ['wiki/home.md']
+        print("✓ Solo se reescribe el fragmento que cambió")
+
+        # Insertar o quitar una fila al principio de un diccionario solo cambia el hash de su trozo
+        dictionaries = Path(files['dicc.md']).read_text(encoding='utf-8')
+        before = {entry['path']: entry['sha256'] for entry in load_manifest(chunks_dir)['chunks']}
+        for edited in (dictionaries.replace("A0003:", "A0002b:Diagnóstico insertado\nA0003:"),
+                       dictionaries.replace("A0003:Diagnóstico número 3\n", "")):
+            Path(files['dicc.md']).write_text(edited, encoding='utf-8')
+            _quiet(create_chunked_output, *args, max_chunk_bytes=16 * 1024)
+            after = {entry['path']: entry['sha256'] for entry in load_manifest(chunks_dir)['chunks']}
+            assert after.keys() == before.keys()
+            assert [path for path in after if after[path] != before[path]] == ['dicc/diagnostic-a0000.md']
+        Path(files['dicc.md']).write_text(dictionaries, encoding='utf-8')
+        _quiet(create_chunked_output, *args, max_chunk_bytes=16 * 1024)
+        assert {entry['path']: entry['sha256'] for entry in load_manifest(chunks_dir)['chunks']} == before
+        print("✓ Fila insertada o quitada en un diccionario: solo cambia el hash de su trozo")
+
+        # Insertar una página (con un título repetido) no renombra ni reescribe las siguientes
+        mtimes = {path: os.stat(os.path.join(chunks_dir, path)).st_mtime_ns for path in paths}
+        Path(files['wiki.md']).write_text(
+            "# Home\nOtra portada\n\n---\n\n" + Path(files['wiki.md']).read_text(encoding='utf-8'), encoding='utf-8')
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            create_chunked_output(*args, max_chunk_bytes=16 * 1024)
+        inserted = [entry['path'] for entry in load_manifest(chunks_dir)['chunks']]
+        assert inserted[:3] == ['prompt.txt', 'wiki/home.md', 'wiki/home-2.md'], inserted
+        assert set(paths) < set(inserted)
+        assert f"Reescritos: 2 de {len(inserted)}" in output.getvalue(), output.getvalue()
+        unchanged = [path for path in paths if path != 'wiki/home.md']
+        assert all(os.stat(os.path.join(chunks_dir, path)).st_mtime_ns == mtimes[path] for path in unchanged)
+        print("✓ Página insertada: nombres por título, las siguientes no se reescriben")
+
+        # Fragmentos que desaparecen se borran; un fragmento alterado se detecta
+        Path(files['wiki.md']).write_text("# Home\nSolo una página\n", encoding='utf-8')
+        _quiet(create_chunked_output, *args, max_chunk_bytes=16 * 1024)
+        assert sorted(os.listdir(os.path.join(chunks_dir, 'wiki'))) == ['home.md']
+        previous = Path(assembled).read_bytes()
+        Path(chunks_dir, 'wiki', 'home.md').write_text("# Home\nSolo una pagina!", encoding='utf-8')
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            assert create_final_output(output_file=assembled, chunks_dir=chunks_dir) == ""
+        assert "no coincide con el manifest" in output.getvalue()
+        # La salida anterior queda intacta y no quedan temporales
+        assert Path(assembled).read_bytes() == previous and not os.path.exists(assembled + '.tmp')
+        print("✓ Fragmentos obsoletos borrados y fragmentos alterados rechazados")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_chunked_output()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,68 @@
+"""
+Test de la limpieza por lotes de descripciones de lab (_clean_lab_descriptions).
+"""
+
+import random
+import sys
+from pathlib import Path
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.unify_dictionaries import _clean_lab_description, _clean_lab_descriptions
+from bench.fixtures import generate_dictionary_rows
+
+EDGE_CASES = [
+    'Hemoglobina glicada en sangre',
+    '  El, (la) ..  Ella  DE  ',
+    'LOS,los;Del. Sobre [ENTRE] {con}',
+    '...',
+    ',',
+    'A\ttab y\nsalto\x1cseparador',
+    'ſin sın İla',
+    'espacio　ideográfico de',
+    'de la y',
+]
+
+
+def test_clean_lab_descriptions():
+    """La versión por lotes es idéntica a aplicar _clean_lab_description fila a fila."""
+    print("="*60)
+    print("TEST: Limpieza por lotes de descripciones de lab")
+    print("="*60)
+
+    assert _clean_lab_descriptions([]) == []
+    assert _clean_lab_descriptions(['de la y', 'Glucosa en suero']) == ['', 'Glucosa suero']
+
+    synthetic = [descr for _, descr in generate_dictionary_rows(20000, kind='lab')]
+    rng = random.Random(7)
+    alphabet = list('aeElLdDo ,.;()[]{}\t\n') + ['de', 'la', 'Sin', ' ']
+    fuzz = [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 15))) for _ in range(20000)]
+
+    use_pandas_options = [False]
+    try:
+        import pandas  # noqa: F401
+        use_pandas_options.append(True)
+    except ImportError:
+        print("(pandas no instalado: se omite su camino)")
+
+    for name, texts in (('casos límite', EDGE_CASES), ('sintético', synthetic), ('aleatorio', fuzz)):
+        expected = [_clean_lab_description(text) for text in texts]
+        for use_pandas in use_pandas_options:
+            assert _clean_lab_descriptions(texts, use_pandas=use_pandas) == expected, (name, use_pandas)
+        print(f"✓ {name}: {len(texts)} descripciones idénticas a la limpieza fila a fila")
+
+    # El separador de filas dentro de una descripción no mezcla filas
+    texts = ['a\x00b de', 'la c']
+    assert _clean_lab_descriptions(texts) == [_clean_lab_description(text) for text in texts]
+    print("✓ Descripciones con el carácter separador")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_clean_lab_descriptions()
+    sys.exit(0 if success else 1)
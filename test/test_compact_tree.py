@@ -0,0 +1,96 @@
+"""
+Test de la compactación en árbol de los diccionarios (_compact_tree_structure).
+"""
+
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.unify_dictionaries import _compact_tree_structure, _format_single
+from bench.fixtures import generate_dictionary_rows
+
+
+def _lines(entries):
+    return [_format_single(*entry) if isinstance(entry, tuple) else entry for entry in entries]
+
+
+def _decoded_refs(lines):
+    """Reconstruye los códigos completos a partir de las líneas compactadas."""
+    refs = []
+    for line in lines:
+        parts = line.split('|')
+        if len(parts) == 1:
+            refs.append(line.split(':', 1)[0])
+        else:
+            prefix = parts[0].split(':', 1)[0]
+            refs.extend(prefix + part.split(':', 1)[0] for part in parts[1:])
+    return refs
+
+
+def test_compact_tree_structure():
+    """Agrupación por subárbol, varios niveles y reconstrucción de todos los códigos."""
+    print("="*60)
+    print("TEST: Compactación en árbol de diccionarios")
+    print("="*60)
+
+    assert _compact_tree_structure([]) == []
+
+    # Ejemplo del docstring
+    tuples = [
+        ('6000029', 'Aborto espontaneo con alteracion metabolica incompleto'),
+        ('6000030', 'Aborto espontaneo con complicacion neom completo'),
+        ('6000031', 'Aborto espontaneo con embolia completo'),
+    ]
+    result = _compact_tree_structure(tuples)
+    assert result == ['60000:Aborto espontaneo con|29:alteracion metabolica incompleto|30:complicacion neom completo|31:embolia completo']
+    print(f"✓ Grupo simple: {result[0]}")
+
+    # Dos familias en el mismo subárbol O36 agrupadas a distinta profundidad
+    tuples = [
+        ('O36.63X0', 'Atención materna por crecimiento fetal excesivo, no aplicable'),
+        ('O36.63X1', 'Atención materna por crecimiento fetal excesivo, feto 1'),
+        ('O36.63X2', 'Atención materna por crecimiento fetal excesivo, feto 2'),
+        ('O36.63X3', 'Atención materna por crecimiento fetal excesivo, feto 3'),
+        ('O36.591', 'Atención materna por crecimiento fetal insuficiente, primer trimestre'),
+        ('O36.592', 'Atención materna por crecimiento fetal insuficiente, segundo trimestre'),
+        ('O36.593', 'Atención materna por crecimiento fetal insuficiente, tercer trimestre'),
+        ('Z91.013', 'Alergia a alimentos marinos'),
+    ]
+    lines = _lines(_compact_tree_structure(tuples))
+    assert lines[0].startswith('O36.63X:'), lines
+    assert lines[1].startswith('O36.59:'), lines
+    assert lines[2] == 'Z91.013:Alergia a alimentos marinos'
+    assert sorted(_decoded_refs(lines)) == sorted(ref for ref, _ in tuples)
+    print("✓ Grupos a distinta profundidad en el mismo subárbol")
+
+    # Catálogos sintéticos: todos los códigos una sola vez y salida más pequeña
+    for kind in ('icd', 'lab'):
+        tuples = generate_dictionary_rows(20000, kind=kind)
+        lines = _lines(_compact_tree_structure(tuples))
+        assert Counter(_decoded_refs(lines)) == Counter(ref for ref, _ in tuples)
+        compact_size = sum(len(line) + 1 for line in lines)
+        plain_size = sum(len(line) + 1 for line in _lines(tuples))
+        assert compact_size < plain_size * 0.8, f"{kind}: {compact_size} vs {plain_size}"
+        print(f"✓ {kind}: {len(tuples)} filas -> {len(lines)} líneas ({compact_size / plain_size:.0%} del tamaño)")
+
+    # Escala: cientos de miles de filas
+    tuples = generate_dictionary_rows(300000, kind='icd')
+    start = time.perf_counter()
+    _compact_tree_structure(tuples)
+    elapsed = time.perf_counter() - start
+    assert elapsed < 30, f"Demasiado lento: {elapsed:.1f}s"
+    print(f"✓ 300k filas en {elapsed:.2f}s")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_compact_tree_structure()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,109 @@
+"""
+Test del archivo final con presupuesto de tokens (create_final_output con token_budget).
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.create_final_output import create_final_output
+from src.context_budget import approx_token_count, get_tokenizer
+
+PROMPT = "### PROMPT ###\nEres un creador de querys SQL.\n\n### CONTEXTO ###\n\n\n### DICCIONARIOS ###\n"
+
+
+def _table_page(name, rows):
+    lines = [f"# The {name} table", f"The `{name}` table:", "| Attribute | Data type | Key | Definition |",
+             "| - | - | - | - |"]
+    lines += [f"| field_{i} | INT | fk | descripción del campo {i} de {name} |" for i in range(rows)]
+    return "\n".join(lines)
+
+
+def _write_inputs(tmp):
+    pages = [_table_page("g_labs", 15), "# Home\nBienvenido a la wiki " * 40, _table_page("g_diagnostics", 8),
+             "# Overview\nLas tablas centrales son g_episodes y g_movements. " * 20]
+    wiki = "\n---\n".join(pages)
+    dictionaries = (
+        "## Diagnostic\n\n" + "\n".join(f"A{i:04d}:Diagnóstico número {i}" for i in range(2000))
+        + "\n\n## Lab\n\n" + "\n".join(f"LAB{i:04d}:Prueba de laboratorio {i}" for i in range(300))
+    )
+    files = {}
+    for name, content in (('prompt.txt', PROMPT), ('wiki.md', wiki), ('dicc.md', dictionaries)):
+        files[name] = os.path.join(tmp, name)
+        Path(files[name]).write_text(content, encoding='utf-8')
+    return files
+
+
+def _create(files, output_file, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = create_final_output(files['prompt.txt'], files['wiki.md'], files['dicc.md'], output_file, **kwargs)
+    assert result == output_file
+    return Path(output_file).read_text(encoding='utf-8')
+
+
+def test_context_budget():
+    """Selección por prioridad dentro del presupuesto, truncado determinista e informe."""
+    print("="*60)
+    print("TEST: Archivo final con presupuesto de tokens")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = _write_inputs(tmp)
+        full = _create(files, os.path.join(tmp, 'full.txt'))
+
+        # Presupuesto holgado: idéntico al archivo completo
+        assert _create(files, os.path.join(tmp, 'big.txt'), token_budget=10**9) == full
+        print("✓ Con presupuesto holgado la salida es idéntica a la completa")
+
+        # Presupuesto ajustado: tablas, luego Lab (más mencionado) truncado, sin Home ni Overview
+        budget = 2500
+        report_file = os.path.join(tmp, 'report.json')
+        content = _create(files, os.path.join(tmp, 'b.txt'), token_budget=budget, report_file=report_file)
+        report = json.loads(Path(report_file).read_text(encoding='utf-8'))
+        assert approx_token_count(content) == report['tokens'] <= budget
+        assert '# The g_labs table' in content and '# The g_diagnostics table' in content
+        assert '# Home' not in content and '# Overview' not in content
+        assert content.index('# The g_labs table') < content.index('# The g_diagnostics table')
+        dropped = {(entry['section'], entry['title']) for entry in report['dropped']}
+        assert {('wiki', 'Home'), ('wiki', 'Overview'), ('dicc', 'Diagnostic')} <= dropped
+        truncated = report['truncated']
+        assert [(entry['section'], entry['title']) for entry in truncated] == [('dicc', 'Lab')]
+        kept = truncated[0]['lines_kept']
+        lab_lines = [line for line in content.split('\n') if line.startswith('LAB')]
+        assert lab_lines == [f"LAB{i:04d}:Prueba de laboratorio {i}" for i in range(kept - 2)]
+        print(f"✓ {report['tokens']} / {budget} tokens; Lab truncado a {kept - 2} entradas; "
+              f"omitidos: {sorted(title for _, title in dropped)}")
+
+        # Determinista
+        assert _create(files, os.path.join(tmp, 'b2.txt'), token_budget=budget) == content
+        print("✓ Misma salida en dos ejecuciones")
+
+        # Frecuencia de uso explícita: Diagnostic antes que Lab
+        content = _create(files, os.path.join(tmp, 'u.txt'), token_budget=budget,
+                          dictionary_usage={'Diagnostic': 100, 'Lab': 1})
+        assert 'A0000:' in content and 'LAB0000:' not in content
+        print("✓ dictionary_usage decide el orden de los diccionarios")
+
+        # Tokenizador enchufable (por nombre o función)
+        for tokenizer in ('chars4', lambda text: len(text.split())):
+            count = get_tokenizer(tokenizer) if isinstance(tokenizer, str) else tokenizer
+            content = _create(files, os.path.join(tmp, 't.txt'), token_budget=budget, tokenizer=tokenizer)
+            assert count(content) <= budget
+        print("✓ Tokenizadores alternativos respetan el presupuesto")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_context_budget()
+    sys.exit(0 if success else 1)
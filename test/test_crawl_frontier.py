@@ -0,0 +1,94 @@
+"""
+Test de la frontera de rastreo (CrawlFrontier) y sus estadísticas en el manifest.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src import download_wiki_pages
+from src.crawl_frontier import CrawlFrontier
+from test.wiki_fixture_server import FixtureWikiServer
+
+
+def test_crawl_frontier():
+    """Deduplicación, prioridad de sidebar y límite de profundidad."""
+    print("="*60)
+    print("TEST: Frontera de rastreo")
+    print("="*60)
+
+    done = set()
+    frontier = CrawlFrontier()
+    assert frontier.push('home', done)
+    assert not frontier.push('home', done), "No se encola dos veces"
+    assert frontier.pop() == 'home'
+    done.add('home')
+    assert not frontier.push('home', done, parent='home'), "No se encolan páginas procesadas"
+    for name in ('a', 'b', 'c'):
+        frontier.push(name, done, parent='home')
+    assert list(frontier) == ['a', 'b', 'c'] and len(frontier) == 3
+    print("✓ FIFO con deduplicación")
+
+    # Prioridad: sidebar antes que contenido, FIFO dentro de cada nivel
+    frontier = CrawlFrontier(priority=True)
+    frontier.push('home', set())
+    frontier.pop()
+    frontier.push('content-1', set(), area='content', parent='home')
+    frontier.push('side-1', set(), area='custom-sidebar', parent='home')
+    frontier.push('content-2', set(), area='content', parent='home')
+    frontier.push('side-2', set(), area='sidebar', parent='home')
+    assert [frontier.pop() for _ in range(4)] == ['side-1', 'side-2', 'content-1', 'content-2']
+    print("✓ Prioridad de sidebar")
+
+    # Límite de profundidad
+    frontier = CrawlFrontier(max_depth=1)
+    frontier.push('home', set())
+    assert frontier.push('nivel-1', set(), parent='home')
+    assert not frontier.push('nivel-2', set(), parent='nivel-1')
+    assert frontier.stats()['skipped_by_depth'] == 1
+    print("✓ Límite de profundidad")
+
+    # Escala lineal: 50k páginas
+    frontier = CrawlFrontier()
+    frontier.push('home', set())
+    start = time.perf_counter()
+    for i in range(50000):
+        frontier.push(f"page-{i}", done, parent='home')
+        frontier.push(f"page-{i // 2}", done, parent='home')
+    while frontier:
+        frontier.pop()
+    elapsed = time.perf_counter() - start
+    assert elapsed < 2.0, f"Demasiado lento: {elapsed:.2f}s"
+    print(f"✓ 100k push + 50k pop en {elapsed:.3f}s")
+
+    return True
+
+
+def test_discovery_stats_in_manifest():
+    """El manifest incluye las estadísticas de descubrimiento."""
+    with tempfile.TemporaryDirectory() as output_dir, FixtureWikiServer() as server:
+        download_wiki_pages(f"{server.base_url}/home", output_dir, rate_limit=0, max_retries=1)
+        manifest = json.loads((Path(output_dir) / 'metadata' / 'manifest.json').read_text(encoding='utf-8'))
+        stats = manifest['discovery_stats']
+        assert stats['pages_parsed'] == len(server.pages)
+        assert stats['pages_discovered'] == len(server.pages) - 1
+        assert stats['final_queue_depth'] == 0
+        assert stats['max_queue_depth'] >= 1
+        print(f"✓ Estadísticas: {stats}")
+
+        limited_dir = os.path.join(output_dir, 'limited')
+        pages = download_wiki_pages(f"{server.base_url}/home", limited_dir, rate_limit=0, max_retries=1, max_depth=1)
+        assert 0 < len(pages) < len(server.pages)
+        print(f"✓ max_depth=1 descarga {len(pages)} de {len(server.pages)} páginas")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_crawl_frontier() and test_discovery_stats_in_manifest()
+    sys.exit(0 if success else 1)
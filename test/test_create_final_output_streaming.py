@@ -0,0 +1,132 @@
+"""
+Test del ensamblado por bloques del archivo final (create_final_output sin presupuesto).
+"""
+
+import contextlib
+import importlib
+import io
+import os
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# src/__init__ exporta la función create_final_output con el mismo nombre que el módulo
+final_output = importlib.import_module('src.create_final_output')
+_insert_sections = final_output._insert_sections
+create_final_output = final_output.create_final_output
+
+PROMPTS = [
+    "### PROMPT ###\n\n### CONTEXTO ###\n\n### DICCIONARIOS ###\n",
+    "  \nSin secciones\n\n",
+    "Solo contexto: ### CONTEXTO ###   \n\n",
+    "Solo diccionarios\n### DICCIONARIOS ###",
+    "### CONTEXTO ### dos veces ### CONTEXTO ###\n### DICCIONARIOS ### y ### DICCIONARIOS ###",
+]
+
+CONTENTS = [
+    "# Página\n\n| a | b |\n",
+    "\n\n   # Con espacios unicode á　\n\t\n",
+    "",
+    " \n\t ",
+    "ñ" * 50 + "\n" + "€" * 50,
+]
+
+
+def _create(prompt_file, wiki_file, dicc_file, output_file):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return create_final_output(prompt_file, wiki_file, dicc_file, output_file)
+
+
+def test_create_final_output_streaming():
+    """Misma salida que el ensamblado en memoria, con y sin sendfile, y memoria acotada."""
+    print("="*60)
+    print("TEST: Ensamblado por bloques del archivo final")
+    print("="*60)
+
+    buffer_size = final_output.COPY_BUFFER_SIZE
+    edge_size = final_output.EDGE_BLOCK_SIZE
+    use_sendfile = final_output._USE_SENDFILE
+    newline = final_output._NEWLINE
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            files = {name: os.path.join(tmp, name) for name in ('prompt.txt', 'wiki.md', 'dicc.md')}
+            output_file = os.path.join(tmp, 'out.txt')
+            cases = 0
+            # Bloques diminutos para cortar caracteres UTF-8 y espacios entre bloques
+            final_output.COPY_BUFFER_SIZE = final_output.EDGE_BLOCK_SIZE = 7
+            for sendfile in (True, False):
+                final_output._USE_SENDFILE = use_sendfile and sendfile
+                for prompt in PROMPTS:
+                    for wiki in CONTENTS:
+                        for dicc in (CONTENTS[0], CONTENTS[1], CONTENTS[4]):
+                            Path(files['prompt.txt']).write_text(prompt, encoding='utf-8')
+                            Path(files['wiki.md']).write_text(wiki, encoding='utf-8')
+                            Path(files['dicc.md']).write_text(dicc, encoding='utf-8')
+                            expected = _insert_sections(prompt, wiki.strip(), dicc.strip())
+                            assert _create(files['prompt.txt'], files['wiki.md'], files['dicc.md'],
+                                           output_file) == output_file
+                            content = Path(output_file).read_text(encoding='utf-8')
+                            assert content == expected, (prompt, wiki, dicc)
+                            cases += 1
+            assert not os.path.exists(output_file + '.tmp')
+            print(f"✓ {cases} combinaciones idénticas al ensamblado en memoria (con y sin sendfile)")
+
+            # Entradas con \r\n (y \r sueltos): saltos normalizados como al leer en modo
+            # texto, también con un \r\n partido entre bloques de 7 bytes
+            prompt = "### PROMPT ###\r\n### CONTEXTO ###\r\n### DICCIONARIOS ###\r\n"
+            wiki = "\r\n# Página\r\n\r\n| a |\r| b |\r\n" * 3
+            dicc = "E11:Diabetes\r\nE11.6:Otras\r\n"
+            for name, text in (('prompt.txt', prompt), ('wiki.md', wiki), ('dicc.md', dicc)):
+                Path(files[name]).write_bytes(text.encode('utf-8'))
+            universal = {name: text.replace('\r\n', '\n').replace('\r', '\n')
+                         for name, text in (('prompt', prompt), ('wiki', wiki), ('dicc', dicc))}
+            expected = _insert_sections(universal['prompt'], universal['wiki'].strip(), universal['dicc'].strip())
+            for sendfile in (True, False):
+                final_output._USE_SENDFILE = use_sendfile and sendfile
+                _create(files['prompt.txt'], files['wiki.md'], files['dicc.md'], output_file)
+                assert Path(output_file).read_bytes() == expected.encode('utf-8')
+            # Salto de línea de Windows: \r\n en toda la salida, como open(..., 'w')
+            final_output._USE_SENDFILE = False
+            final_output._NEWLINE = b"\r\n"
+            _create(files['prompt.txt'], files['wiki.md'], files['dicc.md'], output_file)
+            assert Path(output_file).read_bytes() == expected.replace('\n', '\r\n').encode('utf-8')
+            final_output._NEWLINE = newline
+            print("✓ Entradas con \\r\\n normalizadas; salto de línea de la plataforma en la salida")
+
+            # Memoria: los diccionarios se copian sin cargarlos
+            final_output.COPY_BUFFER_SIZE = buffer_size
+            final_output.EDGE_BLOCK_SIZE = edge_size
+            final_output._USE_SENDFILE = use_sendfile
+            Path(files['prompt.txt']).write_text(PROMPTS[0], encoding='utf-8')
+            Path(files['wiki.md']).write_text("# Wiki\n" * 1000, encoding='utf-8')
+            with open(files['dicc.md'], 'w', encoding='utf-8') as f:
+                line = "E11.65:Diabetes mellitus tipo 2 con hiperglucemia\n"
+                for _ in range(400_000):
+                    f.write(line)
+            dictionaries_size = os.path.getsize(files['dicc.md'])
+            tracemalloc.start()
+            _create(files['prompt.txt'], files['wiki.md'], files['dicc.md'], output_file)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            assert os.path.getsize(output_file) > dictionaries_size
+            assert peak < dictionaries_size / 4, f"Pico de memoria {peak:,} bytes"
+            print(f"✓ Diccionarios de {dictionaries_size / 1e6:.0f} MB con pico de memoria de {peak / 1e6:.1f} MB")
+    finally:
+        final_output.COPY_BUFFER_SIZE = buffer_size
+        final_output.EDGE_BLOCK_SIZE = edge_size
+        final_output._USE_SENDFILE = use_sendfile
+        final_output._NEWLINE = newline
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_create_final_output_streaming()
+    sys.exit(0 if success else 1)
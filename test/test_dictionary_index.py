@@ -0,0 +1,124 @@
+"""
+Test del índice de búsqueda de diccionarios (dictionary_index).
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.dictionary_index import (
+    DEFAULT_QUERY_OUTPUT, DictionaryIndex, build_dictionary_index, create_retrieval_output, iter_unified_entries,
+    main as dictionary_index_main
+)
+
+DICTIONARIES = """## Diagnostic
+
+E11.65:Diabetes mellitus tipo 2 con hiperglucemia
+E10.9:Diabetes mellitus tipo 1 sin complicaciones
+60000:Aborto espontaneo con|29:alteracion metabolica incompleto|30:complicacion neom completo
+J18.9:Neumonía, microorganismo no especificado
+{filler}
+
+## Lab
+
+LABHG|1:Hemoglobina glicada sangre total|2:Hemoglobina glicada NGPS DCCT
+LABCREA:Creatinina suero
+LABGLU:Glucosa suero
+"""
+
+
+def _quiet(func, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+def test_dictionary_index():
+    """Expansión de grupos, búsqueda BM25 y archivo final con solo las k mejores entradas."""
+    print("="*60)
+    print("TEST: Índice de búsqueda de diccionarios")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filler = "\n".join(f"Z{i:05d}:Otro diagnóstico de relleno número {i}" for i in range(3000))
+        dictionaries_file = os.path.join(tmp, 'dictionaries_unified.md')
+        Path(dictionaries_file).write_text(DICTIONARIES.format(filler=filler), encoding='utf-8')
+
+        entries = list(iter_unified_entries(dictionaries_file))
+        assert ('Diagnostic', '6000029', 'Aborto espontaneo con alteracion metabolica incompleto') in entries
+        assert ('Lab', 'LABHG2', 'Hemoglobina glicada NGPS DCCT') in entries
+        assert len(entries) == 3009
+        print(f"✓ {len(entries)} entradas (grupos por prefijo expandidos)")
+
+        index_file = os.path.join(tmp, 'dictionaries.idx')
+        assert _quiet(build_dictionary_index, dictionaries_file, index_file) == index_file
+
+        start = time.perf_counter()
+        with DictionaryIndex(index_file) as index:
+            opened = time.perf_counter() - start
+            assert index.n_docs == len(entries)
+            refs = [ref for _, _, ref, _ in index.search("pacientes con diabetes tipo 2 y hemoglobina glicada", k=3)]
+            assert set(refs) == {'E11.65', 'LABHG1', 'LABHG2'}, refs
+            # Sin acentos ni plurales
+            assert index.search("NEUMONIAS", k=1)[0][2] == 'J18.9'
+            assert index.search("abortos espontáneos incompletos", k=1)[0][2] == '6000029'
+            assert index.search("palabra inexistente", k=5) == []
+            # Orden determinista en empates
+            assert index.search("diabetes mellitus", k=5) == index.search("mellitus diabetes", k=5)
+        assert opened < 0.05, f"Apertura lenta: {opened * 1000:.1f} ms"
+        print(f"✓ Búsquedas BM25 correctas (apertura en {opened * 1000:.2f} ms)")
+
+        # Archivo final con solo las k entradas encontradas
+        prompt_file = os.path.join(tmp, 'prompt.txt')
+        wiki_file = os.path.join(tmp, 'wiki.md')
+        output_file = os.path.join(tmp, 'out.txt')
+        Path(prompt_file).write_text("### PROMPT ###\n\n### CONTEXTO ###\n\n### DICCIONARIOS ###\n", encoding='utf-8')
+        Path(wiki_file).write_text("# The g_labs table\n| a | b |", encoding='utf-8')
+        result = _quiet(create_retrieval_output, "creatinina en suero", index_file, prompt_file, wiki_file,
+                        output_file, top_k=2)
+        assert result == output_file
+        content = Path(output_file).read_text(encoding='utf-8')
+        dictionary_part = content.split("### DICCIONARIOS ###", 1)[1]
+        assert "# The g_labs table" in content
+        assert "## Lab" in dictionary_part and "LABCREA:Creatinina suero" in dictionary_part
+        assert "Z00000" not in dictionary_part
+        assert len([line for line in dictionary_part.splitlines() if ':' in line]) == 2
+        assert not Path(output_file + '.tmp').exists()
+        print("✓ Archivo final con solo las 2 entradas pedidas")
+
+        # La CLI escribe por defecto en un archivo aparte, no en vibe_SQL_copilot.txt
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            assert _quiet(dictionary_index_main, ["query", "creatinina en suero", "-k", "2", "--index", index_file,
+                                                  "--prompt", prompt_file, "--wiki", wiki_file]) == 0
+        finally:
+            os.chdir(cwd)
+        assert Path(tmp, DEFAULT_QUERY_OUTPUT).read_text(encoding='utf-8') == content
+        assert not Path(tmp, 'vibe_SQL_copilot.txt').exists()
+        print(f"✓ CLI query: salida por defecto en {DEFAULT_QUERY_OUTPUT}")
+
+        # Archivo que no es un índice
+        Path(output_file).write_bytes(b"no es un indice" * 10)
+        try:
+            DictionaryIndex(output_file)
+            assert False, "Debería fallar"
+        except ValueError:
+            pass
+        print("✓ Archivo inválido rechazado")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_dictionary_index()
+    sys.exit(0 if success else 1)
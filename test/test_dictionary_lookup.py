@@ -0,0 +1,115 @@
+"""
+Test de la búsqueda aproximada de refs en los diccionarios (dictionary_lookup).
+"""
+
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.dictionary_lookup import DictionaryLookup, _trigrams, iter_csv_entries, lookup_key
+from bench.fixtures import generate_dictionary_rows, write_dictionary_csv
+
+
+def _write_dicc_dir(tmp):
+    dicc_dir = os.path.join(tmp, 'dicc')
+    os.makedirs(dicc_dir)
+    with open(os.path.join(dicc_dir, 'dic_diagnostic.csv'), 'w', encoding='utf-8') as f:
+        f.write("diag_ref;diag_descr\n")
+        f.write("J18.9;Neumonía, microorganismo no especificado\n")
+        f.write("E11.65;Diabetes mellitus tipo 2 con hiperglucemia\n")
+        for ref, descr in generate_dictionary_rows(3000, kind='icd'):
+            f.write(f"{ref};{descr}\n")
+    with open(os.path.join(dicc_dir, 'dic_lab.csv'), 'w', encoding='utf-8') as f:
+        f.write("lab_ref;lab_descr\n")
+        f.write("LABINT1;Interpretació de la prova\n")
+        f.write("LABINT2;Interpretació de la prova\n")
+        f.write("LABHG;Hemoglobina glicada (HbA1c)\n")
+    write_dictionary_csv(os.path.join(dicc_dir, 'dic_procedures.csv'), 3000)
+    return dicc_dir
+
+
+def _brute_force(index, query, limit, min_similarity):
+    """Mejores claves comparando los trigramas de la consulta con todas las claves."""
+    query_trigrams = _trigrams(lookup_key(query))
+    min_shared = max(1, math.ceil(min_similarity * len(query_trigrams)))
+    scored = []
+    for key_id, key in enumerate(index._keys):
+        key_trigrams = _trigrams(key)
+        shared = len(query_trigrams & key_trigrams)
+        if shared < min_shared:
+            continue
+        score = 0.5 * shared / len(query_trigrams) + 0.5 * shared / len(query_trigrams | key_trigrams)
+        if score >= min_similarity:
+            scored.append((-score, key))
+    return sorted(scored)[:limit]
+
+
+def test_dictionary_lookup():
+    """Búsqueda sin acentos, con erratas, refs exactos, filtro por diccionario y equivalencia."""
+    print("="*60)
+    print("TEST: Búsqueda aproximada en diccionarios")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dicc_dir = _write_dicc_dir(tmp)
+        entries = list(iter_csv_entries(dicc_dir))
+        assert ('Lab', 'LABHG', 'Hemoglobina glicada HbA1c') in entries
+        index = DictionaryLookup(entries)
+        print(f"✓ {len(index.entries)} entradas, {len(index._keys)} claves distintas")
+
+        # Sin acentos ni mayúsculas, y las dos entradas con la misma descripción
+        matches = index.lookup("INTERPRETACIO", limit=5)
+        assert [ref for _, _, ref, _ in matches[:2]] == ['LABINT1', 'LABINT2'], matches
+        assert matches[0][0] == matches[1][0] > 0.7
+        assert index.lookup("neumonia")[0][2] == 'J18.9'
+        print("✓ Coincidencias sin acentos ni mayúsculas")
+
+        # Erratas
+        assert index.lookup("hemoglobina glicosilada")[0][2] == 'LABHG'
+        assert index.lookup("diabetis melitus hiperglucemia")[0][2] == 'E11.65'
+        print("✓ Tolera erratas")
+
+        # Ref exacto primero, y filtro por diccionario
+        matches = index.lookup("labhg")
+        assert matches[0] == (1.0, 'Lab', 'LABHG', 'Hemoglobina glicada HbA1c')
+        assert all(m[1] == 'Diagnostic' for m in index.lookup("hemoglobina", dictionary='diagnostic'))
+        assert index.lookup("hemoglobina glicada", dictionary='lab')[0][2] == 'LABHG'
+        assert index.lookup("xyzzy qwerty") == []
+        print("✓ Ref exacto primero y filtro por diccionario")
+
+        # Mismas claves y puntuaciones que la comparación con todas las claves
+        rng = random.Random(7)
+        queries = ["fractura", "de la", "col", "tipo 2"]
+        queries += [rng.choice(index._keys)[:rng.randint(3, 30)] for _ in range(40)]
+        elapsed = []
+        for query in queries:
+            start = time.perf_counter()
+            matches = index.lookup(query, limit=10)
+            elapsed.append(time.perf_counter() - start)
+            expected = _brute_force(index, query, 10, 0.4)
+            scores = sorted({score for score, _, _, _ in matches}, reverse=True)
+            assert scores == sorted({round(-s, 4) for s, _ in expected}, reverse=True)[:len(scores)], query
+            got_keys = [lookup_key(descr) for _, _, _, descr in matches]
+            assert got_keys[0] == expected[0][1] if expected else not matches, query
+        elapsed.sort()
+        p95 = elapsed[int(len(elapsed) * 0.95)]
+        assert p95 < 0.05, f"Búsqueda lenta: p95 {p95 * 1000:.1f} ms"
+        print(f"✓ {len(queries)} consultas iguales a la búsqueda exhaustiva "
+              f"(p50 {elapsed[len(elapsed) // 2] * 1000:.2f} ms, p95 {p95 * 1000:.2f} ms)")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_dictionary_lookup()
+    sys.exit(0 if success else 1)
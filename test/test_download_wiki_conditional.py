@@ -0,0 +1,71 @@
+"""
+Test de las peticiones condicionales (ETag / Last-Modified) de download_wiki_pages.
+Usa una wiki local que responde 304 cuando el validador coincide.
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src import download_wiki_pages
+from test.wiki_fixture_server import FixtureWikiServer, build_page_html
+
+
+def test_download_wiki_conditional():
+    """Una segunda descarga revalida con 304 y detecta las páginas editadas."""
+    print("="*60)
+    print("TEST: Caché HTTP condicional (ETag / Last-Modified)")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as output_dir, FixtureWikiServer() as server:
+        start_url = f"{server.base_url}/home"
+        total_pages = len(server.pages)
+
+        # 1. Descarga inicial: guarda validadores
+        download_wiki_pages(start_url, output_dir, rate_limit=0, max_retries=1)
+        http_cache = json.loads((Path(output_dir) / 'metadata' / 'http_cache.json').read_text(encoding='utf-8'))
+        assert set(http_cache) == set(server.pages)
+        assert all('etag' in v and 'last_modified' in v for v in http_cache.values())
+        print(f"✓ Validadores guardados para {len(http_cache)} páginas")
+
+        # 2. Sin cambios en el servidor: todas las respuestas son 304
+        server.requests.clear()
+        pages = download_wiki_pages(start_url, output_dir, rate_limit=0, max_retries=1)
+        assert len(pages) == total_pages
+        assert len(server.requests) == total_pages
+        assert all('If-None-Match' in r['headers'] for r in server.requests)
+        assert all('If-Modified-Since' in r['headers'] for r in server.requests)
+        log_lines = (Path(output_dir) / 'metadata' / 'download_log.jsonl').read_text(encoding='utf-8').splitlines()
+        last_run = [json.loads(line) for line in log_lines[-total_pages:]]
+        assert all(entry['status_code'] == 304 and entry['not_modified'] for entry in last_run)
+        print(f"✓ {total_pages} páginas revalidadas con 304")
+
+        # 3. Una página editada en el servidor se vuelve a descargar
+        server.pages['Page-2'] = build_page_html('Page-2', [], ['home']).replace('Page-2</h1>', 'Page-2 editada</h1>')
+        pages = download_wiki_pages(start_url, output_dir, rate_limit=0, max_retries=1)
+        assert 'Page-2 editada' in pages['Page-2']
+        assert 'Page-2 editada' in (Path(output_dir) / 'Page-2.html').read_text(encoding='utf-8')
+        checksums = json.loads((Path(output_dir) / 'metadata' / 'page_checksums.json').read_text(encoding='utf-8'))
+        assert len(checksums) == total_pages
+        print("✓ Página editada actualizada en caché")
+
+        # 4. revalidate=False: la caché local se usa sin consultar al servidor
+        server.requests.clear()
+        download_wiki_pages(start_url, output_dir, rate_limit=0, max_retries=1, revalidate=False)
+        assert server.requests == []
+        print("✓ revalidate=False no hace requests")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_download_wiki_conditional()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,82 @@
+"""
+Test de la reanudación de descargas interrumpidas (checkpoint de la frontera).
+Simula un Ctrl-C a mitad de la descarga y la continúa con resume=True.
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src import download_wiki_pages
+from src import download_wiki
+from test.wiki_fixture_server import FixtureWikiServer
+
+
+def test_download_wiki_resume():
+    """Una descarga interrumpida y reanudada equivale a una descarga completa."""
+    print("="*60)
+    print("TEST: Reanudación de descarga desde checkpoint")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp, FixtureWikiServer() as server:
+        start_url = f"{server.base_url}/home"
+        full_dir = os.path.join(tmp, 'full')
+        resumed_dir = os.path.join(tmp, 'resumed')
+        checkpoint_file = Path(resumed_dir) / 'metadata' / 'crawl_checkpoint.json'
+
+        full_pages = download_wiki_pages(start_url, full_dir, rate_limit=0, max_retries=1)
+
+        # Interrumpir (Ctrl-C) al procesar la sexta página
+        original = download_wiki._extract_wiki_links
+        calls = {'n': 0}
+
+        def interrupted(*args, **kwargs):
+            calls['n'] += 1
+            if calls['n'] == 6:
+                raise KeyboardInterrupt()
+            return original(*args, **kwargs)
+
+        with mock.patch.object(download_wiki, '_extract_wiki_links', interrupted):
+            try:
+                download_wiki_pages(start_url, resumed_dir, rate_limit=0, max_retries=1, checkpoint_every=2)
+                raise AssertionError("La descarga debía interrumpirse")
+            except KeyboardInterrupt:
+                pass
+
+        checkpoint = json.loads(checkpoint_file.read_text(encoding='utf-8'))
+        assert len(checkpoint['visited']) == 5
+        assert len(checkpoint['pending_log']) == 6
+        assert not (Path(resumed_dir) / 'metadata' / 'download_log.jsonl').exists()
+        print(f"✓ Checkpoint con {len(checkpoint['visited'])} páginas visitadas")
+
+        server.requests.clear()
+        resumed_pages = download_wiki_pages(start_url, resumed_dir, rate_limit=0, max_retries=1, resume=True)
+        assert resumed_pages == full_pages
+        assert list(resumed_pages) == list(full_pages)
+        # Solo se vuelve a pedir la página interrumpida (revalidación) y las pendientes
+        assert len(server.requests) == len(full_pages) - 5
+        assert not checkpoint_file.exists()
+
+        log_lines = (Path(resumed_dir) / 'metadata' / 'download_log.jsonl').read_text(encoding='utf-8').splitlines()
+        assert len(log_lines) == len(full_pages) + 1, "Se conservan las entradas de la ejecución interrumpida"
+        for name in ('page_checksums.json', 'http_cache.json'):
+            full = json.loads((Path(full_dir) / 'metadata' / name).read_text(encoding='utf-8'))
+            resumed = json.loads((Path(resumed_dir) / 'metadata' / name).read_text(encoding='utf-8'))
+            assert full == resumed, name
+        print(f"✓ Reanudación completa: {len(resumed_pages)} páginas, {len(server.requests)} requests nuevas")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_download_wiki_resume()
+    sys.exit(0 if success else 1)
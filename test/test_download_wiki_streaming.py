@@ -0,0 +1,168 @@
+"""
+Test de la descarga en streaming de download_wiki: hash calculado al vuelo,
+escritura atómica, cortes a mitad del cuerpo y memoria acotada en adjuntos.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src import download_wiki_pages
+from src.download_wiki import _obtain_page
+from src.http_fetcher import HttpFetcher
+from test.wiki_fixture_server import WIKI_PREFIX, FixtureWikiServer, build_fixture_wiki
+
+ATTACHMENT_SIZE = 20 * 1024 * 1024
+
+
+class CustomBodyServer(FixtureWikiServer):
+    """
+    Sirve cuerpos arbitrarios por ruta: {ruta: (content_type, body)}. Cada vez
+    que una ruta aparece en `truncate`, una respuesta envía solo la mitad del
+    cuerpo y cierra.
+    """
+
+    def __init__(self, bodies, truncate=(), **kwargs):
+        super().__init__(**kwargs)
+        self.bodies = bodies
+        self.truncate = Counter(truncate)
+
+    def handle(self, handler):
+        if handler.path not in self.bodies:
+            super().handle(handler)
+            return
+        content_type, body = self.bodies[handler.path]
+        handler.send_response(200)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        if self.truncate[handler.path] > 0:
+            self.truncate[handler.path] -= 1
+            handler.wfile.write(body[:len(body) // 2])
+            handler.close_connection = True
+            return
+        for start in range(0, len(body), 1024 * 1024):
+            handler.wfile.write(body[start:start + 1024 * 1024])
+
+
+def test_download_wiki_streaming():
+    """Archivos idénticos al cuerpo recibido, sin temporales y con la copia anterior intacta si falla."""
+    print("="*60)
+    print("TEST: Descarga en streaming")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Cada archivo guardado es el cuerpo exacto y su hash es el de page_checksums.json
+        output_dir = os.path.join(tmp, 'wiki')
+        with FixtureWikiServer() as server:
+            pages = download_wiki_pages(f"{server.base_url}/home", output_dir, rate_limit=0, max_retries=1)
+        checksums = json.loads(Path(output_dir, 'metadata', 'page_checksums.json').read_text(encoding='utf-8'))
+        assert set(pages) == set(server.pages) == set(checksums)
+        for name, html_content in server.pages.items():
+            data = Path(output_dir, f"{name}.html").read_bytes()
+            assert data == html_content.encode('utf-8'), name
+            assert hashlib.sha256(data).hexdigest() == checksums[name], name
+            assert pages[name] == html_content
+        assert not list(Path(output_dir).rglob('*.tmp'))
+        print(f"✓ {len(pages)} páginas guardadas byte a byte, hashes coincidentes y sin temporales")
+
+        # Adjunto enlazado desde el contenido: la segunda ejecución lo reutiliza sin leerlo como texto
+        image = b'\x89PNG\r\n\x1a\n' + os.urandom(4096)
+        wiki = build_fixture_wiki()
+        wiki['home'] = wiki['home'].replace('</div></main>', f'<a href="{WIKI_PREFIX}/uploads/img.png">img</a></div></main>')
+        output_dir = os.path.join(tmp, 'wiki_uploads')
+        with CustomBodyServer({f'{WIKI_PREFIX}/uploads/img.png': ('image/png', image)}, pages=wiki) as server:
+            first = download_wiki_pages(f"{server.base_url}/home", output_dir, rate_limit=0, max_retries=1)
+            assert first['uploads/img.png'] == '' and len(first) == len(wiki) + 1
+            assert Path(output_dir, 'uploads', 'img.png.html').read_bytes() == image
+            for revalidate in (False, True):
+                again = download_wiki_pages(f"{server.base_url}/home", output_dir, rate_limit=0, max_retries=1,
+                                            revalidate=revalidate)
+                assert again == first, revalidate
+        http_cache = json.loads(Path(output_dir, 'metadata', 'http_cache.json').read_text(encoding='utf-8'))
+        assert http_cache['uploads/img.png']['content_type'] == 'image/png'
+        print("✓ Adjunto binario reutilizado en la segunda ejecución (revalidate=False y True) sin decodificarlo")
+
+        page = server.pages['home']
+        latin1_page = page.replace('</body>', '<p>Atenció</p></body>')
+        bodies = {
+            f'{WIKI_PREFIX}/attachment': ('application/octet-stream', os.urandom(1024) * (ATTACHMENT_SIZE // 1024)),
+            f'{WIKI_PREFIX}/cut': ('text/html; charset=utf-8', page.encode('utf-8')),
+            f'{WIKI_PREFIX}/short': ('text/html; charset=utf-8', b'<html></html>'),
+            f'{WIKI_PREFIX}/latin1': ('text/html; charset=ISO-8859-1', latin1_page.encode('latin-1')),
+        }
+        truncate = [f'{WIKI_PREFIX}/cut'] + [f'{WIKI_PREFIX}/always-cut'] * 10
+        bodies[f'{WIKI_PREFIX}/always-cut'] = bodies[f'{WIKI_PREFIX}/cut']
+        with CustomBodyServer(bodies, truncate=truncate) as server, HttpFetcher(backoff_base=0) as fetcher:
+            def obtain(name, file_path):
+                return _obtain_page(fetcher, name, f"{server.base_url}/{name}", file_path, None)
+
+            # Adjunto grande: no se decodifica y la memoria no depende del tamaño
+            attachment = Path(tmp, 'attachment.bin')
+            tracemalloc.start()
+            result = obtain('attachment', attachment)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            expected = bodies[f'{WIKI_PREFIX}/attachment'][1]
+            assert result['html'] == '' and result['sha256'] == hashlib.sha256(expected).hexdigest()
+            assert attachment.stat().st_size == ATTACHMENT_SIZE
+            assert peak < 2 * 1024 * 1024, f"Pico de memoria: {peak / 1024 / 1024:.1f} MB"
+            print(f"✓ Adjunto de {ATTACHMENT_SIZE // 1024 // 1024} MB con pico de {peak / 1024 / 1024:.2f} MB")
+
+            # Corte a mitad del cuerpo: se reintenta y el archivo final está completo
+            cut = Path(tmp, 'cut.html')
+            result = obtain('cut', cut)
+            assert result['html'] == page
+            assert cut.read_bytes() == page.encode('utf-8')
+            assert [entry['success'] for entry in result['log']] == [False, True]
+            print("✓ Corte a mitad del cuerpo reintentado")
+
+            # Cortes repetidos: un único presupuesto de max_retries intentos con numeración continua
+            requests_before = len(server.requests)
+            result = obtain('always-cut', Path(tmp, 'always-cut.html'))
+            assert result['html'] is None
+            assert [entry['attempt'] for entry in result['log']] == list(range(1, fetcher.max_retries + 1))
+            assert len(server.requests) - requests_before == fetcher.max_retries
+            print(f"✓ Cortes repetidos: {fetcher.max_retries} intentos en total, numerados 1..{fetcher.max_retries}")
+
+            # Contenido demasiado corto: la copia anterior no se toca
+            short = Path(tmp, 'short.html')
+            short.write_text("copia anterior", encoding='utf-8')
+            result = obtain('short', short)
+            assert result['html'] is None
+            assert short.read_text(encoding='utf-8') == "copia anterior"
+            assert not Path(tmp, 'short.html.tmp').exists()
+            print("✓ Respuesta inválida descartada sin tocar la copia anterior")
+
+            # Otro charset: se guarda en UTF-8 y el hash es el del archivo guardado
+            latin1 = Path(tmp, 'latin1.html')
+            result = obtain('latin1', latin1)
+            assert result['html'] == latin1_page
+            assert latin1.read_text(encoding='utf-8') == latin1_page
+            assert result['sha256'] == hashlib.sha256(latin1.read_bytes()).hexdigest()
+            print("✓ Página ISO-8859-1 guardada en UTF-8")
+
+            # Caché: con el hash esperado no hay request
+            requests_before = len(server.requests)
+            result = _obtain_page(fetcher, 'latin1', 'http://unused.invalid/latin1', latin1, result['sha256'])
+            assert result['from_cache'] and result['html'] == latin1_page
+            assert len(server.requests) == requests_before
+            print("✓ Página cacheada leída una sola vez, sin request")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_download_wiki_streaming()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,113 @@
+"""
+Test de la caché de conversión HTML -> Markdown de extract_text.
+"""
+
+import importlib
+import os
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.extract_text import extract_text
+from test.wiki_fixture_server import build_fixture_wiki
+
+# src/__init__ reexporta la función extract_text con el mismo nombre que el módulo
+extract_text_module = importlib.import_module('src.extract_text')
+
+
+def _write_pages(source_dir: Path, pages):
+    source_dir.mkdir(parents=True, exist_ok=True)
+    for name, page_html in pages.items():
+        (source_dir / f"{name.replace('/', '_')}.html").write_text(page_html, encoding='utf-8')
+
+
+def test_extract_text_cache():
+    """Solo se reconvierten las páginas cuyo HTML cambió y se eliminan los .md generados sin fuente."""
+    print("="*60)
+    print("TEST: Caché de conversión de extract_text")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source_dir = Path(tmp) / 'html'
+        output_dir = Path(tmp) / 'md'
+        pages = build_fixture_wiki()
+        pages['fallback'] = '<html><body><main><h2>Sin JSON</h2><p>Texto</p></main></body></html>'
+        _write_pages(source_dir, pages)
+
+        first = extract_text(str(source_dir), str(output_dir))
+        assert len(first) == len(pages)
+        uncached_dir = Path(tmp) / 'md_uncached'
+        assert extract_text(str(source_dir), str(uncached_dir), use_cache=False) == first
+        print(f"✓ Primera ejecución: {len(first)} páginas convertidas")
+
+        # Sin cambios: no se parsea ningún HTML y el resultado es el mismo
+        with mock.patch.object(extract_text_module, '_convert_page', side_effect=AssertionError("no debería convertir")):
+            second = extract_text(str(source_dir), str(output_dir))
+        assert second == first
+        print("✓ Sin cambios: todo reutilizado de caché")
+
+        # Un HTML modificado se reconvierte; el resto no
+        changed = next(iter(sorted(first)))
+        html_path = source_dir / f"{changed}.html"
+        html_path.write_text(html_path.read_text(encoding='utf-8').replace('</body>', '<!-- v2 --></body>'), encoding='utf-8')
+        with mock.patch.object(extract_text_module, '_convert_page', wraps=extract_text_module._convert_page) as convert:
+            third = extract_text(str(source_dir), str(output_dir))
+        assert [call.args[1] for call in convert.call_args_list] == [changed]
+        assert third == first
+        print(f"✓ Solo se reconvierte la página modificada: {changed}")
+
+        # Un .md borrado se regenera aunque la clave coincida
+        (output_dir / f"{changed}.md").unlink()
+        assert extract_text(str(source_dir), str(output_dir)) == first
+        assert (output_dir / f"{changed}.md").exists()
+        print("✓ .md borrado: regenerado")
+
+        # Cambiar la versión del conversor invalida toda la caché
+        with mock.patch.object(extract_text_module, 'CONVERTER_VERSION', extract_text_module.CONVERTER_VERSION + 1), \
+                mock.patch.object(extract_text_module, '_convert_page', wraps=extract_text_module._convert_page) as convert:
+            extract_text(str(source_dir), str(output_dir))
+        assert convert.call_count == len(pages)
+        print("✓ Nueva versión del conversor: todo reconvertido")
+
+        # Si la conversión de una página falla, su .md anterior no sobrevive
+        original_convert = extract_text_module._convert_page
+
+        def failing_convert(html_content, page_name):
+            if page_name == changed:
+                raise ValueError("HTML corrupto")
+            return original_convert(html_content, page_name)
+
+        html_path.write_text(html_path.read_text(encoding='utf-8').replace('<!-- v2 -->', '<!-- v3 -->'), encoding='utf-8')
+        with mock.patch.object(extract_text_module, '_convert_page', side_effect=failing_convert):
+            failed = extract_text(str(source_dir), str(output_dir))
+        assert changed not in failed
+        assert not (output_dir / f"{changed}.md").exists()
+        assert extract_text(str(source_dir), str(output_dir)) == first
+        print("✓ Conversión fallida: .md anterior eliminado y regenerado al corregirse")
+
+        # Los .md generados cuya fuente desapareció se eliminan; los ajenos a la caché no
+        (source_dir / 'fallback.html').unlink()
+        (output_dir / 'huerfano.md').write_text('# Huérfano', encoding='utf-8')
+        (uncached_dir / 'huerfano.md').write_text('# Huérfano', encoding='utf-8')
+        assert 'fallback' not in extract_text(str(source_dir), str(uncached_dir), use_cache=False)
+        assert (uncached_dir / 'fallback.md').exists() and (uncached_dir / 'huerfano.md').exists()
+        fourth = extract_text(str(source_dir), str(output_dir))
+        assert 'fallback' not in fourth
+        assert not (output_dir / 'fallback.md').exists()
+        assert (output_dir / 'huerfano.md').exists()
+        assert sorted(p.stem for p in output_dir.glob('*.md')) == sorted([*fourth, 'huerfano'])
+        print("✓ .md generados sin fuente eliminados; otros .md y use_cache=False intactos")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_extract_text_cache()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,65 @@
+"""
+Test de la conversión HTML -> Markdown en paralelo (extract_text con workers > 1).
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.extract_text import extract_text, _chunksize
+from test.wiki_fixture_server import build_fixture_wiki
+
+
+def _run(source_dir: Path, output_dir: Path, workers: int):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        pages = extract_text(str(source_dir), str(output_dir), use_cache=False, workers=workers)
+    files = {p.name: p.read_bytes() for p in sorted(output_dir.glob('*.md'))}
+    return pages, files, output.getvalue().replace(str(output_dir), '<out>')
+
+
+def test_extract_text_parallel():
+    """workers=4 produce el mismo diccionario, archivos, mensajes y contadores que workers=1."""
+    print("="*60)
+    print("TEST: extract_text en paralelo")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source_dir = Path(tmp) / 'html'
+        source_dir.mkdir()
+        for name, page_html in build_fixture_wiki(num_pages=40).items():
+            (source_dir / f"{name.replace('/', '_')}.html").write_text(page_html, encoding='utf-8')
+        # Página sin data-page-info (fallback con aviso) y página ilegible (error)
+        (source_dir / 'fallback.html').write_text('<body><main><p>Texto</p></main></body>', encoding='utf-8')
+        (source_dir / 'roto.html').write_bytes(b'\xff\xfe<html>')
+
+        sequential = _run(source_dir, Path(tmp) / 'seq', workers=1)
+        parallel = _run(source_dir, Path(tmp) / 'par', workers=4)
+
+        assert list(parallel[0]) == list(sequential[0]), "Mismo orden de páginas"
+        assert parallel[0] == sequential[0]
+        assert parallel[1] == sequential[1]
+        assert parallel[2] == sequential[2], "Mismos mensajes en el mismo orden"
+        assert 'Errores: 1' in parallel[2] and '[INFO] Usando fallback' in parallel[2]
+        print(f"✓ {len(parallel[0])} páginas idénticas con workers=1 y workers=4")
+
+    assert _chunksize(3, 16) == 1
+    assert _chunksize(1000, 4) == 32
+    assert _chunksize(200, 4) == 12
+    print("✓ Tamaño de lote")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_extract_text_parallel()
+    sys.exit(0 if success else 1)
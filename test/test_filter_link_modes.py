@@ -0,0 +1,100 @@
+"""
+Test de los modos de enlace de filter_useful_pages (hardlink, symlink, reflink,
+copia), de las páginas perezosas y de la detección de páginas sin cambios.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src import filter_useful_pages
+from src.download_wiki import PageFile
+
+PAGES = ['Overview', 'Keep', 'Other', 'News']
+
+
+def _filter(*args, **kwargs):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        result = filter_useful_pages(*args, **kwargs)
+    return result, output.getvalue()
+
+
+def test_filter_link_modes():
+    """Los modos de enlace producen el mismo contenido y las páginas sin cambios no se reescriben."""
+    print("="*60)
+    print("TEST: Modos de enlace de filter_useful_pages")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source_dir = os.path.join(tmp, 'html')
+        os.makedirs(source_dir)
+        for name in PAGES:
+            Path(source_dir, f"{name}.html").write_text(f"<html><body>{name} ñ</body></html>", encoding='utf-8')
+        excluded_file = os.path.join(tmp, 'pags_descarte.txt')
+        Path(excluded_file).write_text("News\n", encoding='utf-8')
+        expected = {name: f"<html><body>{name} ñ</body></html>" for name in PAGES if name != 'News'}
+
+        for mode in ('copy', 'hardlink', 'symlink', 'reflink', 'auto'):
+            output_dir = os.path.join(tmp, f"work_{mode}")
+            pages, _ = _filter(excluded_file, source_dir, output_dir, link_mode=mode)
+            assert pages == expected, mode
+            for name in expected:
+                output_file = Path(output_dir, f"{name}.html")
+                assert output_file.read_text(encoding='utf-8') == expected[name]
+                same_inode = os.path.samefile(output_file, Path(source_dir, f"{name}.html"))
+                if mode != 'auto':  # auto: reflink o hardlink según el sistema de archivos
+                    assert same_inode == (mode in ('hardlink', 'symlink')), (mode, name)
+                assert output_file.is_symlink() == (mode == 'symlink')
+            assert not list(Path(output_dir).glob('*.tmp'))
+        print("✓ copy, hardlink, symlink, reflink y auto: mismo contenido (reflink sin soporte -> copia)")
+
+        # Páginas perezosas: rutas que se leen al pedirlas
+        pages, _ = _filter(excluded_file, source_dir, os.path.join(tmp, 'work_copy'), lazy=True)
+        assert all(isinstance(page, PageFile) for page in pages.values())
+        assert {name: page.read() for name, page in pages.items()} == expected
+        with open(pages['Keep'], 'r', encoding='utf-8') as f:
+            assert f.read() == expected['Keep']
+        print("✓ lazy=True devuelve PageFile en lugar del contenido")
+
+        # Sin cambios: no se reescribe ninguna página (ni siquiera en modo copia)
+        output_dir = os.path.join(tmp, 'work_copy')
+        inodes = {name: os.stat(Path(output_dir, f"{name}.html")).st_ino for name in expected}
+        _, log = _filter(excluded_file, source_dir, output_dir, lazy=True)
+        assert log.count('(sin cambios)') == len(expected), log
+        assert inodes == {name: os.stat(Path(output_dir, f"{name}.html")).st_ino for name in expected}
+
+        # Una página cambiada (reescrita de forma atómica en la fuente) se vuelve a colocar
+        source_file = Path(source_dir, 'Keep.html')
+        tmp_file = Path(source_dir, 'Keep.html.new')
+        tmp_file.write_text("<html><body>Keep v2</body></html>", encoding='utf-8')
+        os.replace(tmp_file, source_file)
+        for mode in ('copy', 'hardlink'):
+            pages, log = _filter(excluded_file, source_dir, os.path.join(tmp, f"work_{mode}"), link_mode=mode)
+            assert pages['Keep'] == "<html><body>Keep v2</body></html>"
+            assert log.count('(sin cambios)') == len(expected) - 1, (mode, log)
+            assert f"Keep ({mode})" in log
+        print("✓ Páginas sin cambios omitidas; la modificada se vuelve a colocar")
+
+        try:
+            _filter(excluded_file, source_dir, output_dir, link_mode='move')
+            assert False, "Debería fallar"
+        except ValueError:
+            pass
+        print("✓ link_mode desconocido rechazado")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_filter_link_modes()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,81 @@
+"""
+Test del backend de ingesta por API de GitLab (download_wiki_api).
+Compara el resultado con el crawler HTML contra una wiki local.
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src import download_wiki_pages, download_wiki_api, extract_text
+from src.http_fetcher import HttpFetcher
+from test.wiki_fixture_server import FixtureWikiServer, API_PREFIX
+
+
+class FlakyApiServer(FixtureWikiServer):
+    """Responde 503 a la primera request de la API."""
+
+    def handle(self, handler):
+        if len(self.requests) == 1:
+            handler.send_response(503)
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+            return
+        super().handle(handler)
+
+
+def test_download_wiki_api():
+    """La API produce la misma estructura en disco y los mismos markdowns que el crawler."""
+    print("="*60)
+    print("TEST: Ingesta de la wiki vía API de GitLab")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp, FixtureWikiServer() as server:
+        api_dir = os.path.join(tmp, 'api_html')
+        crawl_dir = os.path.join(tmp, 'crawl_html')
+
+        pages = download_wiki_api(f"{server.base_url}/home", api_dir, per_page=5, rate_limit=0)
+        api_requests = [r for r in server.requests if r['path'].startswith(API_PREFIX)]
+        assert set(pages) == set(server.pages)
+        assert len(api_requests) == len(server.requests) == 3, "14 páginas en lotes de 5"
+        assert (Path(api_dir) / 'datanex' / 'overview.html').exists()
+        manifest = json.loads((Path(api_dir) / 'metadata' / 'manifest.json').read_text(encoding='utf-8'))
+        assert manifest['backend'] == 'api' and manifest['total_pages'] == len(server.pages)
+        print(f"✓ {len(pages)} páginas en {len(api_requests)} requests")
+
+        download_wiki_pages(f"{server.base_url}/home", crawl_dir, rate_limit=0, max_retries=1)
+
+        api_markdown = extract_text(source_dir=api_dir, output_dir=os.path.join(tmp, 'api_md'))
+        crawl_markdown = extract_text(source_dir=crawl_dir, output_dir=os.path.join(tmp, 'crawl_md'))
+        assert api_markdown and api_markdown == crawl_markdown
+        print(f"✓ {len(api_markdown)} markdowns idénticos a los del crawler HTML")
+
+        # Segunda ejecución: sin cambios no se reescribe ningún archivo
+        mtime = (Path(api_dir) / 'home.html').stat().st_mtime_ns
+        download_wiki_api(f"{server.base_url}/home", api_dir, per_page=5, rate_limit=0)
+        assert (Path(api_dir) / 'home.html').stat().st_mtime_ns == mtime
+        print("✓ Páginas sin cambios no se reescriben")
+        assert not list(Path(api_dir).rglob('*.tmp'))
+
+    # Reintentos a través de HttpFetcher: un 503 se reintenta y queda en el log
+    with tempfile.TemporaryDirectory() as tmp, FlakyApiServer() as server, HttpFetcher(backoff_base=0) as fetcher:
+        pages = download_wiki_api(f"{server.base_url}/home", tmp, per_page=100, fetcher=fetcher)
+        assert set(pages) == set(server.pages) and len(server.requests) == 2
+        log = [json.loads(line) for line in (Path(tmp) / 'metadata' / 'download_log.jsonl').read_text(encoding='utf-8').splitlines()]
+        assert [(entry['attempt'], entry['success']) for entry in log if 'attempt' in entry] == [(1, False), (2, True)]
+        print("✓ 503 reintentado por el fetcher compartido")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_download_wiki_api()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,145 @@
+"""
+Test del índice de hashes por stat (hash_index) y de su uso en download_wiki_pages.
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import src.hash_index as hash_index_module
+from src import download_wiki_pages
+from src.hash_index import HashIndex, file_sha256
+from test.wiki_fixture_server import FixtureWikiServer
+
+
+def _age_index(index_file: Path) -> None:
+    """Simula que el índice se guardó un rato después de escribir los archivos (evita entradas racy)."""
+    future = time.time() + 10
+    os.utime(index_file, (future, future))
+
+
+def _rewrite_same_stat(path: Path, data: bytes) -> None:
+    """Cambia el contenido sin cambiar tamaño, inodo ni mtime."""
+    st = os.stat(path)
+    assert len(data) == st.st_size
+    with open(path, 'r+b') as f:
+        f.write(data)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def test_hash_index():
+    """Solo se rehashea lo que cambió de stat; verify=True rehashea todo."""
+    print("="*60)
+    print("TEST: Índice de hashes por stat")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp, 'files')
+        (root / 'sub').mkdir(parents=True)
+        paths = [root / 'a.html', root / 'sub' / 'b.html']
+        for i, path in enumerate(paths):
+            path.write_bytes(f"contenido {i}".encode('utf-8') * 1000)
+        assert file_sha256(paths[0]) == hashlib.sha256(paths[0].read_bytes()).hexdigest()
+
+        index_file = Path(tmp, 'hash_index.json')
+        index = HashIndex(index_file, root)
+        digests = [index.sha256(path) for path in paths]
+        assert index.misses == 2 and index.hits == 0
+        index.save()
+        _age_index(index_file)
+
+        index = HashIndex(index_file, root)
+        assert [index.sha256(path) for path in paths] == digests
+        assert index.hits == 2 and index.misses == 0
+        print("✓ Archivos sin cambios de stat: hash leído del índice")
+
+        # Cambio de tamaño: se rehashea
+        paths[0].write_bytes(b"otro contenido")
+        assert index.sha256(paths[0]) == hashlib.sha256(b"otro contenido").hexdigest()
+        assert index.misses == 1
+        # Mismo stat con otro contenido: solo verify=True lo detecta
+        new_content = b"X" * paths[1].stat().st_size
+        _rewrite_same_stat(paths[1], new_content)
+        assert index.sha256(paths[1]) == digests[1]
+        assert index.sha256(paths[1], verify=True) == hashlib.sha256(new_content).hexdigest()
+        print("✓ Cambios de tamaño rehasheados; verify=True detecta cambios con el mismo stat")
+
+        # Entrada racy: archivo con el mismo mtime que el índice (pudo cambiar justo después de guardarlo)
+        index.update(paths[1], digests[1])
+        index.save()
+        mtime_ns = paths[1].stat().st_mtime_ns
+        os.utime(index_file, ns=(mtime_ns, mtime_ns))
+        index = HashIndex(index_file, root)
+        index.sha256(paths[1])
+        assert index.misses == 1
+        print("✓ Entradas con mtime >= el del índice se rehashean siempre")
+
+        # Índice corrupto: se ignora
+        index_file.write_text("{no es json", encoding='utf-8')
+        assert HashIndex(index_file, root).sha256(paths[0]) == hashlib.sha256(b"otro contenido").hexdigest()
+        print("✓ Índice corrupto ignorado")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+def test_download_wiki_hash_index():
+    """Una ejecución sin cambios no rehashea ninguna página; verify=True sí."""
+    print("="*60)
+    print("TEST: download_wiki_pages con índice de hashes")
+    print("="*60)
+
+    hashed = []
+    original = hash_index_module.file_sha256
+
+    def counting_sha256(path):
+        hashed.append(Path(path).name)
+        return original(path)
+
+    hash_index_module.file_sha256 = counting_sha256
+    try:
+        with tempfile.TemporaryDirectory() as tmp, FixtureWikiServer() as server:
+            output_dir = Path(tmp, 'wiki')
+            index_file = output_dir / 'metadata' / 'hash_index.json'
+            kwargs = dict(rate_limit=0, max_retries=1, revalidate=False)
+
+            pages = download_wiki_pages(f"{server.base_url}/home", str(output_dir), **kwargs)
+            assert hashed == [] and index_file.exists()
+            print(f"✓ Primera descarga: {len(pages)} páginas registradas sin hashear de nuevo")
+
+            _age_index(index_file)
+            server.requests.clear()
+            again = download_wiki_pages(f"{server.base_url}/home", str(output_dir), **kwargs)
+            assert again == pages and hashed == [] and server.requests == []
+            print("✓ Ejecución sin cambios: ninguna página rehasheada ni descargada")
+
+            # Página alterada sin cambiar su stat: verify=True la detecta y la vuelve a descargar
+            home = output_dir / 'home.html'
+            _rewrite_same_stat(home, b" " * home.stat().st_size)
+            _age_index(index_file)
+            verified = download_wiki_pages(f"{server.base_url}/home", str(output_dir), verify=True, **kwargs)
+            assert verified == pages
+            assert len(hashed) == len(pages)
+            assert len(server.requests) == 1 and server.requests[0]['path'].endswith('/home')
+            assert home.read_text(encoding='utf-8') == server.pages['home']
+            print(f"✓ verify=True: {len(hashed)} páginas rehasheadas y la alterada se vuelve a descargar")
+    finally:
+        hash_index_module.file_sha256 = original
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_hash_index() and test_download_wiki_hash_index()
+    sys.exit(0 if success else 1)
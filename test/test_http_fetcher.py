@@ -0,0 +1,137 @@
+"""
+Test del cliente HTTP compartido (http_fetcher): conexiones reutilizadas,
+reintentos y rate limit, contra una wiki local que cuenta conexiones TCP.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src import download_linked_pages, download_wiki_pages
+from src.http_fetcher import HttpFetcher
+from test.wiki_fixture_server import FixtureWikiServer
+
+
+class FlakyWikiServer(FixtureWikiServer):
+    """Responde 503 (con Retry-After: 0) a la primera request de cada página."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.failed = set()
+
+    def handle(self, handler):
+        if handler.path not in self.failed:
+            self.failed.add(handler.path)
+            handler.send_response(503)
+            handler.send_header('Retry-After', '0')
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+            return
+        super().handle(handler)
+
+
+def test_http_fetcher_connections():
+    """Una conexión keep-alive por worker, también compartida entre las dos descargas."""
+    print("="*60)
+    print("TEST: Reutilización de conexiones del fetcher")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with FixtureWikiServer() as server:
+            pages = download_wiki_pages(f"{server.base_url}/home", os.path.join(tmp, 'seq'),
+                                        rate_limit=0, max_retries=1)
+            assert len(pages) == len(server.pages)
+            assert server.connections == 1, server.connections
+        print(f"✓ Secuencial: {len(pages)} páginas con {server.connections} conexión")
+
+        with FixtureWikiServer(latency=0.01) as server:
+            download_wiki_pages(f"{server.base_url}/home", os.path.join(tmp, 'conc'),
+                                rate_limit=0, max_retries=1, workers=4)
+            assert 1 <= server.connections <= 4, server.connections
+        print(f"✓ workers=4: {server.connections} conexiones para {len(server.requests)} requests")
+
+        # download_wiki_pages y download_linked_pages con el mismo fetcher
+        markdown_dir = os.path.join(tmp, 'markdown')
+        os.makedirs(markdown_dir)
+        Path(markdown_dir, 'home.md').write_text(
+            "\n".join(f"- [Page {i}](https://gitlab.com/dsc-clinic/datascope/-/wikis/Page-{i})" for i in range(1, 6)),
+            encoding='utf-8')
+        with FixtureWikiServer() as server, HttpFetcher() as fetcher:
+            download_wiki_pages(f"{server.base_url}/home", os.path.join(tmp, 'shared'),
+                                max_depth=0, fetcher=fetcher)
+            with contextlib.redirect_stdout(io.StringIO()):
+                linked = download_linked_pages(markdown_dir, os.path.join(tmp, 'linked'), server.base_url,
+                                               fetcher=fetcher)
+            assert sorted(linked) == [f"Page-{i}" for i in range(1, 6)]
+            assert len(server.requests) == 6 and server.connections == 1, server.connections
+        print("✓ Fetcher compartido: 6 requests de ambas funciones en 1 conexión")
+
+        # Sin fetcher, download_linked_pages también reutiliza su conexión
+        with FixtureWikiServer() as server:
+            with contextlib.redirect_stdout(io.StringIO()):
+                linked = download_linked_pages(markdown_dir, os.path.join(tmp, 'linked2'), server.base_url,
+                                               rate_limit=0)
+            assert len(linked) == 5 and server.connections == 1
+        print("✓ download_linked_pages: 5 páginas en 1 conexión")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+def test_http_fetcher_retries():
+    """Reintenta 5xx con backoff, no reintenta 404 y respeta el rate limit."""
+    print("="*60)
+    print("TEST: Reintentos y rate limit del fetcher")
+    print("="*60)
+
+    with FlakyWikiServer() as server, HttpFetcher(max_retries=3, backoff_base=0.01) as fetcher:
+        failures = []
+        response, attempt = fetcher.get(f"{server.base_url}/home", on_failure=lambda a, e: failures.append(a))
+        assert response.status_code == 200 and attempt == 2 and failures == [1]
+
+        server.requests.clear()
+        try:
+            fetcher.get(f"{server.base_url}/no-existe")
+            assert False, "Debería fallar"
+        except requests.exceptions.HTTPError as e:
+            assert e.response.status_code == 404
+        # Primer intento 503 (se reintenta), segundo 404 (no se reintenta)
+        assert len(server.requests) == 2
+        print("✓ 503 reintentado, 404 sin reintentos")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            output_dir = os.path.join(tmp, 'wiki')
+            pages = download_wiki_pages(f"{server.base_url}/home", output_dir, rate_limit=0, fetcher=fetcher)
+            assert len(pages) == len(server.pages)
+            log = Path(output_dir, 'metadata', 'download_log.jsonl').read_text(encoding='utf-8')
+            assert log.count('"success": false') == len(server.pages) - 1  # home ya falló antes
+        print("✓ download_wiki_pages registra los intentos fallidos en el log")
+
+    with FixtureWikiServer() as server, HttpFetcher(rate_limit=0.05) as fetcher:
+        start = time.perf_counter()
+        for _ in range(5):
+            fetcher.get(f"{server.base_url}/home")
+        elapsed = time.perf_counter() - start
+        assert elapsed >= 0.19, elapsed
+    print(f"✓ Rate limit: 5 requests en {elapsed:.2f}s (mínimo 0.20s)")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_http_fetcher_connections() and test_http_fetcher_retries()
+    sys.exit(0 if success else 1)
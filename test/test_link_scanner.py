@@ -0,0 +1,84 @@
+"""
+Test del extractor de enlaces en streaming (link_scanner).
+Compara el resultado con la implementación de referencia con BeautifulSoup.
+"""
+
+import html
+import os
+import sys
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.download_wiki import _extract_wiki_links
+from test.wiki_fixture_server import build_fixture_wiki
+
+
+PAGE_URL = "https://gitlab.com/dsc-clinic/datascope/-/wikis/home"
+NETLOC = "gitlab.com"
+
+SIDEBAR = html.escape(
+    '<ul><li><a href="/x/-/wikis/Overview" data-wiki-page="Overview">Overview</a></li>'
+    '<li><a data-wiki-page="datanex/catalog">Catálogo</a></li>'
+    '<li><a data-wiki-page="#">vacío</a><a data-wiki-page="home">home</a></li></ul>'
+)
+
+CASES = {
+    'gitlab': (
+        '<html><body><div id="js-vue-wiki-app" data-custom-sidebar-content="' + SIDEBAR + '"></div>'
+        '<aside><a href="/dsc-clinic/datascope/-/wikis/Tables">Tables</a></aside>'
+        '<main><div class="wiki-page-details"><p><a href="Movements#uso">mov</a>'
+        '<a href="/dsc-clinic/datascope/-/wikis/Lab%20Results?version=2">lab</a>'
+        '<a href="https://otro.example.com/-/wikis/fuera">fuera</a>'
+        '<a href="/dsc-clinic/datascope/-/wikis/home">self</a></p></div></main></body></html>'
+    ),
+    'sidebar_by_class_substring': (
+        '<div class="layout-page"><div class="right-sidebar-expanded">'
+        '<a href="/g/p/-/wikis/A">A</a></div>'
+        '<article><a href="/g/p/-/wikis/B" data-wiki-page="B-real">B</a></article></div>'
+    ),
+    'priority_over_document_order': (
+        '<html><body><div class="wiki-page-x"><a href="/g/p/-/wikis/Primero">1</a></div>'
+        '<article><a href="/g/p/-/wikis/Segundo">2</a></article>'
+        '<nav aria-label="Wiki navigation"><a href="/g/p/-/wikis/Nav">n</a></nav>'
+        '<ul class="wiki-pages-list"><li><a href="/g/p/-/wikis/Lista">l</a></li></ul></body></html>'
+    ),
+    'no_body': '<p><a href="/g/p/-/wikis/Suelto">s</a><a href="/g/p/-/issues/1">issue</a></p>',
+    'unclosed_and_void_tags': (
+        '<body><main><p>texto<br><img src="x.png"><a href="/g/p/-/wikis/Uno">1</a>'
+        '<div><a href="/g/p/-/wikis/Dos">2</a></span></main>'
+        '<a href="/g/p/-/wikis/Fuera-Main">3</a></body>'
+    ),
+    'empty_self_closing_region': (
+        '<body><aside/><div class="sidebar-menu"><a href="/g/p/-/wikis/NoUsado">x</a></div>'
+        '<main><a href="/g/p/-/wikis/Main"/></main></body>'
+    ),
+    'entities_in_href': '<body><a href="/g/p/-/wikis/Caf%C3%A9&amp;Bar/">c</a><a href="">vacío</a></body>',
+}
+
+
+def test_link_scanner_matches_soup():
+    """El escáner en streaming devuelve los mismos enlaces y en el mismo orden."""
+    print("="*60)
+    print("TEST: Extracción de enlaces en streaming vs BeautifulSoup")
+    print("="*60)
+
+    cases = dict(CASES)
+    for name, page_html in build_fixture_wiki().items():
+        cases[f"fixture:{name}"] = page_html
+
+    for case_name, page_html in cases.items():
+        expected = _extract_wiki_links(page_html, PAGE_URL, 'home', NETLOC, engine='soup')
+        actual = _extract_wiki_links(page_html, PAGE_URL, 'home', NETLOC, engine='stream')
+        assert actual == expected, f"{case_name}: {actual} != {expected}"
+        print(f"  ✓ {case_name}: {len(actual)} enlaces")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_link_scanner_matches_soup()
+    sys.exit(0 if success else 1)
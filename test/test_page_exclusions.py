@@ -0,0 +1,195 @@
+"""
+Test de las exclusiones de páginas (page_exclusions) en el crawler y en los pasos
+de filtrado y unificación.
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src import download_wiki_pages, filter_useful_pages, unify_markdowns
+from src.page_exclusions import ExclusionMatcher
+from test.wiki_fixture_server import FixtureWikiServer, build_page_html
+
+EXCLUSIONS = """Secret
+glob:datanex/*
+re:Old-\\d+
+"""
+
+
+def _build_wiki():
+    """home -> A, B, Secret; Secret -> Hidden (solo alcanzable desde ahí); A -> datanex/*; B -> Old-1."""
+    links = {
+        'home': ['A', 'B', 'Secret'],
+        'A': ['datanex/x', 'datanex/y'],
+        'B': ['Old-1', 'A'],
+        'Secret': ['Hidden'],
+        'Hidden': ['home'],
+        'datanex/x': ['datanex/y'],
+        'datanex/y': [],
+        'Old-1': [],
+    }
+    return {name: build_page_html(name, [], content_links) for name, content_links in links.items()}
+
+
+def test_exclusion_matcher():
+    """Nombres exactos, globs con rutas anidadas y regex."""
+    print("="*60)
+    print("TEST: ExclusionMatcher")
+    print("="*60)
+
+    matcher = ExclusionMatcher(EXCLUSIONS.splitlines())
+    assert len(matcher) == 3 and matcher.exact == {'Secret'}
+    for page in ('Secret', 'datanex/x', 'datanex/sub/page', 'Old-1', 'Old-42'):
+        assert matcher.matches(page), page
+    for page in ('secret', 'Secret-2', 'datanex', 'other/datanex/x', 'Old-', 'Old-1b', 'home'):
+        assert not matcher.matches(page), page
+    assert 'Secret' in matcher and 'home' not in matcher
+    assert not ExclusionMatcher(["", "  "])
+    # Sin prefijo todo es un nombre exacto, como en el pags_descarte.txt original
+    literal = ExclusionMatcher(["#Notas", "FAQ*", "Tabla[1]"])
+    assert literal.exact == {'#Notas', 'FAQ*', 'Tabla[1]'}
+    for page in ('#Notas', 'FAQ*', 'Tabla[1]'):
+        assert literal.matches(page), page
+    for page in ('FAQs', 'Tabla1'):
+        assert not literal.matches(page), page
+    try:
+        ExclusionMatcher(["Secret", "", "re:(sin cerrar"])
+        assert False, "Debería fallar"
+    except ValueError as e:
+        assert 'línea 3' in str(e) and '(sin cerrar' in str(e), e
+    print("✓ Nombres exactos por defecto; globs (glob:) y regex (re:) solo con prefijo")
+
+    # Cada regex se compila por separado: flags en línea y referencias a grupos propios
+    independent = ExclusionMatcher(["re:(?i)draft-.*", "re:(\\w)\\1-copia", "glob:tmp/*"])
+    for page in ('DRAFT-1', 'Draft-x', 'aa-copia', 'tmp/x'):
+        assert independent.matches(page), page
+    for page in ('ab-copia', 'TMP/x', 'borrador'):
+        assert not independent.matches(page), page
+    print("✓ Regex independientes: (?i) y \\1 no afectan al resto de patrones")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+def test_crawler_exclusions():
+    """Las páginas excluidas no cuestan requests; en modo discover-only se leen sin guardarse."""
+    print("="*60)
+    print("TEST: Exclusiones en el crawler")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        exclusions_file = os.path.join(tmp, 'pags_descarte.txt')
+        Path(exclusions_file).write_text(EXCLUSIONS, encoding='utf-8')
+
+        with FixtureWikiServer(pages=_build_wiki()) as server:
+            output_dir = os.path.join(tmp, 'wiki')
+            pages = download_wiki_pages(f"{server.base_url}/home", output_dir, rate_limit=0, max_retries=1,
+                                        excluded_pages=exclusions_file, discover_excluded=False)
+            requested = sorted(r['path'].rsplit('/wikis/', 1)[1] for r in server.requests)
+            assert sorted(pages) == requested == ['A', 'B', 'home'], requested
+            manifest = json.loads(Path(output_dir, 'metadata', 'manifest.json').read_text(encoding='utf-8'))
+            assert manifest['discovery_stats']['skipped_by_exclusion'] == 4
+        print(f"✓ discover_excluded=False: {len(requested)} requests, páginas excluidas nunca pedidas (Hidden se pierde)")
+
+        with FixtureWikiServer(pages=_build_wiki()) as server:
+            output_dir = os.path.join(tmp, 'wiki_discover')
+            pages = download_wiki_pages(f"{server.base_url}/home", output_dir, rate_limit=0, max_retries=1,
+                                        excluded_pages=ExclusionMatcher.from_file(exclusions_file), workers=3)
+            assert sorted(pages) == ['A', 'B', 'Hidden', 'home']
+            assert len(server.requests) == len(server.pages)
+            stored = sorted(p.relative_to(output_dir).as_posix() for p in Path(output_dir).rglob('*.html'))
+            assert stored == ['A.html', 'B.html', 'Hidden.html', 'home.html'], stored
+            metadata = Path(output_dir, 'metadata')
+            manifest = json.loads((metadata / 'manifest.json').read_text(encoding='utf-8'))
+            assert manifest['discover_only_pages'] == ['Old-1', 'Secret', 'datanex/x', 'datanex/y']
+            assert 'Secret' not in json.loads((metadata / 'page_checksums.json').read_text(encoding='utf-8'))
+            print("✓ Por defecto (discover-only): Hidden encontrada a través de Secret, las excluidas no se guardan")
+
+            # Segunda ejecución: las excluidas también se revalidan con GET condicional
+            # y el 304 reutiliza sus enlaces guardados, sin HTML en disco
+            excluded = {'Old-1', 'Secret', 'datanex/x', 'datanex/y'}
+            server.requests.clear()
+            pages = download_wiki_pages(f"{server.base_url}/home", output_dir, rate_limit=0, max_retries=1,
+                                        excluded_pages=exclusions_file)
+            assert sorted(pages) == ['A', 'B', 'Hidden', 'home']
+            requested = {r['path'].rsplit('/wikis/', 1)[1]: r['headers'] for r in server.requests}
+            assert set(requested) == set(server.pages)
+            assert all('If-None-Match' in requested[name] for name in excluded), requested
+            log = [json.loads(line) for line in (metadata / 'download_log.jsonl').read_text(encoding='utf-8').splitlines()]
+            last_run = log[-len(server.pages):]
+            assert sorted(e['page_name'] for e in last_run if e.get('discover_only')) == sorted(excluded)
+            assert all(e['status_code'] == 304 for e in last_run)
+            assert not (Path(output_dir) / 'Secret.html').exists()
+
+            # Una excluida editada se vuelve a leer y se siguen sus enlaces nuevos
+            server.pages['Secret'] = build_page_html('Secret', [], ['Hidden', 'Nueva'])
+            server.pages['Nueva'] = build_page_html('Nueva', [], [])
+            pages = download_wiki_pages(f"{server.base_url}/home", output_dir, rate_limit=0, max_retries=1,
+                                        excluded_pages=exclusions_file)
+            assert sorted(pages) == ['A', 'B', 'Hidden', 'Nueva', 'home']
+
+            # revalidate=False: ni las páginas guardadas ni las excluidas cuestan requests
+            server.requests.clear()
+            pages = download_wiki_pages(f"{server.base_url}/home", output_dir, rate_limit=0, max_retries=1,
+                                        excluded_pages=exclusions_file, revalidate=False)
+            assert sorted(pages) == ['A', 'B', 'Hidden', 'Nueva', 'home'] and server.requests == []
+        print("✓ Segunda ejecución: excluidas revalidadas con 304 usando sus enlaces guardados")
+
+        # Los pasos siguientes aplican las mismas reglas
+        source_dir = os.path.join(tmp, 'html')
+        os.makedirs(source_dir)
+        for name in ('Overview', 'Keep', 'Secret', 'Old-7'):
+            Path(source_dir, f"{name}.html").write_text(f"<html><body>{name}</body></html>", encoding='utf-8')
+        with contextlib.redirect_stdout(io.StringIO()):
+            filtered = filter_useful_pages(exclusions_file, source_dir, os.path.join(tmp, 'work'))
+        assert sorted(filtered) == ['Keep', 'Overview']
+
+        markdown_dir = os.path.join(tmp, 'markdown')
+        os.makedirs(markdown_dir)
+        for name in ('Keep', 'Old-7', 'Secret'):
+            Path(markdown_dir, f"{name}.md").write_text(f"# {name}\n\ncontenido de {name}\n", encoding='utf-8')
+        unified_file = os.path.join(tmp, 'wiki_unified.md')
+        with contextlib.redirect_stdout(io.StringIO()):
+            unify_markdowns(markdown_dir, unified_file, exclusions_file)
+        unified = Path(unified_file).read_text(encoding='utf-8')
+        assert 'contenido de Keep' in unified and 'Old-7' not in unified and 'Secret' not in unified
+        print("✓ filter_useful_pages y unify_markdowns usan el mismo matcher")
+
+        # Un patrón no válido falla igual en los tres pasos (nada se ignora en silencio)
+        invalid_file = os.path.join(tmp, 'pags_descarte_invalido.txt')
+        Path(invalid_file).write_text("Secret\nre:Old-(\\d+\n", encoding='utf-8')
+        steps = {
+            'download_wiki_pages': lambda: download_wiki_pages(
+                "http://127.0.0.1:9/grupo/proyecto/-/wikis/home", os.path.join(tmp, 'wiki_invalid'), excluded_pages=invalid_file),
+            'filter_useful_pages': lambda: filter_useful_pages(invalid_file, source_dir, os.path.join(tmp, 'work2')),
+            'unify_markdowns': lambda: unify_markdowns(markdown_dir, os.path.join(tmp, 'u2.md'), invalid_file),
+        }
+        for step, run in steps.items():
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    run()
+                assert False, f"{step} debería fallar"
+            except ValueError as e:
+                assert invalid_file in str(e) and 'línea 2' in str(e), (step, e)
+        assert not os.path.exists(os.path.join(tmp, 'u2.md'))
+        print("✓ Regex no válida: ValueError con la línea en descarga, filtrado y unificación")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_exclusion_matcher() and test_crawler_exclusions()
+    sys.exit(0 if success else 1)
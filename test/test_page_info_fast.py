@@ -0,0 +1,98 @@
+"""
+Test del camino rápido de extracción de data-page-info (sin construir el DOM).
+Compara el resultado con la extracción completa con BeautifulSoup.
+"""
+
+import contextlib
+import html
+import importlib
+import io
+import json
+import os
+import sys
+from unittest import mock
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench.fixtures import generate_wiki_corpus
+from test.wiki_fixture_server import build_fixture_wiki
+
+# src/__init__ reexporta la función extract_text con el mismo nombre que el módulo
+extract_text_module = importlib.import_module('src.extract_text')
+
+
+def _info(content, **extra):
+    return html.escape(json.dumps({'title': 't', 'content': content, **extra}))
+
+
+CRLF_CONTENT = "# Hola\r\nmundo\r\n\r\n\r\nfin"
+
+CASES = {
+    'simple': f'<body><div id="app" data-page-info="{_info(CRLF_CONTENT)}"></div></body>',
+    'single_quotes': f"<body><DIV class=x data-page-info='{_info('texto &amp; más')}'></DIV></body>",
+    'attr_value_with_gt': f'<body><div title="a > b" data-page-info="{_info("contenido")}"></div></body>',
+    'entities_double_escaped': '<div data-page-info="{&quot;content&quot;: &quot;a &amp;amp; b&quot;}"></div>',
+    'in_script_first': (
+        '<script>var tpl = \'<div data-page-info="{&quot;content&quot;: &quot;falso&quot;}">\';</script>'
+        f'<div data-page-info="{_info("verdadero")}"></div>'
+    ),
+    'in_comment_first': (
+        '<!-- <div data-page-info="{&quot;content&quot;: &quot;falso&quot;}"> -->'
+        f'<div data-page-info="{_info("verdadero")}"></div>'
+    ),
+    'in_text_first': f'<p>usa data-page-info para el contenido</p><div data-page-info="{_info("ok")}"></div>',
+    'not_a_div': f'<body><span data-page-info="{_info("span")}"></span><main><p>Texto principal</p></main></body>',
+    'div_prefix_tag': f'<body><divx data-page-info="{_info("x")}"></divx><article>Artículo</article></body>',
+    'empty_attribute': '<body><div data-page-info=""></div><main>Fallback</main></body>',
+    'invalid_json': '<body><div data-page-info="{no es json"></div><main>Fallback</main></body>',
+    'no_content_field': f'<body><div data-page-info="{html.escape(json.dumps({"title": "t"}))}"></div><main>x</main></body>',
+    'empty_content': f'<body><div data-page-info="{_info("")}"></div><main>vacío</main></body>',
+    'no_attribute': '<html><body><div class="wiki"><h2>Título</h2><p>Texto</p></div></body></html>',
+}
+
+
+def _convert(convert, page_html):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        result = convert(page_html, 'pagina-test')
+    return result, output.getvalue()
+
+
+def test_page_info_fast_path():
+    """El camino rápido produce el mismo markdown (y los mismos avisos) que BeautifulSoup."""
+    print("="*60)
+    print("TEST: Camino rápido de data-page-info")
+    print("="*60)
+
+    def soup_only(page_html, page_name):
+        with mock.patch.object(extract_text_module, '_fast_page_content', return_value=None):
+            return extract_text_module._convert_page(page_html, page_name)
+
+    cases = dict(CASES)
+    for name, page_html in build_fixture_wiki().items():
+        cases[f"fixture:{name}"] = page_html
+    for name, page_html in generate_wiki_corpus(num_pages=3, padding_kb=20).items():
+        cases[f"gitlab:{name}"] = page_html
+
+    fast_hits = 0
+    for case_name, page_html in cases.items():
+        expected = _convert(soup_only, page_html)
+        actual = _convert(extract_text_module._convert_page, page_html)
+        assert actual == expected, f"{case_name}: {actual!r} != {expected!r}"
+        if extract_text_module._fast_page_content(page_html) is not None:
+            fast_hits += 1
+        print(f"  ✓ {case_name}")
+
+    assert fast_hits == len(cases) - 7, f"Camino rápido usado en {fast_hits} de {len(cases)}"
+    print(f"✓ Camino rápido usado en {fast_hits} de {len(cases)} páginas")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_page_info_fast_path()
+    sys.exit(0 if success else 1)
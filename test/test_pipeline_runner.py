@@ -0,0 +1,181 @@
+"""
+Test de la ejecución incremental del pipeline (PipelineRunner).
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.pipeline_runner import PipelineRunner, Stage
+
+
+def test_pipeline_runner():
+    """Omite pasos sin cambios y repite solo los afectados por un cambio."""
+    print("="*60)
+    print("TEST: Ejecución incremental del pipeline")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (tmp / 'src').mkdir()
+        (tmp / 'src' / 'a.txt').write_text('hola', encoding='utf-8')
+        (tmp / 'src' / 'b.txt').write_text('mundo', encoding='utf-8')
+        calls = {'upper': 0, 'join': 0}
+
+        def upper(source_dir, output_dir, first_only=False):
+            calls['upper'] += 1
+            os.makedirs(output_dir, exist_ok=True)
+            result = {}
+            for path in sorted(Path(source_dir).glob('*.txt')):
+                text = path.read_text(encoding='utf-8')
+                result[path.stem] = text[0].upper() + text[1:] if first_only else text.upper()
+                (Path(output_dir) / path.name).write_text(result[path.stem], encoding='utf-8')
+            return result
+
+        def join(source_dir, output_file):
+            calls['join'] += 1
+            content = ' '.join(p.read_text(encoding='utf-8') for p in sorted(Path(source_dir).glob('*.txt')))
+            Path(output_file).write_text(content, encoding='utf-8')
+            return output_file
+
+        def stages(**upper_kwargs):
+            return [
+                Stage(
+                    name='upper',
+                    func=upper,
+                    kwargs=dict(source_dir=str(tmp / 'src'), output_dir=str(tmp / 'up'), **upper_kwargs),
+                    inputs=[str(tmp / 'src' / '*.txt')],
+                    outputs=[str(tmp / 'up')]
+                ),
+                Stage(
+                    name='join',
+                    func=join,
+                    kwargs=dict(source_dir=str(tmp / 'up'), output_file=str(tmp / 'out.txt')),
+                    inputs=[str(tmp / 'up')],
+                    outputs=[str(tmp / 'out.txt')]
+                ),
+            ]
+
+        state_file = str(tmp / 'state.json')
+
+        # Primera ejecución: todo se ejecuta
+        results = PipelineRunner(state_file).run(stages())
+        assert calls == {'upper': 1, 'join': 1}
+        assert results['join'] == str(tmp / 'out.txt')
+        assert (tmp / 'out.txt').read_text(encoding='utf-8') == 'HOLA MUNDO'
+        print("✓ Primera ejecución completa")
+
+        # Sin cambios: todo se omite (también con una instancia nueva del runner)
+        results = PipelineRunner(state_file).run(stages())
+        assert calls == {'upper': 1, 'join': 1}
+        assert results == {'upper': None, 'join': None}
+        print("✓ Sin cambios: pasos omitidos")
+
+        # Cambio en una entrada: se repite la cadena afectada
+        (tmp / 'src' / 'b.txt').write_text('mundo!', encoding='utf-8')
+        PipelineRunner(state_file).run(stages())
+        assert calls == {'upper': 2, 'join': 2}
+        assert (tmp / 'out.txt').read_text(encoding='utf-8') == 'HOLA MUNDO!'
+        print("✓ Cambio de entrada: pasos afectados repetidos")
+
+        # Mismo contenido con otro mtime: no cuenta como cambio
+        os.utime(tmp / 'src' / 'a.txt', (1, 1))
+        PipelineRunner(state_file).run(stages())
+        assert calls == {'upper': 2, 'join': 2}
+        print("✓ Solo cambia la fecha: pasos omitidos")
+
+        # Cambio de parámetros con salida idéntica: el paso se repite,
+        # pero el siguiente se omite (corte temprano)
+        (tmp / 'src' / 'a.txt').write_text('HOLA', encoding='utf-8')
+        (tmp / 'src' / 'b.txt').write_text('MUNDO!', encoding='utf-8')
+        PipelineRunner(state_file).run(stages())
+        assert calls == {'upper': 3, 'join': 2}
+        PipelineRunner(state_file).run(stages(first_only=True))
+        assert calls == {'upper': 4, 'join': 2}
+        print("✓ Cambio de parámetros sin cambio de salida: corte temprano")
+
+        # Salida borrada: el paso se vuelve a ejecutar
+        (tmp / 'out.txt').unlink()
+        PipelineRunner(state_file).run(stages(first_only=True))
+        assert calls == {'upper': 4, 'join': 3}
+        assert (tmp / 'out.txt').exists()
+        print("✓ Salida borrada: paso repetido")
+
+        # force=True ejecuta todo
+        PipelineRunner(state_file, force=True).run(stages(first_only=True))
+        assert calls == {'upper': 5, 'join': 4}
+        print("✓ force=True ejecuta todos los pasos")
+
+        # Un resultado vacío no se registra y se reintenta
+        failing = Stage(name='falla', func=lambda: {}, inputs=[str(tmp / 'src')])
+        runner = PipelineRunner(state_file)
+        assert runner.run_stage(failing) == {}
+        assert 'falla' not in runner.state
+        print("✓ Paso fallido no se registra")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+def test_pipeline_runner_code_dependencies():
+    """Cambiar un módulo importado por el paso lo invalida; los parámetros ignorados no."""
+    print("="*60)
+    print("TEST: Huella de código y parámetros de ejecución")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        package = tmp / 'pkg_stage_deps'
+        package.mkdir()
+        (package / '__init__.py').write_text('', encoding='utf-8')
+        (package / 'helpers.py').write_text('SEPARATOR = "-"\n', encoding='utf-8')
+        (package / 'steps.py').write_text(
+            'def write(output_file, calls_file, workers=1):\n'
+            '    from .helpers import SEPARATOR\n'
+            '    with open(calls_file, "a", encoding="utf-8") as f:\n'
+            '        f.write(f"{workers}\\n")\n'
+            '    with open(output_file, "w", encoding="utf-8") as f:\n'
+            '        f.write(SEPARATOR * 3)\n'
+            '    return output_file\n',
+            encoding='utf-8')
+        calls_file = tmp / 'calls.txt'
+        sys.path.insert(0, str(tmp))
+        try:
+            from pkg_stage_deps.steps import write
+
+            def stage(workers):
+                return Stage(name='write', func=write,
+                             kwargs=dict(output_file=str(tmp / 'out.txt'), calls_file=str(calls_file), workers=workers),
+                             outputs=[str(tmp / 'out.txt')], ignore_kwargs=['workers'])
+
+            state_file = str(tmp / 'state.json')
+            PipelineRunner(state_file).run_stage(stage(workers=4))
+            PipelineRunner(state_file).run_stage(stage(workers=16))
+            assert calls_file.read_text(encoding='utf-8').split() == ['4']
+            print("✓ workers fuera de la huella: otro número de workers no repite el paso")
+
+            # Cambio en un módulo auxiliar importado (dentro de la función) por el paso
+            (package / 'helpers.py').write_text('SEPARATOR = "="\n', encoding='utf-8')
+            PipelineRunner(state_file).run_stage(stage(workers=16))
+            assert calls_file.read_text(encoding='utf-8').split() == ['4', '16']
+            print("✓ Cambio en un módulo importado por el paso: paso repetido")
+        finally:
+            sys.path.remove(str(tmp))
+            for name in [m for m in sys.modules if m.startswith('pkg_stage_deps')]:
+                del sys.modules[name]
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_pipeline_runner() and test_pipeline_runner_code_dependencies()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,67 @@
+"""
+Test del procesamiento de diccionarios en paralelo (unify_dictionaries con workers > 1).
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.unify_dictionaries import unify_dictionaries
+from bench.fixtures import generate_dictionary_rows, write_dictionary_csv
+
+
+def _unify(dicc_dir, output_file, **kwargs):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        result = unify_dictionaries(dicc_dir, output_file, **kwargs)
+    return result, output.getvalue().replace(output_file, '<out>')
+
+
+def test_unify_dictionaries_parallel():
+    """workers=3 produce el mismo archivo y los mismos mensajes que workers=1."""
+    print("="*60)
+    print("TEST: unify_dictionaries en paralelo")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dicc_dir = os.path.join(tmp, 'dicc')
+        os.makedirs(dicc_dir)
+        for name, kind in (('dic_diagnostic.csv', 'icd'), ('dic_procedures.csv', 'lab')):
+            with open(os.path.join(dicc_dir, name), 'w', encoding='utf-8') as f:
+                f.write("x_ref;x_descr\n")
+                for ref, descr in generate_dictionary_rows(4000, kind=kind):
+                    f.write(f"{ref};{descr}\n")
+        write_dictionary_csv(os.path.join(dicc_dir, 'dic_lab.csv'), 3000)
+        # CSV sin columnas *_ref / *_descr: aviso y se omite
+        with open(os.path.join(dicc_dir, 'dic_units.csv'), 'w', encoding='utf-8') as f:
+            f.write("code;name\nmg;miligramo\n")
+
+        for streaming in (False, True):
+            sequential_file = os.path.join(tmp, f'seq_{streaming}.md')
+            parallel_file = os.path.join(tmp, f'par_{streaming}.md')
+            sequential = _unify(dicc_dir, sequential_file, streaming=streaming)
+            parallel = _unify(dicc_dir, parallel_file, streaming=streaming, workers=3)
+
+            assert sequential[0] == sequential_file and parallel[0] == parallel_file
+            assert parallel[1] == sequential[1], "Mismos mensajes en el mismo orden"
+            assert Path(parallel_file).read_bytes() == Path(sequential_file).read_bytes()
+            headers = [line for line in Path(parallel_file).read_text(encoding='utf-8').split('\n') if line.startswith('## ')]
+            assert headers == ['## Diagnostic', '## Lab', '## Procedures']
+            assert 'No se encontraron columnas *_ref y *_descr en dic_units.csv' in parallel[1]
+            print(f"✓ streaming={streaming}: salida idéntica con workers=1 y workers=3")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_unify_dictionaries_parallel()
+    sys.exit(0 if success else 1)
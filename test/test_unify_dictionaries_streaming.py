@@ -0,0 +1,86 @@
+"""
+Test del modo streaming de unify_dictionaries (memoria acotada).
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+# Añadir el directorio raíz al path para importar src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.unify_dictionaries import unify_dictionaries, _compact_tree_structure, MAX_GROUP_SIZE
+from bench.fixtures import generate_dictionary_rows, write_dictionary_csv
+
+
+def _unify(dicc_dir, output_file, **kwargs):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        result = unify_dictionaries(dicc_dir, output_file, **kwargs)
+    return result, output.getvalue()
+
+
+def _write_csv(path, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("diag_ref;diag_descr\n")
+        for ref, descr in rows:
+            f.write(f"{ref};{descr}\n")
+
+
+def test_unify_dictionaries_streaming():
+    """El modo streaming produce las mismas líneas que el modo en memoria."""
+    print("="*60)
+    print("TEST: unify_dictionaries en streaming")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dicc_dir = os.path.join(tmp, 'dicc')
+        os.makedirs(dicc_dir)
+        rows = generate_dictionary_rows(5000, kind='icd')
+        _write_csv(os.path.join(dicc_dir, 'dic_diagnostic.csv'), rows)
+        write_dictionary_csv(os.path.join(dicc_dir, 'dic_lab.csv'), 3000)
+
+        memory_file = os.path.join(tmp, 'memory.md')
+        streaming_file = os.path.join(tmp, 'streaming.md')
+        assert _unify(dicc_dir, memory_file)[0] == memory_file
+        result, log = _unify(dicc_dir, streaming_file, streaming=True, chunk_rows=700)
+        assert result == streaming_file
+        assert 'ordenación externa' in log and '5000 tuplas procesadas' in log
+        assert not os.path.exists(streaming_file + '.tmp')
+
+        memory = Path(memory_file).read_text(encoding='utf-8')
+        streaming = Path(streaming_file).read_text(encoding='utf-8')
+        assert Counter(memory.split('\n')) == Counter(streaming.split('\n'))
+        assert [line for line in streaming.split('\n') if line.startswith('## ')] == ['## Diagnostic', '## Lab']
+        print(f"✓ Mismas líneas en ambos modos ({len(streaming.splitlines())} líneas)")
+
+        # CSV ya ordenados: sin ordenación externa
+        _write_csv(os.path.join(dicc_dir, 'dic_diagnostic.csv'), sorted(rows))
+        write_dictionary_csv(os.path.join(dicc_dir, 'dic_lab.csv'), 3000, sorted_refs=True)
+        _unify(dicc_dir, memory_file)
+        result, log = _unify(dicc_dir, streaming_file, streaming=True, chunk_rows=700)
+        assert 'ordenación externa' not in log
+        memory = Path(memory_file).read_text(encoding='utf-8')
+        assert Counter(Path(streaming_file).read_text(encoding='utf-8').split('\n')) == Counter(memory.split('\n'))
+        print("✓ CSV ordenados: sin ordenación externa")
+
+    # Los grupos no superan MAX_GROUP_SIZE entradas
+    tuples = [(f"LAB{i:05d}", f"Prueba de laboratorio {i}") for i in range(10 * MAX_GROUP_SIZE)]
+    for entry in _compact_tree_structure(tuples):
+        if isinstance(entry, str):
+            assert entry.count('|') <= MAX_GROUP_SIZE, entry
+    print(f"✓ Grupos de como máximo {MAX_GROUP_SIZE} entradas")
+
+    print("\n" + "="*60)
+    print("✓ TEST COMPLETADO")
+    print("="*60)
+    return True
+
+
+if __name__ == "__main__":
+    success = test_unify_dictionaries_streaming()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,181 @@
+"""
+Servidor HTTP local que simula una wiki de GitLab para los tests.
+
+Sirve páginas con el sidebar escapado en data-custom-sidebar-content y el
+contenido markdown en data-page-info, igual que gitlab.com, para poder probar
+el crawler sin acceso a red.
+"""
+
+import hashlib
+import html
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Optional
+import re
+from urllib.parse import parse_qs, unquote, urlparse
+
+
+WIKI_PREFIX = "/dsc-clinic/datascope/-/wikis"
+API_PREFIX = "/api/v4/projects/dsc-clinic%2Fdatascope/wikis"
+
+
+def build_page_html(page_name: str, sidebar_pages: List[str], content_links: List[str]) -> str:
+    """
+    Genera el HTML de una página con la misma estructura que GitLab.
+
+    Args:
+        page_name: Nombre de la página
+        sidebar_pages: Páginas enlazadas desde el sidebar personalizado
+        content_links: Páginas enlazadas desde el contenido principal
+
+    Returns:
+        HTML completo de la página
+    """
+    sidebar_html = '<ul>' + ''.join(
+        f'<li><a href="{WIKI_PREFIX}/{p}" data-wiki-page="{p}">{p}</a></li>'
+        for p in sidebar_pages
+    ) + '</ul>'
+    markdown = f"Contenido de la pagina {page_name}.\r\n\r\n" + '\r\n'.join(
+        f"- [{p}]({WIKI_PREFIX}/{p})" for p in content_links
+    )
+    page_info = json.dumps({'title': page_name, 'content': markdown})
+    content_html = ''.join(f'<p><a href="{WIKI_PREFIX}/{p}">{p}</a></p>' for p in content_links)
+    return (
+        '<!DOCTYPE html>\n<html><head><title>' + page_name + ' · Wiki</title></head><body>'
+        f'<div id="js-vue-wiki-app" data-page-info="{html.escape(page_info)}" '
+        f'data-custom-sidebar-content="{html.escape(sidebar_html)}"></div>'
+        f'<main><div class="wiki-page-details"><h1>{page_name}</h1>{content_html}'
+        '<a href="https://external.example.com/-/wikis/fuera">externo</a></div></main>'
+        '</body></html>'
+    )
+
+
+def build_fixture_wiki(num_pages: int = 12) -> Dict[str, str]:
+    """
+    Construye una wiki sintética: home enlaza a un subconjunto de páginas desde el
+    sidebar y el resto se descubre a través del contenido (incluidas páginas anidadas).
+
+    Returns:
+        Diccionario nombre de página -> HTML
+    """
+    names = ['home'] + [f"Page-{i}" for i in range(1, num_pages)] + ['datanex/overview', 'datanex/catalog']
+    sidebar = names[1:num_pages // 2]
+    pages = {}
+    for i, name in enumerate(names):
+        content_links = [names[(i + k) % len(names)] for k in (1, 3)]
+        pages[name] = build_page_html(name, sidebar if name == 'home' else [], content_links)
+    return pages
+
+
+class FixtureWikiServer:
+    """
+    Servidor de la wiki sintética en un hilo en segundo plano.
+
+    Registra cada request (ruta y cabeceras) y el número de conexiones TCP
+    aceptadas, para poder verificar caché, reintentos y reutilización de conexiones.
+    Con conditional=True envía ETag / Last-Modified y responde 304 a los GET
+    condicionales cuyo validador coincide.
+    """
+
+    LAST_MODIFIED = 'Wed, 15 Oct 2025 10:00:00 GMT'
+
+    def __init__(self, pages: Optional[Dict[str, str]] = None, latency: float = 0.0, conditional: bool = True):
+        self.pages = pages if pages is not None else build_fixture_wiki()
+        self.latency = latency
+        self.conditional = conditional
+        self.requests: List[Dict] = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{WIKI_PREFIX}"
+
+    def page_info(self, page_name: str) -> Dict:
+        """Decodifica el JSON data-page-info de una página servida."""
+        match = re.search(r'data-page-info="([^"]*)"', self.pages[page_name])
+        return json.loads(html.unescape(match.group(1)))
+
+    def handle_api(self, handler: BaseHTTPRequestHandler):
+        """Simula GET /api/v4/projects/:id/wikis?with_content=1 con paginación."""
+        query = parse_qs(urlparse(handler.path).query)
+        per_page = int(query.get('per_page', ['20'])[0])
+        page = int(query.get('page', ['1'])[0])
+        names = list(self.pages)
+        batch = names[(page - 1) * per_page:page * per_page]
+        items = []
+        for name in batch:
+            item = {'format': 'markdown', 'slug': name, 'title': name.split('/')[-1], 'encoding': 'UTF-8'}
+            if query.get('with_content') == ['1']:
+                item['content'] = self.page_info(name)['content']
+            items.append(item)
+        body = json.dumps(items).encode('utf-8')
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('X-Next-Page', str(page + 1) if page * per_page < len(names) else '')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def handle(self, handler: BaseHTTPRequestHandler):
+        """Responde a un GET. Las subclases pueden sobrescribirlo."""
+        if urlparse(handler.path).path == API_PREFIX:
+            self.handle_api(handler)
+            return
+        path = unquote(urlparse(handler.path).path)
+        page_name = path[len(WIKI_PREFIX) + 1:] if path.startswith(WIKI_PREFIX + '/') else None
+        if page_name not in self.pages:
+            handler.send_error(404)
+            return
+        body = self.pages[page_name].encode('utf-8')
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        if self.conditional and handler.headers.get('If-None-Match') == etag:
+            handler.send_response(304)
+            handler.send_header('ETag', etag)
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+            return
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'text/html; charset=utf-8')
+        if self.conditional:
+            handler.send_header('ETag', etag)
+            handler.send_header('Last-Modified', self.LAST_MODIFIED)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def __enter__(self):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with fixture._lock:
+                    fixture.connections += 1
+
+            def do_GET(self):
+                with fixture._lock:
+                    fixture.requests.append({'path': self.path, 'headers': dict(self.headers)})
+                if fixture.latency:
+                    threading.Event().wait(fixture.latency)
+                fixture.handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()